@@ -0,0 +1,262 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+import profiling
+from main import DataVacancy, InputConect, Report
+
+STAGES = ('input_data', 'columnar', 'separate', 'convert', 'excel', 'image', 'pdf')
+
+class LegacySalary:
+    """
+    Зарплата в прежнем представлении - обычный класс со словарём атрибутов
+    """
+    def __init__(self, salary_from, salary_to, salary_gross, salary_currency):
+        self.salary_from = int(float(salary_from))
+        self.salary_to = int(float(salary_to))
+        self.salary_gross = salary_gross
+        self.salary_currency = salary_currency
+
+class LegacyVacancy:
+    """
+    Вакансия в прежнем представлении - со словарём атрибутов и вложенной зарплатой
+    """
+    def __init__(self, name, salary_from, salary_to, salary_currency, area_name, published_at):
+        self.name = name
+        self.salary = LegacySalary(salary_from, salary_to, False, salary_currency)
+        self.area_name = area_name
+        self.published_at = published_at
+
+def retained_memory(build):
+    """
+    Возвращает объём памяти, который остаётся занятым результатом build
+
+    Args:
+        build (function): Функция без аргументов, строящая структуру данных
+
+    Returns:
+        tuple: Количество байт и сама структура
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+def memory_per_row(file_name):
+    """
+    Сравнивает память на одну вакансию для разных представлений
+
+    Args:
+        file_name (str): Путь к csv файлу
+
+    Returns:
+        dict: Словарь представление - байт на вакансию
+    """
+    ic = InputConect()
+    builders = {
+        'legacy': lambda: [LegacyVacancy(*row) for row in ic.read_rows(file_name)],
+        'slots': lambda: [DataVacancy(*row) for row in ic.read_rows(file_name)],
+        'table': lambda: ic.read_table(file_name),
+    }
+
+    result = {}
+    for name, build in builders.items():
+        size, data = retained_memory(build)
+        result[name] = round(size / max(len(data), 1), 1)
+        del data
+    return result
+
+def matcher_timings(file_name, counts=(8, 32, 64, 128, 512), seed=0):
+    """
+    Сравнивает поиск профессий автоматом Ахо - Корасик и перебором подстрок
+
+    Каждая строка проверяется один раз, без кеша ProfessionMatcher, а профессии -
+    слова из названий вакансий файла
+
+    Args:
+        file_name (str): Путь к csv файлу
+        counts (tuple): Количества профессий
+        seed (int): Зерно выбора профессий
+
+    Returns:
+        dict: Словарь количество профессий - {'automaton': секунды, 'loop': секунды}
+    """
+    from matcher import ProfessionMatcher
+
+    names = list({row[0] for row in InputConect().read_rows(file_name)})
+    words = sorted({word for name in names for word in name.split()})
+    rng = random.Random(seed)
+
+    result = {}
+    for count in counts:
+        jobs = [rng.choice(words)[:rng.randint(3, 8)] for _ in range(count)]
+        result[count] = {}
+        for mode, automaton in (('automaton', 0), ('loop', count + 1)):
+            matcher = ProfessionMatcher(jobs, automaton)
+            start = time.perf_counter()
+            for name in names:
+                matcher.match(name)
+            result[count][mode] = round(time.perf_counter() - start, 4)
+    return result
+
+def html_converter(html, file_name):
+    """
+    Заменяет wkhtmltopdf в замерах: записывает html вместо pdf
+
+    Args:
+        html (str): Html страница
+        file_name (str): Путь к файлу
+    """
+    with open(file_name, 'w', encoding='utf-8') as file:
+        file.write(html)
+
+def run_stage(stage, file_name, rates_file, directory, job, data):
+    """
+    Выполняет этап в отдельном процессе и измеряет время и пиковую память процесса
+
+    Args:
+        stage (str): Название этапа из STAGES
+        file_name (str): Путь к csv файлу с вакансиями
+        rates_file (str): Путь к таблице курсов
+        directory (str): Папка для результатов
+        job (str): Название профессии
+        data (tuple): Статистика для этапов отчёта
+
+    Returns:
+        dict: {'seconds': время, 'peak_rss': пиковая память процесса в байтах, None - не в Unix}
+    """
+    start = time.perf_counter()
+    match stage:
+        case 'input_data':
+            InputConect().read_statistics(file_name, job).result()
+        case 'columnar':
+            from columnar import columns_statistics, load_columns
+            columns_statistics(load_columns(file_name), job).result()
+        case 'separate':
+            from separator import separate
+            separate(file_name, os.path.join(directory, 'years'))
+        case 'convert':
+            from convert import convert
+            convert(file_name, rates_file, os.path.join(directory, 'convert.csv'))
+        case 'excel':
+            Report().generate_excel(data[:5], data[5:], os.path.join(directory, 'report.xlsx'))
+        case 'image':
+            Report().generate_image(data, os.path.join(directory, 'graph.png'))
+        case 'pdf':
+            from jinja2 import Template
+            template = Template('<h1>{{ job }}</h1><img src="{{ image_file }}">')
+            Report().generate_pdf(data, os.path.join(directory, 'report.pdf'), os.path.join(directory, 'graph.png'), html_converter, template)
+    seconds = time.perf_counter() - start
+
+    return {'seconds': round(seconds, 4), 'peak_rss': profiling.peak_rss()}
+
+def run_suite(rows, stages=STAGES, seed=0, job='Python'):
+    """
+    Создаёт синтетические данные и замеряет каждый этап в новом процессе
+
+    Args:
+        rows (int): Количество строк в синтетическом файле
+        stages (tuple): Замеряемые этапы
+        seed (int): Зерно генератора
+        job (str): Название профессии
+
+    Returns:
+        dict: Описание запуска и результаты этапов
+    """
+    from generator import generate, generate_rates
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'vacancies.csv')
+        rates_file = os.path.join(directory, 'currencies_df.csv')
+        generate(file_name, rows, seed)
+        generate_rates(rates_file, seed)
+        data = (job, *InputConect().read_statistics(file_name, job).result())
+
+        results = {}
+        for stage in stages:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                results[stage] = executor.submit(run_stage, stage, file_name, rates_file, directory, job, data).result()
+
+    return {
+        'rows': rows,
+        'seed': seed,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'stages': results,
+    }
+
+def compare(result, baseline, tolerance=0.2):
+    """
+    Ищет этапы, ставшие медленнее или тяжелее базового запуска больше чем на tolerance
+
+    Args:
+        result (dict): Результат run_suite
+        baseline (dict): Базовый результат run_suite
+        tolerance (float): Допустимое относительное ухудшение
+
+    Returns:
+        list: Кортежи (этап, метрика, базовое значение, новое значение)
+    """
+    regressions = []
+    for stage, metrics in result['stages'].items():
+        base = baseline['stages'].get(stage)
+        if base is None:
+            continue
+        for metric in ('seconds', 'peak_rss'):
+            if metrics[metric] is None or base[metric] is None:
+                continue
+            if metrics[metric] > base[metric] * (1 + tolerance):
+                regressions.append((stage, metric, base[metric], metrics[metric]))
+    return regressions
+
+if __name__ == '__main__':
+    from generator import SIZES
+
+    parser = argparse.ArgumentParser(description='Замеры производительности')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    memory = commands.add_parser('memory', help='память на одну вакансию')
+    memory.add_argument('file', help='csv файл с вакансиями')
+
+    matcher = commands.add_parser('matcher', help='поиск профессий автоматом и перебором')
+    matcher.add_argument('file', help='csv файл с вакансиями')
+
+    suite = commands.add_parser('suite', help='замер всех этапов на синтетических данных')
+    suite.add_argument('--size', default='10k', help=f'количество строк или одно из {", ".join(SIZES)}')
+    suite.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES)
+    suite.add_argument('--output', default='bench.json', help='json файл для результатов')
+    suite.add_argument('--baseline', help='json файл базового запуска для сравнения')
+    suite.add_argument('--tolerance', type=float, default=0.2, help='допустимое ухудшение')
+    args = parser.parse_args()
+
+    if args.command == 'memory':
+        for name, size in memory_per_row(args.file).items():
+            print(f'{name}: {size} байт на вакансию')
+    elif args.command == 'matcher':
+        for count, timings in matcher_timings(args.file).items():
+            print(f'{count} профессий: автомат {timings["automaton"]} с, перебор {timings["loop"]} с')
+    else:
+        result = run_suite(SIZES.get(args.size) or int(args.size), args.stages)
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(result, file, ensure_ascii=False, indent=2)
+        for stage, metrics in result['stages'].items():
+            memory = f'{metrics["peak_rss"] // 2 ** 20} МБ' if metrics['peak_rss'] is not None else 'память не замерена'
+            print(f'{stage}: {metrics["seconds"]} с, {memory}')
+
+        if args.baseline:
+            with open(args.baseline, encoding='utf-8') as file:
+                regressions = compare(result, json.load(file), args.tolerance)
+            for stage, metric, before, after in regressions:
+                print(f'Ухудшение {stage} {metric}: {before} -> {after}')
+            raise SystemExit(1 if regressions else 0)
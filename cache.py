@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+from columnar import VacancyColumns, load_columns
+
+ARRAYS = ('salary_from', 'salary_to', 'currency', 'city', 'year', 'month', 'name')
+CATEGORIES = ('currencies', 'cities', 'names')
+
+def fingerprint(file_name, sample=1 << 20):
+    """
+    Вычисляет отпечаток файла по пути, размеру, времени изменения и содержимому
+
+    Небольшие файлы хешируются целиком, у больших - начало, середина и конец,
+    чтобы проверка занимала миллисекунды
+
+    Args:
+        file_name (str): Путь к файлу
+        sample (int): Размер хешируемого фрагмента в байтах
+
+    Returns:
+        str: Отпечаток файла
+    """
+    stat = os.stat(file_name)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f'{ARRAYS}|{os.path.abspath(file_name)}|{stat.st_size}|{stat.st_mtime_ns}'.encode())
+
+    with open(file_name, 'rb') as file:
+        if stat.st_size <= 3 * sample:
+            digest.update(file.read())
+        else:
+            for offset in (0, (stat.st_size - sample) // 2, stat.st_size - sample):
+                file.seek(offset)
+                digest.update(file.read(sample))
+
+    return digest.hexdigest()
+
+class ColumnCache:
+    """
+    Класс для дискового кеша разобранных csv файлов
+
+    Каждый файл хранится в отдельной папке в виде .npy массивов, которые
+    загружаются через mmap. При изменении исходного файла запись пересоздаётся,
+    а при превышении max_bytes удаляются давно не использованные записи
+
+    Attributes:
+        directory (str): Папка кеша
+        max_bytes (int): Максимальный размер кеша в байтах
+    """
+    def __init__(self, directory='.cache', max_bytes=1 << 30):
+        """
+        Инициализирует объект ColumnCache
+
+        Args:
+            directory (str): Папка кеша
+            max_bytes (int): Максимальный размер кеша в байтах
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def load(self, file_name):
+        """
+        Возвращает столбцы файла из кеша, при отсутствии - разбирает файл и сохраняет
+
+        Args:
+            file_name (str): Путь к csv файлу
+
+        Returns:
+            VacancyColumns: Столбцы вакансий
+        """
+        key = fingerprint(file_name)
+        entry = os.path.join(self.directory, key)
+
+        if not os.path.exists(os.path.join(entry, 'meta.json')):
+            self.__store(entry, file_name, load_columns(file_name))
+            self.__evict(keep=key)
+
+        return self.__read(entry)
+
+    def __read(self, entry):
+        """
+        Загружает запись кеша и отмечает её как использованную
+
+        Args:
+            entry (str): Папка записи
+
+        Returns:
+            VacancyColumns: Столбцы вакансий
+        """
+        meta = os.path.join(entry, 'meta.json')
+        os.utime(meta)
+        with open(meta, encoding='utf-8') as file:
+            categories = json.load(file)
+
+        arrays = [np.load(os.path.join(entry, f'{x}.npy'), mmap_mode='r') for x in ARRAYS]
+        return VacancyColumns(*arrays, *(categories[x] for x in CATEGORIES))
+
+    def __store(self, entry, file_name, columns):
+        """
+        Сохраняет столбцы во временную папку и атомарно переименовывает её в запись
+
+        Старые записи того же файла удаляются
+
+        Args:
+            entry (str): Папка записи
+            file_name (str): Путь к исходному csv файлу
+            columns (VacancyColumns): Столбцы вакансий
+        """
+        path = os.path.abspath(file_name)
+        for old in self.__entries():
+            if self.__meta(old).get('path') == path:
+                shutil.rmtree(old, ignore_errors=True)
+
+        tmp = f'{entry}.{os.getpid()}.tmp'
+        os.makedirs(tmp, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(tmp, f'{name}.npy'), getattr(columns, name))
+
+        meta = {x: getattr(columns, x) for x in CATEGORIES}
+        meta['path'] = path
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as file:
+            json.dump(meta, file, ensure_ascii=False)
+
+        try:
+            os.replace(tmp, entry)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def __evict(self, keep):
+        """
+        Удаляет давно не использованные записи, пока кеш больше max_bytes
+
+        Args:
+            keep (str): Ключ записи, которую нельзя удалять
+        """
+        entries = []
+        for entry in self.__entries():
+            size = sum(os.path.getsize(os.path.join(entry, x)) for x in os.listdir(entry))
+            entries.append((os.path.getmtime(os.path.join(entry, 'meta.json')), size, entry))
+
+        total = sum(x[1] for x in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if os.path.basename(entry) != keep:
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+
+    def __entries(self):
+        """
+        Возвращает папки готовых записей кеша
+
+        Returns:
+            list: Пути к папкам записей
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        entries = (os.path.join(self.directory, x) for x in os.listdir(self.directory))
+        return [x for x in entries if not x.endswith('.tmp') and os.path.exists(os.path.join(x, 'meta.json'))]
+
+    def __meta(self, entry):
+        """
+        Читает описание записи кеша
+
+        Args:
+            entry (str): Папка записи
+
+        Returns:
+            dict: Категории и путь к исходному файлу
+        """
+        try:
+            with open(os.path.join(entry, 'meta.json'), encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
@@ -1,38 +1,81 @@
+import numpy as np
 import pandas as pd
-import csv
-
-cur = pd.read_csv('currencies_df.csv', index_col='date').dropna()
-
-convert = pd.DataFrame()
-
-def add_info(name, salary, area_name, published_at):
-    global convert
-    convert = convert.append(pd.DataFrame([[salary, area_name, published_at]], [name], ['salary', 'area_name', 'published_at']))
-
-with open('vacancies_dif_currencies.csv', encoding='utf-8-sig') as file:
-        reader = csv.reader(file)
-        head = []
-        is_first = True
-        for row in reader:
-                if is_first:  
-                    is_first = False
-                    head = row
-                else:
-                    date = row[5][:7]
-                    if date in cur.index.array and row[3] != '':
-                        multi = 1 if row[3] == 'RUR' else cur.loc[date][row[3]]
-                        if row[1] != '' and row[2] != '':
-                            salary = (float(row[1]) + float(row[2])) / 2 * multi
-                            add_info(row[0], salary, row[4], row[5])
-
-                        if row[1] == '' and row[2] != '':
-                            salary = float(row[2]) * multi
-                            add_info( row[0], salary, row[4], row[5])
-
-                        if row[1] != '' and row[2] == '':
-                            salary = float(row[1]) * multi
-                            add_info(row[0], salary, row[4], row[5])
-
-convert.index.rename('name', inplace=True)
-
-convert.to_csv('convert.csv')
+from streams import open_text
+
+def read_rates(file_name='currencies_df.csv'):
+    """
+    Читает таблицу курсов и разворачивает её в длинный вид для соединения с вакансиями
+
+    Args:
+        file_name (str): Путь к таблице курсов (результат currency.py)
+
+    Returns:
+        DataFrame: Столбцы date ('ГГГГ-ММ'), salary_currency, rate
+    """
+    cur = pd.read_csv(file_name, index_col='date')
+    cur.index = pd.PeriodIndex(cur.index, freq='M').strftime('%Y-%m')
+    cur.index.rename('date', inplace=True)
+
+    rates = cur.drop(columns='RUR', errors='ignore').reset_index().melt(
+        id_vars='date', var_name='salary_currency', value_name='rate').dropna()
+    rur = pd.DataFrame({'date': cur.index, 'salary_currency': 'RUR', 'rate': 1.0})
+    return pd.concat([rates, rur], ignore_index=True)
+
+def convert_chunk(chunk, rates):
+    """
+    Переводит зарплаты части вакансий в рубли по курсу месяца публикации
+
+    Если указана только одна граница вилки, берётся она, если обе - их среднее.
+    Вакансии без зарплаты, валюты или курса на месяц публикации пропускаются
+
+    Args:
+        chunk (DataFrame): Вакансии
+        rates (DataFrame): Курсы из read_rates
+
+    Returns:
+        DataFrame: Столбцы salary, area_name, published_at с индексом name
+    """
+    chunk = chunk.assign(date=chunk['published_at'].str[:7])
+    merged = chunk.merge(rates, on=['date', 'salary_currency'], how='inner')
+
+    salary_from = merged['salary_from'].to_numpy(dtype=np.float64)
+    salary_to = merged['salary_to'].to_numpy(dtype=np.float64)
+    has_from = ~np.isnan(salary_from)
+    has_to = ~np.isnan(salary_to)
+
+    salary = np.where(has_from & has_to, (salary_from + salary_to) / 2, np.where(has_from, salary_from, salary_to))
+    salary = salary * merged['rate'].to_numpy()
+    keep = has_from | has_to
+
+    result = pd.DataFrame({
+        'salary': salary[keep],
+        'area_name': merged['area_name'].to_numpy()[keep],
+        'published_at': merged['published_at'].to_numpy()[keep]},
+        index=pd.Index(merged['name'].to_numpy()[keep], name='name'))
+    return result
+
+def convert(file_name='vacancies_dif_currencies.csv', rates_file='currencies_df.csv', result_file='convert.csv', chunksize=100000):
+    """
+    Переводит зарплаты вакансий в рубли, читая и записывая файл частями
+
+    Args:
+        file_name (str): Путь к вакансиям с зарплатами в разных валютах, возможно сжатым gzip, zstd или bz2
+        rates_file (str): Путь к таблице курсов
+        result_file (str): Путь к результату
+        chunksize (int): Количество строк в одной части
+    """
+    rates = read_rates(rates_file)
+    dtype = {'name': str, 'salary_from': np.float64, 'salary_to': np.float64,
+             'salary_currency': str, 'area_name': str, 'published_at': str}
+
+    first = True
+    with open_text(file_name) as file:
+        for chunk in pd.read_csv(file, dtype=dtype, chunksize=chunksize):
+            convert_chunk(chunk, rates).to_csv(result_file, mode='w' if first else 'a', header=first)
+            first = False
+
+    if first:
+        convert_chunk(pd.DataFrame(columns=list(dtype)), rates).to_csv(result_file)
+
+if __name__ == '__main__':
+    convert()
@@ -0,0 +1,445 @@
+import argparse
+import json
+import re
+from collections import OrderedDict
+import numpy as np
+from columnar import load_columns
+from main import VacancyStatistics
+
+LEVELS = {'junior', 'middle', 'senior', 'lead', 'стажер', 'младший', 'старший', 'ведущий', 'главный'}
+
+def normalize(name):
+    """
+    Приводит название вакансии к названию профессии для свёртки по профессиям
+
+    Название переводится в нижний регистр, ё заменяется на е, убираются
+    слова уровня (junior, senior, младший, ведущий...) и лишние пробелы
+
+    Args:
+        name (str): Название вакансии
+
+    Returns:
+        str: Название профессии
+    """
+    words = name.lower().replace('ё', 'е').split()
+    return ' '.join(x for x in words if x.strip('.,+-()') not in LEVELS) or ' '.join(words)
+
+class VacancyCube:
+    """
+    Класс для куба сумм и количеств зарплат по году, региону и профессии
+
+    Профессия - нормализованное название вакансии (normalize). Непустые ячейки
+    (профессия, год, регион) хранятся разреженно - координаты и значения, упорядоченные
+    по профессии, а суммы по году и региону для всех вакансий - плотной матрицей.
+    Профессия запроса тоже нормализуется и ищется подстрокой среди профессий куба:
+    все профессии склеены в одну строку, поиск по ней идёт в C (re), а ячейки каждой
+    профессии лежат подряд, поэтому матрица профессии собирается без перебора названий.
+    Матрицы запоминаются, и повторные срезы по регионам и годам - это срезы numpy
+
+    В отличие от InputConect.read_statistics, где подстрока ищется в исходном названии
+    с учётом регистра, здесь регистр, ё и слова уровня (junior, старший...) не важны.
+    Ячеек не больше, чем уникальных сочетаний профессии, года и региона
+
+    Attributes:
+        years (list): Годы в порядке кодов
+        cities (list): Регионы в порядке первого появления в файле
+        professions (list): Нормализованные профессии в порядке кодов
+        profession (ndarray): Коды профессий ячеек, по возрастанию
+        year (ndarray): Коды годов ячеек
+        city (ndarray): Коды регионов ячеек
+        sums (ndarray): Суммы зарплат в рублях по ячейкам
+        counts (ndarray): Количества вакансий по ячейкам
+        year_city_sum (ndarray): Суммы зарплат год x регион по всем профессиям
+        year_city_count (ndarray): Количества вакансий год x регион по всем профессиям
+    """
+    def __init__(self, years, cities, professions, profession, year, city, sums, counts, max_jobs=256):
+        """
+        Инициализирует объект VacancyCube
+
+        Args:
+            years (list): Годы в порядке кодов
+            cities (list): Регионы в порядке кодов
+            professions (list): Нормализованные профессии в порядке кодов
+            profession (ndarray): Коды профессий ячеек, по возрастанию
+            year (ndarray): Коды годов ячеек
+            city (ndarray): Коды регионов ячеек
+            sums (ndarray): Суммы зарплат по ячейкам
+            counts (ndarray): Количества вакансий по ячейкам
+            max_jobs (int): Сколько матриц профессий запоминать
+        """
+        self.years = list(years)
+        self.cities = list(cities)
+        self.professions = list(professions)
+        self.profession = profession
+        self.year = year
+        self.city = city
+        self.sums = sums
+        self.counts = counts
+        self.max_jobs = max_jobs
+
+        self.__text = '\n'.join(self.professions)
+        self.__starts = np.cumsum([0] + [len(x) + 1 for x in self.professions[:-1]])
+        self.__indptr = np.searchsorted(profession, np.arange(len(self.professions) + 1))
+        self.year_city_sum, self.year_city_count = self.__matrix(np.arange(len(year)))
+        self.__jobs = OrderedDict()
+
+    @classmethod
+    def from_columns(cls, columns, rates=None):
+        """
+        Строит куб по столбцам вакансий
+
+        Args:
+            columns (VacancyColumns): Столбцы вакансий
+            rates (CurrencyRates): Таблица курсов валют по месяцам
+
+        Returns:
+            VacancyCube: Куб
+        """
+        codes = {}
+        name_profession = np.array([codes.setdefault(normalize(x), len(codes)) for x in columns.names], dtype=np.int64)
+        years = np.unique(columns.year)
+        size = len(years) * len(columns.cities)
+
+        key = name_profession[columns.name] * len(years) + np.searchsorted(years, columns.year)
+        key = key * len(columns.cities) + columns.city
+        cells, inverse = np.unique(key, return_inverse=True)
+        sums = np.bincount(inverse, weights=columns.salary_rub(rates), minlength=len(cells))
+        counts = np.bincount(inverse, minlength=len(cells))
+
+        profession, rest = np.divmod(cells, size) if size else (cells, cells)
+        year, city = np.divmod(rest, len(columns.cities)) if size else (cells, cells)
+        return cls(years.tolist(), columns.cities, list(codes), profession.astype(np.int32), year.astype(np.int16),
+                   city.astype(np.int32), sums, counts)
+
+    @classmethod
+    def from_file(cls, file_name, rates=None, cache=None):
+        """
+        Строит куб по csv файлу
+
+        Args:
+            file_name (str): Путь к csv файлу, возможно сжатому
+            rates (CurrencyRates): Таблица курсов валют по месяцам
+            cache (ColumnCache): Кеш разобранных файлов, None - разобрать файл
+
+        Returns:
+            VacancyCube: Куб
+        """
+        columns = cache.load(file_name) if cache is not None else load_columns(file_name)
+        return cls.from_columns(columns, rates)
+
+    def save(self, file_name):
+        """
+        Сохраняет куб в файл npz
+
+        Args:
+            file_name (str): Путь к файлу
+        """
+        labels = json.dumps({'years': self.years, 'cities': self.cities, 'professions': self.professions},
+                            ensure_ascii=False)
+        np.savez(file_name, labels=np.array(labels), profession=self.profession, year=self.year, city=self.city,
+                 sums=self.sums, counts=self.counts)
+
+    @classmethod
+    def load(cls, file_name):
+        """
+        Загружает куб из файла npz
+
+        Args:
+            file_name (str): Путь к файлу
+
+        Returns:
+            VacancyCube: Куб
+        """
+        with np.load(file_name) as data:
+            labels = json.loads(str(data['labels']))
+            return cls(labels['years'], labels['cities'], labels['professions'],
+                       data['profession'], data['year'], data['city'], data['sums'], data['counts'])
+
+    def __matrix(self, cells):
+        """
+        Складывает ячейки в матрицы год x регион
+
+        Args:
+            cells (ndarray): Номера ячеек
+
+        Returns:
+            tuple: Матрицы сумм и количеств
+        """
+        shape = (len(self.years), len(self.cities))
+        index = self.year[cells].astype(np.int64) * shape[1] + self.city[cells]
+        sums = np.bincount(index, weights=self.sums[cells], minlength=shape[0] * shape[1])
+        counts = np.bincount(index, weights=self.counts[cells], minlength=shape[0] * shape[1])
+        return sums.reshape(shape), counts.astype(np.int64).reshape(shape)
+
+    def job_professions(self, job):
+        """
+        Возвращает коды профессий, в которых есть нормализованное название job
+
+        Args:
+            job (str): Название профессии
+
+        Returns:
+            ndarray: Коды профессий по возрастанию
+        """
+        key = normalize(job)
+        if not key:
+            return np.arange(len(self.professions))
+        found = np.array([x.start() for x in re.finditer(re.escape(key), self.__text)], dtype=np.int64)
+        return np.unique(np.searchsorted(self.__starts, found, side='right') - 1)
+
+    def __job_cells(self, job):
+        """
+        Возвращает номера ячеек профессий, в которых есть job
+
+        Args:
+            job (str): Название профессии
+
+        Returns:
+            ndarray: Номера ячеек
+        """
+        codes = self.job_professions(job)
+        starts, ends = self.__indptr[codes], self.__indptr[codes + 1]
+        lengths = ends - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return offsets + np.arange(lengths.sum())
+
+    def job_matrix(self, job):
+        """
+        Возвращает матрицы год x регион для профессии, запоминая последние max_jobs
+
+        Args:
+            job (str): Название профессии, None - все вакансии
+
+        Returns:
+            tuple: Матрицы сумм и количеств
+        """
+        if job is None:
+            return self.year_city_sum, self.year_city_count
+        if job in self.__jobs:
+            self.__jobs.move_to_end(job)
+            return self.__jobs[job]
+
+        matrix = self.__jobs[job] = self.__matrix(self.__job_cells(job))
+        if len(self.__jobs) > self.max_jobs:
+            self.__jobs.popitem(last=False)
+        return matrix
+
+    def __select(self, matrix, city, start, end):
+        """
+        Вырезает из матрицы год x регион выбранные годы и регион
+
+        Args:
+            matrix (ndarray): Матрица год x регион
+            city (str): Регион, None - все регионы
+            start (int): Первый год, None - без ограничения
+            end (int): Последний год включительно, None - без ограничения
+
+        Returns:
+            ndarray: Матрица выбранных годов и регионов
+        """
+        first = 0 if start is None else np.searchsorted(self.years, start)
+        last = len(self.years) if end is None else np.searchsorted(self.years, end, side='right')
+        matrix = matrix[first:last]
+        if city is None:
+            return matrix
+        i = self.cities.index(city) if city in self.cities else len(self.cities)
+        return matrix[:, i:i + 1]
+
+    def __cities(self, city):
+        """
+        Возвращает выбранные регионы
+
+        Args:
+            city (str): Регион, None - все регионы
+
+        Returns:
+            list: Регионы в порядке кодов
+        """
+        if city is None:
+            return self.cities
+        return [city] if city in self.cities else []
+
+    def __years(self, start, end):
+        """
+        Возвращает годы, попадающие в диапазон
+
+        Args:
+            start (int): Первый год, None - без ограничения
+            end (int): Последний год включительно, None - без ограничения
+
+        Returns:
+            list: Годы по возрастанию
+        """
+        return [x for x in self.years if (start is None or x >= start) and (end is None or x <= end)]
+
+    def statistics(self, job, city=None, start=None, end=None):
+        """
+        Собирает статистику по срезу куба
+
+        Args:
+            job (str): Название профессии, None - без статистики по профессии
+            city (str): Регион, None - все регионы
+            start (int): Первый год, None - без ограничения
+            end (int): Последний год включительно, None - без ограничения
+
+        Returns:
+            VacancyStatistics: Статистика, совпадающая с InputConect.read_statistics по тем же строкам
+        """
+        stats = VacancyStatistics(job)
+        years = self.__years(start, end)
+        cities = self.__cities(city)
+
+        sums = self.__select(self.year_city_sum, city, start, end)
+        counts = self.__select(self.year_city_count, city, start, end)
+        stats.total = int(counts.sum())
+        _fill(stats.year_sum, stats.year_count, years, sums.sum(axis=1), counts.sum(axis=1))
+        _fill(stats.city_sum, stats.city_count, cities, sums.sum(axis=0), counts.sum(axis=0))
+
+        if job is not None:
+            job_sums, job_counts = self.job_matrix(job)
+            job_sums = self.__select(job_sums, city, start, end)
+            job_counts = self.__select(job_counts, city, start, end)
+            _fill(stats.job_sum, stats.job_count, years, job_sums.sum(axis=1), job_counts.sum(axis=1))
+
+        return stats
+
+    def data(self, job, city=None, start=None, end=None):
+        """
+        Возвращает срез куба в том же виде, что InputConect.input_data
+
+        Args:
+            job (str): Название профессии
+            city (str): Регион, None - все регионы
+            start (int): Первый год, None - без ограничения
+            end (int): Последний год включительно, None - без ограничения
+
+        Returns:
+            tuple: job, salary_rub, salary_count, job_rub, job_count, city_salary, city_frac
+        """
+        return (job, *self.statistics(job, city, start, end).result())
+
+    def roll_up(self, by, job=None, city=None, start=None, end=None, top=None):
+        """
+        Складывает срез куба по одному измерению
+
+        Например, roll_up('year', city='Москва') - один регион по годам,
+        roll_up('city', 'Python', start=2022, end=2022, top=10) - регионы с наибольшим
+        количеством вакансий профессии за год
+
+        Args:
+            by (str): 'year', 'city' или 'profession'
+            job (str): Название профессии, None - все вакансии
+            city (str): Регион, None - все регионы
+            start (int): Первый год, None - без ограничения
+            end (int): Последний год включительно, None - без ограничения
+            top (int): Оставить top ключей с наибольшим количеством вакансий, None - все
+
+        Returns:
+            dict: Словарь ключ - (сумма зарплат, количество вакансий) без пустых ключей
+        """
+        if by == 'profession':
+            keys, sums, counts = self.__by_profession(job, city, start, end)
+        else:
+            job_sums, job_counts = self.job_matrix(job)
+            sums = self.__select(job_sums, city, start, end)
+            counts = self.__select(job_counts, city, start, end)
+            axis = 1 if by == 'year' else 0
+            sums, counts = sums.sum(axis=axis), counts.sum(axis=axis)
+            keys = self.__years(start, end) if by == 'year' else self.__cities(city)
+
+        result = {key: (total, count) for key, total, count in zip(keys, sums.tolist(), counts.tolist()) if count}
+        if top is not None:
+            result = dict(sorted(result.items(), key=lambda x: x[1][1], reverse=True)[:top])
+        return result
+
+    def __by_profession(self, job, city, start, end):
+        """
+        Складывает выбранные ячейки по нормализованным профессиям
+
+        Args:
+            job (str): Название профессии, None - все вакансии
+            city (str): Регион, None - все регионы
+            start (int): Первый год, None - без ограничения
+            end (int): Последний год включительно, None - без ограничения
+
+        Returns:
+            tuple: Профессии, суммы и количества
+        """
+        cells = self.__job_cells(job) if job is not None else np.arange(len(self.year))
+        years = np.array(self.years)[self.year[cells]]
+        mask = np.ones(len(cells), dtype=bool)
+        if city is not None:
+            mask &= self.city[cells] == (self.cities.index(city) if city in self.cities else -1)
+        if start is not None:
+            mask &= years >= start
+        if end is not None:
+            mask &= years <= end
+        cells = cells[mask]
+
+        size = len(self.professions)
+        sums = np.bincount(self.profession[cells], weights=self.sums[cells], minlength=size)
+        counts = np.bincount(self.profession[cells], weights=self.counts[cells], minlength=size).astype(np.int64)
+        return self.professions, sums, counts
+
+    def render(self, report, job, city=None, start=None, end=None, excel=None, image=None):
+        """
+        Создаёт отчёты Report по срезу куба
+
+        Args:
+            report (Report): Отчёт
+            job (str): Название профессии
+            city (str): Регион, None - все регионы
+            start (int): Первый год, None - без ограничения
+            end (int): Последний год включительно, None - без ограничения
+            excel (str): Путь к файлу эксель, None - не создавать
+            image (str): Путь к файлу графиков, None - не создавать
+
+        Returns:
+            tuple: Данные среза, как у data
+        """
+        data = self.data(job, city, start, end)
+        if excel is not None:
+            report.generate_excel(data[:5], data[5:], excel)
+        if image is not None:
+            report.generate_image(data, image)
+        return data
+
+def _fill(sums, counts, keys, key_sums, key_counts):
+    """
+    Заполняет словари сумм и количеств непустыми ключами
+
+    Args:
+        sums (dict): Словарь ключ - сумма зарплат
+        counts (dict): Словарь ключ - количество вакансий
+        keys (list): Ключи
+        key_sums (ndarray): Суммы по ключам
+        key_counts (ndarray): Количества по ключам
+    """
+    for key, total, count in zip(keys, key_sums.tolist(), key_counts.tolist()):
+        if count:
+            sums[key] = total
+            counts[key] = count
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Куб статистики по году, региону и профессии')
+    parser.add_argument('file', help='csv файл с вакансиями или сохранённый куб .npz')
+    parser.add_argument('-j', '--job', help='название профессии')
+    parser.add_argument('--city', help='регион')
+    parser.add_argument('--from', dest='start', type=int, help='первый год')
+    parser.add_argument('--to', dest='end', type=int, help='последний год')
+    parser.add_argument('--by', choices=['year', 'city', 'profession'], help='вывести свёртку по измерению')
+    parser.add_argument('--top', type=int, help='сколько ключей свёртки вывести')
+    parser.add_argument('--save', help='сохранить куб в файл .npz')
+    parser.add_argument('--image', help='нарисовать графики среза')
+    args = parser.parse_args()
+
+    cube = VacancyCube.load(args.file) if args.file.endswith('.npz') else VacancyCube.from_file(args.file)
+    if args.save:
+        cube.save(args.save)
+    if args.by:
+        for key, (total, count) in cube.roll_up(args.by, args.job, args.city, args.start, args.end, args.top).items():
+            print(key, int(total / count), count)
+    else:
+        from main import Report
+        data = cube.render(Report(), args.job, args.city, args.start, args.end, image=args.image)
+        print(*data[1:], sep='\n')
@@ -1,25 +1,152 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree as ET
 import pandas as pd
 import requests
-from xml.etree import ElementTree as ET
+from requests.adapters import HTTPAdapter
+
+BASE_URL = 'http://www.cbr.ru/scripts/XML_daily.asp'
 
 currencies = ['USD', 'RUR', 'EUR', 'KZT', 'UAH', 'BYR']
-pr = pd.period_range(start='2005-10', end='2022-07', freq='M')
-prTupes = [(period.month,period.year) for period in pr]
-
-df = pd.DataFrame()
-
-for (m, y) in prTupes:
-    responce = requests.get(f'http://www.cbr.ru/scripts/XML_daily.asp?date_req=01/{m}/{y}')
-    tree = ET.fromstring(responce.content).findall('Valute')
-    info = {}
-    for cur in currencies:
-        for valute in tree:
-            if valute.find('CharCode').text == cur:
-                info[cur] = float(valute.find('Value').text.replace(',', '.')) / int(valute.find('Nominal').text.replace(',', '.'))
-                break
-    
-    df = df.append(pd.DataFrame(info, [f"{y}-{m}"]))
-
-df.index.rename('date', inplace=True)
-
-df.to_csv('currencies_df.csv')
+
+def parse_rates(content):
+    """
+    Разбирает xml документ ЦБ в словарь курсов за один проход
+
+    Args:
+        content (bytes): Xml документ с курсами валют
+
+    Returns:
+        dict: Словарь код валюты - курс к рублю за единицу
+    """
+    rates = {}
+    for valute in ET.fromstring(content).iter('Valute'):
+        value = float(valute.findtext('Value').replace(',', '.'))
+        rates[valute.findtext('CharCode')] = value / int(valute.findtext('Nominal').replace(',', '.'))
+    return rates
+
+class RateFetcher:
+    """
+    Класс для параллельной загрузки курсов валют ЦБ по месяцам
+
+    Ответы сервера сохраняются в папку cache_dir и при повторном запуске не скачиваются
+
+    Attributes:
+        base_url (str): Адрес XML_daily.asp
+        workers (int): Количество одновременных запросов
+        cache_dir (str): Папка для сохранённых ответов, None - не сохранять
+        timeout (float): Таймаут запроса в секундах
+    """
+    def __init__(self, base_url=BASE_URL, workers=8, cache_dir='cbr_cache', timeout=30):
+        """
+        Инициализирует объект RateFetcher
+
+        Args:
+            base_url (str): Адрес XML_daily.asp
+            workers (int): Количество одновременных запросов
+            cache_dir (str): Папка для сохранённых ответов, None - не сохранять
+            timeout (float): Таймаут запроса в секундах
+        """
+        self.base_url = base_url
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def fetch(self, month, year):
+        """
+        Возвращает xml документ с курсами на первое число месяца
+
+        Ответ сохраняется в кеш только после того, как parse_rates его разобрал,
+        через временный файл, поэтому прерванный запуск не оставляет в кеше обрезанный
+        документ. Неразбираемый файл в кеше скачивается заново
+
+        Args:
+            month (int): Месяц
+            year (int): Год
+
+        Returns:
+            bytes: Xml документ
+        """
+        path = os.path.join(self.cache_dir, f'{year}-{month:02}.xml') if self.cache_dir else None
+        if path and os.path.exists(path):
+            with open(path, 'rb') as file:
+                content = file.read()
+            try:
+                parse_rates(content)
+                return content
+            except (ET.ParseError, AttributeError, ValueError):
+                pass
+
+        responce = self.session.get(f'{self.base_url}?date_req=01/{month:02}/{year}', timeout=self.timeout)
+        responce.raise_for_status()
+
+        if path:
+            parse_rates(responce.content)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            try:
+                with open(tmp, 'wb') as file:
+                    file.write(responce.content)
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        return responce.content
+
+    def fetch_rates(self, periods):
+        """
+        Загружает курсы за несколько месяцев одновременно
+
+        Args:
+            periods (list): Список пар (месяц, год)
+
+        Returns:
+            dict: Словарь 'ГГГГ-ММ' - словарь курсов
+        """
+        def load(period):
+            month, year = period
+            return f'{year}-{month:02}', parse_rates(self.fetch(month, year))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return dict(executor.map(load, periods))
+
+def load_currencies(start='2005-10', end='2022-07', file_name='currencies_df.csv', fetcher=None):
+    """
+    Дополняет таблицу курсов недостающими месяцами и сохраняет её в csv
+
+    Args:
+        start (str): Первый месяц
+        end (str): Последний месяц
+        file_name (str): Путь к таблице курсов
+        fetcher (RateFetcher): Загрузчик курсов
+
+    Returns:
+        DataFrame: Таблица курсов с индексом 'date' в формате 'ГГГГ-ММ'
+    """
+    fetcher = fetcher or RateFetcher()
+    pr = pd.period_range(start=start, end=end, freq='M')
+
+    df = pd.DataFrame()
+    if os.path.exists(file_name):
+        df = pd.read_csv(file_name, index_col='date')
+        df.index = pd.PeriodIndex(df.index, freq='M').strftime('%Y-%m')
+
+    missing = [(period.month, period.year) for period in pr if period.strftime('%Y-%m') not in df.index]
+    rates = fetcher.fetch_rates(missing)
+
+    info = pd.DataFrame.from_dict({key: {cur: value[cur] for cur in currencies if cur in value} for key, value in rates.items()}, orient='index')
+    df = pd.concat([df, info]).sort_index()
+    df = df[[cur for cur in currencies if cur in df.columns]]
+
+    df.index.rename('date', inplace=True)
+    df.to_csv(file_name)
+    return df
+
+if __name__ == '__main__':
+    load_currencies()
@@ -0,0 +1,240 @@
+import os
+import sqlite3
+from main import DataVacancy, InputConect, VacancyStatistics
+from streams import CSV_SUFFIXES
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE,
+    size INTEGER,
+    mtime_ns INTEGER,
+    rates TEXT,
+    rows INTEGER
+);
+CREATE TABLE IF NOT EXISTS vacancies (
+    id INTEGER PRIMARY KEY,
+    file INTEGER,
+    name TEXT,
+    salary REAL,
+    area_name TEXT,
+    year INTEGER,
+    published_at TEXT
+);
+'''
+
+INDEXES = (
+    'CREATE INDEX IF NOT EXISTS vacancies_year ON vacancies (year, salary)',
+    'CREATE INDEX IF NOT EXISTS vacancies_area ON vacancies (area_name, year, salary)',
+    'CREATE INDEX IF NOT EXISTS vacancies_file ON vacancies (file)',
+)
+
+class VacancyDatabase:
+    """
+    Класс для хранения вакансий в SQLite и подсчёта статистики запросами GROUP BY
+
+    Зарплаты переводятся в рубли при загрузке, поэтому для каждого файла хранится
+    хеш таблицы курсов, и при другой таблице файл загружается заново. По годам и регионам построены индексы,
+    а по названиям - полнотекстовая таблица FTS5 с триграммами, поэтому запросы по одному
+    городу, диапазону лет или части названия не читают всю таблицу. Если SQLite собран
+    без FTS5, название ищется через instr
+
+    Attributes:
+        path (str): Путь к файлу базы
+        rates (CurrencyRates): Таблица курсов валют, с которой переводятся зарплаты
+        fts (bool): Есть ли полнотекстовая таблица названий
+    """
+    def __init__(self, path='vacancies.db', rates=None):
+        """
+        Открывает или создаёт базу
+
+        Args:
+            path (str): Путь к файлу базы
+            rates (CurrencyRates): Таблица курсов валют, None - курсы currency_to_rub
+        """
+        self.path = path
+        self.rates = rates
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        if 'rates' not in [x[1] for x in self.connection.execute('PRAGMA table_info(files)')]:
+            self.connection.execute('ALTER TABLE files ADD COLUMN rates TEXT')
+
+        try:
+            self.connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5"
+                "(name, content='vacancies', content_rowid='id', tokenize='trigram')")
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+
+    def load(self, file_name, batch_size=50000):
+        """
+        Загружает csv файл или папку файлов separator в базу
+
+        Уже загруженный с той же таблицей курсов и не изменившийся файл пропускается,
+        изменившийся или загруженный с другими курсами - загружается заново. Каждый файл загружается одной транзакцией
+
+        Args:
+            file_name (str): Путь к csv файлу (возможно сжатому) или папке с ними
+            batch_size (int): Количество строк в одном executemany
+
+        Returns:
+            int: Количество загруженных строк
+        """
+        if os.path.isdir(file_name):
+            return sum(self.load(x, batch_size) for x in self.__files(file_name))
+
+        path = os.path.abspath(file_name)
+        stat = os.stat(path)
+        rates = self.rates.fingerprint() if self.rates is not None else ''
+        row = self.connection.execute('SELECT id, size, mtime_ns, rates FROM files WHERE path = ?', (path,)).fetchone()
+        if row is not None and row[1:] == (stat.st_size, stat.st_mtime_ns, rates):
+            return 0
+
+        with self.connection:
+            if row is not None:
+                self.__delete(row[0])
+            file_id = self.connection.execute(
+                'INSERT INTO files (path, size, mtime_ns, rates, rows) VALUES (?, ?, ?, ?, 0)',
+                (path, stat.st_size, stat.st_mtime_ns, rates)).lastrowid
+            first_id = self.connection.execute('SELECT COALESCE(MAX(id), 0) FROM vacancies').fetchone()[0]
+
+            count = 0
+            batch = []
+            for values in InputConect().read_rows(file_name):
+                vacancy = DataVacancy(*values)
+                batch.append((file_id, vacancy.name, vacancy.convert_to_rub(self.rates),
+                              vacancy.area_name, int(vacancy.published_at[:4]), vacancy.published_at))
+                if len(batch) == batch_size:
+                    count += self.__insert(batch)
+            count += self.__insert(batch)
+
+            if self.fts:
+                self.connection.execute('INSERT INTO names (rowid, name) SELECT id, name FROM vacancies WHERE id > ?', (first_id,))
+            self.connection.execute('UPDATE files SET rows = ? WHERE id = ?', (count, file_id))
+            for statement in INDEXES:
+                self.connection.execute(statement)
+
+        self.connection.execute('PRAGMA optimize')
+        return count
+
+    def __files(self, file_name):
+        """
+        Возвращает csv файлы, которые load загружает по пути
+
+        Args:
+            file_name (str): Путь к csv файлу или папке с ними
+
+        Returns:
+            list: Пути к файлам
+        """
+        if os.path.isdir(file_name):
+            return sorted(os.path.join(file_name, x) for x in os.listdir(file_name) if x.endswith(CSV_SUFFIXES))
+        return [file_name]
+
+    def __insert(self, batch):
+        """
+        Вставляет накопленные строки и очищает список
+
+        Args:
+            batch (list): Строки таблицы vacancies без id
+
+        Returns:
+            int: Количество вставленных строк
+        """
+        self.connection.executemany(
+            'INSERT INTO vacancies (file, name, salary, area_name, year, published_at) VALUES (?, ?, ?, ?, ?, ?)', batch)
+        count = len(batch)
+        batch.clear()
+        return count
+
+    def __delete(self, file_id):
+        """
+        Удаляет строки ранее загруженного файла
+
+        Args:
+            file_id (int): Номер файла в таблице files
+        """
+        if self.fts:
+            self.connection.execute(
+                "INSERT INTO names (names, rowid, name) SELECT 'delete', id, name FROM vacancies WHERE file = ?", (file_id,))
+        self.connection.execute('DELETE FROM vacancies WHERE file = ?', (file_id,))
+        self.connection.execute('DELETE FROM files WHERE id = ?', (file_id,))
+
+    def __where(self, city, start, end, file_name=None):
+        """
+        Возвращает условие отбора вакансий и его параметры
+
+        Args:
+            city (str): Регион, None - все регионы
+            start (int): Первый год, None - без ограничения
+            end (int): Последний год включительно, None - без ограничения
+            file_name (str): Загруженный csv файл или папка, None - все файлы базы
+
+        Returns:
+            tuple: Текст условия и список параметров
+        """
+        conditions, params = ['1'], []
+        if file_name is not None:
+            paths = [os.path.abspath(x) for x in self.__files(file_name)]
+            marks = ', '.join('?' * len(paths))
+            conditions.append(f'file IN (SELECT id FROM files WHERE path IN ({marks}))')
+            params.extend(paths)
+        if city is not None:
+            conditions.append('area_name = ?')
+            params.append(city)
+        if start is not None:
+            conditions.append('year >= ?')
+            params.append(start)
+        if end is not None:
+            conditions.append('year <= ?')
+            params.append(end)
+        return ' AND '.join(conditions), params
+
+    def statistics(self, job, city=None, start=None, end=None, file_name=None):
+        """
+        Считает статистику запросами GROUP BY по выбранным вакансиям
+
+        Args:
+            job (str): Название профессии, None - без статистики по профессии
+            city (str): Регион, None - все регионы
+            start (int): Первый год, None - без ограничения
+            end (int): Последний год включительно, None - без ограничения
+            file_name (str): Загруженный csv файл или папка, None - все файлы базы
+
+        Returns:
+            VacancyStatistics: Статистика, совпадающая с InputConect.read_statistics по тем же строкам
+        """
+        where, params = self.__where(city, start, end, file_name)
+        stats = VacancyStatistics(job, self.rates)
+
+        query = f'SELECT year, SUM(salary), COUNT(*) FROM vacancies WHERE {where} GROUP BY year'
+        for year, total, count in self.connection.execute(query, params):
+            stats.year_sum[year] = total
+            stats.year_count[year] = count
+            stats.total += count
+
+        query = f'SELECT area_name, SUM(salary), COUNT(*) FROM vacancies WHERE {where} GROUP BY area_name ORDER BY MIN(id)'
+        for area_name, total, count in self.connection.execute(query, params):
+            stats.city_sum[area_name] = total
+            stats.city_count[area_name] = count
+
+        if job is not None:
+            query = f'SELECT year, SUM(salary), COUNT(*) FROM vacancies WHERE {where} AND instr(name, ?) > 0'
+            job_params = params + [job]
+            if self.fts and len(job) >= 3:
+                query += ' AND id IN (SELECT rowid FROM names WHERE names MATCH ?)'
+                job_params.append('"' + job.replace('"', '""') + '"')
+            for year, total, count in self.connection.execute(query + ' GROUP BY year', job_params):
+                stats.job_sum[year] = total
+                stats.job_count[year] = count
+
+        return stats
+
+    def close(self):
+        """
+        Закрывает соединение с базой
+        """
+        self.connection.close()
@@ -0,0 +1,195 @@
+import math
+from hashlib import blake2b
+
+class BloomFilter:
+    """
+    Класс для фильтра Блума - множества с ложноположительными ответами
+
+    Для capacity элементов доля ложных ответов не больше error. Память - около
+    1.44 * log2(1 / error) бит на элемент (14.4 бита при error = 0.001)
+
+    Attributes:
+        size (int): Количество бит
+        hashes (int): Количество хеш-функций
+        bits (bytearray): Биты фильтра
+    """
+    def __init__(self, capacity, error=0.001):
+        """
+        Инициализирует пустой объект BloomFilter
+
+        Args:
+            capacity (int): Ожидаемое количество элементов
+            error (float): Допустимая доля ложноположительных ответов
+        """
+        self.size = self.size_for(capacity, error)
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    @staticmethod
+    def size_for(capacity, error=0.001):
+        """
+        Возвращает количество бит фильтра
+
+        Args:
+            capacity (int): Ожидаемое количество элементов
+            error (float): Допустимая доля ложноположительных ответов
+
+        Returns:
+            int: Количество бит
+        """
+        return max(int(-capacity * math.log(error) / math.log(2) ** 2), 8)
+
+    def __positions(self, key):
+        """
+        Возвращает номера бит ключа двойным хешированием
+
+        Args:
+            key (int): 128-битный хеш элемента
+
+        Yields:
+            int: Номер бита
+        """
+        h1, h2 = key >> 64, key & 0xffffffffffffffff | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def __contains__(self, key):
+        return all(self.bits[bit >> 3] & 1 << (bit & 7) for bit in self.__positions(key))
+
+    def add(self, key):
+        """
+        Добавляет ключ и сообщает, был ли он уже в фильтре
+
+        Args:
+            key (int): 128-битный хеш элемента
+
+        Returns:
+            bool: True, если ключа (вероятно) не было
+        """
+        bits, size = self.bits, self.size
+        h1, h2 = key >> 64, key & 0xffffffffffffffff | 1
+        new = False
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) % size
+            byte, mask = bit >> 3, 1 << (bit & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                new = True
+        return new
+
+KEY_BYTES = 96
+
+class Deduplicator:
+    """
+    Класс для потокового удаления повторяющихся вакансий
+
+    Ключ вакансии - 128-битный хеш blake2b всех её полей. Сначала ключи хранятся
+    в множестве и проверка точная, затем переносятся в фильтр Блума на capacity
+    элементов: память перестаёт расти, но доля error уникальных строк может быть
+    ошибочно принята за дубликаты
+
+    Память ограничена max_bytes. Фильтр занимает около 1.8 байта на элемент capacity
+    при error = 0.001 (90 Мб на 50 млн), ключ в множестве - около KEY_BYTES байт
+    (int и место в таблице множества). Точная проверка идёт, пока множество и будущий
+    фильтр вместе помещаются в max_bytes, поэтому и во время переноса память не
+    больше max_bytes, а после него - только фильтр. По умолчанию (256 Мб, 50 млн,
+    0.001) точно проверяются первые 1.8 млн строк
+
+    Один объект можно использовать для нескольких файлов, чтобы удалить
+    повторы между пересекающимися выгрузками
+
+    Attributes:
+        max_bytes (int): Ограничение памяти в байтах
+        capacity (int): Ожидаемое количество ключей для фильтра Блума
+        error (float): Доля ложных срабатываний фильтра Блума
+        max_exact (int): Сколько ключей хранить точно
+        kept (int): Количество пропущенных строк
+        dropped (int): Количество удалённых дубликатов
+        bloom (BloomFilter): Фильтр после перехода, None - пока проверка точная
+    """
+    def __init__(self, max_bytes=256 << 20, capacity=50_000_000, error=0.001):
+        """
+        Инициализирует пустой объект Deduplicator
+
+        Args:
+            max_bytes (int): Ограничение памяти в байтах
+            capacity (int): Ожидаемое количество ключей для фильтра Блума
+            error (float): Доля ложных срабатываний фильтра Блума
+
+        Raises:
+            ValueError: Фильтр на capacity ключей не помещается в max_bytes
+        """
+        bloom_bytes = (BloomFilter.size_for(capacity, error) + 7) // 8
+        if bloom_bytes > max_bytes:
+            raise ValueError(f'Фильтр Блума на {capacity} ключей занимает {bloom_bytes} байт, больше max_bytes')
+
+        self.max_bytes = max_bytes
+        self.capacity = capacity
+        self.error = error
+        self.max_exact = min((max_bytes - bloom_bytes) // KEY_BYTES, capacity)
+        self.kept = 0
+        self.dropped = 0
+        self.bloom = None
+        self.__seen = set()
+
+    @staticmethod
+    def key(row):
+        """
+        Возвращает ключ строки
+
+        Args:
+            row (tuple): Поля вакансии
+
+        Returns:
+            int: 128-битный хеш полей
+        """
+        return int.from_bytes(blake2b('\x1f'.join(row).encode(), digest_size=16).digest(), 'little')
+
+    def add(self, row):
+        """
+        Учитывает строку и сообщает, встречалась ли она раньше
+
+        Args:
+            row (tuple): Поля вакансии
+
+        Returns:
+            bool: True, если строка новая
+        """
+        key = self.key(row)
+        if self.bloom is None:
+            new = key not in self.__seen
+            if new:
+                self.__seen.add(key)
+                if len(self.__seen) > self.max_exact:
+                    self.__to_bloom()
+        else:
+            new = self.bloom.add(key)
+
+        if new:
+            self.kept += 1
+        else:
+            self.dropped += 1
+        return new
+
+    def filter(self, rows):
+        """
+        Возвращает только новые строки
+
+        Args:
+            rows (iterable): Строки
+
+        Yields:
+            tuple: Строки, не встречавшиеся раньше
+        """
+        for row in rows:
+            if self.add(row):
+                yield row
+
+    def __to_bloom(self):
+        """
+        Переносит точные ключи в фильтр Блума и освобождает множество
+        """
+        self.bloom = BloomFilter(self.capacity, self.error)
+        for key in self.__seen:
+            self.bloom.add(key)
+        self.__seen = set()
@@ -0,0 +1,98 @@
+import argparse
+import csv
+import random
+from main import COLUMNS
+
+SIZES = {'10k': 10_000, '1M': 1_000_000, '10M': 10_000_000}
+
+CITIES = [
+    'Москва', 'Санкт-Петербург', 'Новосибирск', 'Екатеринбург', 'Казань', 'Нижний Новгород',
+    'Краснодар', 'Самара', 'Ростов-на-Дону', 'Челябинск', 'Уфа', 'Омск', 'Воронеж', 'Пермь',
+    'Красноярск', 'Волгоград', 'Тюмень', 'Саратов', 'Минск', 'Алматы', 'Нур-Султан', 'Киев',
+    'Ижевск', 'Барнаул', 'Ульяновск', 'Иркутск', 'Хабаровск', 'Ярославль', 'Владивосток', 'Томск',
+] + [f'Регион {i}' for i in range(1, 471)]
+
+CURRENCIES = {'RUR': 0.9, 'USD': 0.035, 'EUR': 0.02, 'KZT': 0.02, 'UAH': 0.012, 'BYR': 0.008, 'AZN': 0.003, 'UZS': 0.002}
+
+PROFESSIONS = [
+    'Программист', 'Python разработчик', 'Java разработчик', 'Frontend-разработчик', 'Аналитик',
+    'Системный администратор', 'Тестировщик', 'Менеджер по продажам', 'Бухгалтер', 'Дизайнер',
+    'Инженер', 'Водитель', 'Продавец-консультант', 'Оператор call-центра', 'Юрист',
+]
+
+LEVELS = ['', 'Младший ', 'Старший ', 'Ведущий ', 'Главный ']
+
+def generate(file_name, rows, seed=0, empty=0.05, block_size=10000):
+    """
+    Создаёт детерминированный csv файл с синтетическими вакансиями
+
+    Города распределены по закону Ципфа (Москва встречается чаще всего), большая часть
+    зарплат в рублях, количество вакансий растёт от 2007 к 2022 году
+
+    Args:
+        file_name (str): Путь к создаваемому файлу
+        rows (int): Количество строк
+        seed (int): Зерно генератора случайных чисел
+        empty (float): Доля строк с пустой границей вилки оклада
+        block_size (int): Количество строк, генерируемых за один раз
+    """
+    rnd = random.Random(seed)
+    city_weights = [1 / (i + 1) ** 1.1 for i in range(len(CITIES))]
+    years = list(range(2007, 2023))
+    year_weights = [1 + i for i in range(len(years))]
+    names = [level + name for name in PROFESSIONS for level in LEVELS]
+
+    with open(file_name, 'w', encoding='utf-8-sig', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(COLUMNS)
+
+        for start in range(0, rows, block_size):
+            n = min(block_size, rows - start)
+            cities = rnd.choices(CITIES, city_weights, k=n)
+            currencies = rnd.choices(list(CURRENCIES), list(CURRENCIES.values()), k=n)
+            published = rnd.choices(years, year_weights, k=n)
+            block = []
+            for i in range(n):
+                salary_from = rnd.randrange(10, 300) * 1000
+                salary_to = salary_from + rnd.randrange(0, 100) * 1000
+                if currencies[i] != 'RUR':
+                    salary_from, salary_to = salary_from // 60, salary_to // 60
+                row = [
+                    rnd.choice(names),
+                    f'{salary_from}.0',
+                    f'{salary_to}.0',
+                    currencies[i],
+                    cities[i],
+                    f'{published[i]}-{rnd.randint(1, 12):02}-{rnd.randint(1, 28):02}T{rnd.randint(0, 23):02}:00:00+0300',
+                ]
+                if rnd.random() < empty:
+                    row[rnd.choice((1, 2))] = ''
+                block.append(row)
+            writer.writerows(block)
+
+def generate_rates(file_name, seed=0):
+    """
+    Создаёт синтетическую таблицу курсов валют в формате currency.py
+
+    Args:
+        file_name (str): Путь к создаваемому файлу
+        seed (int): Зерно генератора случайных чисел
+    """
+    rnd = random.Random(seed)
+    base = {'USD': 30.0, 'EUR': 40.0, 'KZT': 0.25, 'UAH': 5.0, 'BYR': 0.01}
+    with open(file_name, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['date', *base])
+        for year in range(2005, 2023):
+            for month in range(1, 13):
+                for cur in base:
+                    base[cur] *= 1 + rnd.uniform(-0.03, 0.035)
+                writer.writerow([f'{year}-{month:02}', *(round(x, 4) for x in base.values())])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Генератор синтетических вакансий')
+    parser.add_argument('size', help=f'количество строк или одно из {", ".join(SIZES)}')
+    parser.add_argument('file', help='путь к создаваемому файлу')
+    parser.add_argument('--seed', type=int, default=0, help='зерно генератора')
+    args = parser.parse_args()
+    generate(args.file, SIZES.get(args.size) or int(args.size), args.seed)
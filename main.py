@@ -1,12 +1,18 @@
 import csv
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font
-from openpyxl.styles.borders import Border, Side
-import matplotlib.pyplot as plt
-import numpy as np
-import pdfkit
-from jinja2 import Environment, FileSystemLoader
+import hashlib
+import os
+import re
+import profiling
+from array import array
+from itertools import chain, islice
+from time import perf_counter
+from matcher import ProfessionMatcher
+from sketch import SalaryDistributions
+from streams import open_text
+from render_cache import file_digest
+
+COLUMNS = ('name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at')
+PDF_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdf_template.html')
 
 class Salary:
     """
@@ -18,6 +24,8 @@ class Salary:
         salary_gross (bool): С учётом налога или нет
         salary_currency (str): Валюта оклада
     """
+    __slots__ = ('salary_from', 'salary_to', 'salary_gross', 'salary_currency')
+
     def __init__(self, salary_from, salary_to, salary_gross, salary_currency):
         """
         Инициализирует объект Salary
@@ -33,14 +41,37 @@ class Salary:
         self.salary_gross = salary_gross
         self.salary_currency = salary_currency
 
-    def convert_to_rub(self):
+    def convert_to_rub(self, rates=None, published_at=None):
         """
-        Конвертирует среднюю зарплату в рубли с помощью словаря currency_to_rub
+        Конвертирует среднюю зарплату в рубли
+
+        Если передана таблица курсов и дата публикации, используется курс месяца публикации,
+        иначе (или если курса нет в таблице) - словарь currency_to_rub
+
+        Args:
+            rates (CurrencyRates): Таблица курсов валют по месяцам
+            published_at (str): Дата публикации вакансии
 
         Returns:
             float: Средняя зарплата в рублях
         """
-        return (self.salary_from + self.salary_to) / 2 * self.__currency_to_rub[self.salary_currency]  
+        rate = rates.rate(self.salary_currency, published_at) if rates is not None and published_at else None
+        if rate is None:
+            rate = self.__currency_to_rub[self.salary_currency]
+        return (self.salary_from + self.salary_to) / 2 * rate
+
+    @classmethod
+    def default_rate(cls, currency):
+        """
+        Возвращает курс валюты из словаря currency_to_rub
+
+        Args:
+            currency (str): Валюта
+
+        Returns:
+            float: Курс валюты к рублю
+        """
+        return cls.__currency_to_rub[currency]
 
     __currency_to_rub = {  
         "AZN": 35.68,  
@@ -55,16 +86,132 @@ class Salary:
         "UZS": 0.0055,  
     }       
 
+class CurrencyRates:
+    """
+    Класс для таблицы курсов валют по месяцам (результат currency.py)
+
+    Курсы хранятся в массиве месяц x валюта, поэтому поиск курса выполняется за O(1)
+
+    Attributes:
+        first_month (int): Номер первого месяца таблицы (год * 12 + месяц - 1)
+        currencies (dict): Словарь валюта - номер столбца
+        table (ndarray): Курсы валют, nan - курса нет
+    """
+    def __init__(self, file_name='currencies_df.csv'):
+        """
+        Загружает таблицу курсов из csv файла
+
+        Args:
+            file_name (str): Путь к таблице курсов
+        """
+        import numpy as np
+
+        with open(file_name, encoding='utf-8-sig') as file:
+            reader = csv.reader(file)
+            head = next(reader)
+            rows = [row for row in reader if row]
+
+        months = [self.month_number(row[0]) for row in rows]
+        self.first_month = min(months, default=0)
+        self.currencies = {cur: i for i, cur in enumerate(head[1:])}
+        self.table = np.full((max(months, default=-1) - self.first_month + 1, len(self.currencies)), np.nan)
+
+        for month, row in zip(months, rows):
+            for i, value in enumerate(row[1:]):
+                if value != '':
+                    self.table[month - self.first_month, i] = float(value)
+
+    def fingerprint(self):
+        """
+        Возвращает хеш таблицы курсов, чтобы отличать сохранённые с ней результаты
+
+        Returns:
+            str: Хеш первого месяца, валют и курсов
+        """
+        digest = hashlib.blake2b(f'{self.first_month}|{sorted(self.currencies.items())}'.encode(), digest_size=16)
+        digest.update(self.table.tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def month_number(date):
+        """
+        Возвращает номер месяца по дате вида 'ГГГГ-ММ...'
+
+        Args:
+            date (str): Дата
+
+        Returns:
+            int: год * 12 + месяц - 1
+        """
+        year, month = date.split('-')[:2]
+        return int(year) * 12 + int(month[:2]) - 1
+
+    def rate(self, currency, published_at):
+        """
+        Возвращает курс валюты в месяце публикации
+
+        Args:
+            currency (str): Валюта
+            published_at (str): Дата публикации
+
+        Returns:
+            float: Курс к рублю или None, если в таблице его нет
+        """
+        if currency == 'RUR':
+            return 1
+        column = self.currencies.get(currency)
+        row = self.month_number(published_at) - self.first_month
+        if column is None or not 0 <= row < len(self.table):
+            return None
+        value = self.table[row, column]
+        return None if value != value else float(value)
+
+    def convert(self, salary_from, salary_to, currency, currencies, month):
+        """
+        Конвертирует столбцы зарплат в рубли
+
+        Args:
+            salary_from (ndarray): Нижняя граница вилки оклада
+            salary_to (ndarray): Верхняя граница вилки оклада
+            currency (ndarray): Коды валют
+            currencies (list): Валюты в порядке кодов
+            month (ndarray): Номера месяцев публикации (год * 12 + месяц - 1)
+
+        Returns:
+            ndarray: Средние зарплаты в рублях
+        """
+        import numpy as np
+
+        columns = np.array([self.currencies.get(x, -1) if x != 'RUR' else -1 for x in currencies], dtype=np.int64)[currency]
+        rows = np.asarray(month, dtype=np.int64) - self.first_month
+
+        known = (columns >= 0) & (rows >= 0) & (rows < len(self.table))
+        rates = np.full(len(rows), np.nan)
+        rates[known] = self.table[rows[known], columns[known]]
+
+        missing = np.isnan(rates)
+        defaults = np.array([Salary.default_rate(x) for x in currencies], dtype=np.float64)
+        rates[missing] = defaults[np.asarray(currency)[missing]]
+
+        return (np.trunc(salary_from) + np.trunc(salary_to)) / 2 * rates
+
 class DataVacancy:
     """
     Класс для представления вакансии
 
+    Поля зарплаты хранятся в самой вакансии, а __slots__ убирает словарь атрибутов,
+    поэтому одна вакансия занимает в несколько раз меньше памяти
+
     Attributes:
         name (str): Название вакансии
-        salary (Salary): Зарплата вакансии
+        salary_from (int): Нижняя граница вилки оклада
+        salary_to (int): Верхняя граница вилки оклада
+        salary_currency (str): Валюта оклада
         area_name (str): Регион вакансии
         published_at (str): Дата публикации вакансии
     """
+    __slots__ = COLUMNS
+
     def __init__(self, name, salary_from, salary_to, salary_currency, area_name, published_at):
         """
         Инициализирует объект DataVacancy
@@ -78,21 +225,272 @@ class DataVacancy:
             published_at (str): Дата публикации вакансии
         """
         self.name = name
-        self.salary = Salary(salary_from, salary_to, False, salary_currency)
+        self.salary_from = int(float(salary_from))
+        self.salary_to = int(float(salary_to))
+        self.salary_currency = salary_currency
         self.area_name = area_name
         self.published_at = published_at
 
-class InputConect:
+    @property
+    def salary(self):
+        """
+        Salary: Зарплата вакансии
+        """
+        return Salary(self.salary_from, self.salary_to, False, self.salary_currency)
+
+    def convert_to_rub(self, rates=None):
+        """
+        Конвертирует среднюю зарплату вакансии в рубли
+
+        Args:
+            rates (CurrencyRates): Таблица курсов валют, None - курсы Salary.currency_to_rub
+
+        Returns:
+            float: Средняя зарплата в рублях
+        """
+        rate = rates.rate(self.salary_currency, self.published_at) if rates is not None else None
+        if rate is None:
+            rate = Salary.default_rate(self.salary_currency)
+        return (self.salary_from + self.salary_to) / 2 * rate
+
+class VacancyView(DataVacancy):
     """
-    Класс для представления входных данных
+    Класс для представления строки VacancyTable в виде вакансии
 
     Attributes:
+        table (VacancyTable): Таблица вакансий
+        index (int): Номер строки
+    """
+    __slots__ = ('table', 'index')
 
+    def __init__(self, table, index):
+        """
+        Инициализирует объект VacancyView
+
+        Args:
+            table (VacancyTable): Таблица вакансий
+            index (int): Номер строки
+        """
+        self.table = table
+        self.index = index
+
+    name = property(lambda self: self.table.names[self.table.name[self.index]])
+    salary_from = property(lambda self: self.table.salary_from[self.index])
+    salary_to = property(lambda self: self.table.salary_to[self.index])
+    salary_currency = property(lambda self: self.table.currencies[self.table.currency[self.index]])
+    area_name = property(lambda self: self.table.cities[self.table.city[self.index]])
+    published_at = property(lambda self: self.table.published_at[self.index])
+
+class VacancyTable:
     """
-    def input_data(self):
+    Класс для хранения вакансий по столбцам
+
+    Числа хранятся в массивах array, названия, валюты и регионы - один раз
+    в списках категорий, а в строках - только их номера
+
+    Attributes:
+        salary_from (array): Нижняя граница вилки оклада
+        salary_to (array): Верхняя граница вилки оклада
+        currency (array): Номера валют
+        city (array): Номера регионов
+        name (array): Номера названий вакансий
+        published_at (list): Даты публикации
+        currencies (list): Валюты
+        cities (list): Регионы
+        names (list): Названия вакансий
+    """
+    def __init__(self):
         """
+        Инициализирует пустой объект VacancyTable
+        """
+        self.salary_from = array('q')
+        self.salary_to = array('q')
+        self.currency = array('I')
+        self.city = array('I')
+        self.name = array('I')
+        self.published_at = []
+        self.currencies = []
+        self.cities = []
+        self.names = []
+        self.__codes = ({}, {}, {})
+
+    def append(self, name, salary_from, salary_to, salary_currency, area_name, published_at):
+        """
+        Добавляет вакансию в таблицу
+
+        Args:
+            name (str): Название вакансии
+            salary_from (str or int or float): Нижняя граница вилки оклада
+            salary_to (str or int or float): Верхняя граница вилки оклада
+            salary_currency (str): Валюта оклада
+            area_name (str): Регион вакансии
+            published_at (str): Дата публикации вакансии
+        """
+        self.salary_from.append(int(float(salary_from)))
+        self.salary_to.append(int(float(salary_to)))
+        self.currency.append(self.__code(0, self.currencies, salary_currency))
+        self.city.append(self.__code(1, self.cities, area_name))
+        self.name.append(self.__code(2, self.names, name))
+        self.published_at.append(published_at)
+
+    def __code(self, i, values, value):
+        """
+        Возвращает номер строки в списке категорий, добавляя её при необходимости
+
+        Args:
+            i (int): Номер словаря категорий
+            values (list): Список категорий
+            value (str): Строка
+
+        Returns:
+            int: Номер строки
+        """
+        code = self.__codes[i].get(value)
+        if code is None:
+            code = self.__codes[i][value] = len(values)
+            values.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.published_at)
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError('VacancyTable index out of range')
+        return VacancyView(self, index % len(self))
+
+    def __iter__(self):
+        return (VacancyView(self, i) for i in range(len(self)))
+
+class VacancyStatistics:
+    """
+    Класс для накопления статистики по вакансиям за один проход по данным
+
+    Хранит точные суммы и количества, поэтому статистику можно дополнять
+    по одной вакансии и объединять с другими объектами VacancyStatistics
+
+    Attributes:
+        job (str): Название выбранной профессии
+        total (int): Количество учтённых вакансий
+        year_sum (dict): Словарь год - сумма зарплат в рублях
+        year_count (dict): Словарь год - количество вакансий
+        job_sum (dict): Словарь год - сумма зарплат выбранной профессии
+        job_count (dict): Словарь год - количество вакансий выбранной профессии
+        city_sum (dict): Словарь город - сумма зарплат в рублях
+        city_count (dict): Словарь город - количество вакансий
+        distributions (SalaryDistributions): Квантили и гистограммы зарплат, None - не считать
+    """
+    def __init__(self, job, rates=None, distributions=False):
+        """
+        Инициализирует пустой объект VacancyStatistics
+
+        Args:
+            job (str): Название выбранной профессии, None - не считать статистику по профессии
+            rates (CurrencyRates): Таблица курсов валют, None - курсы currency_to_rub
+            distributions (bool): Считать квантили и гистограммы зарплат по годам и городам
+        """
+        self.job = job
+        self.rates = rates
+        self.total = 0
+        self.year_sum = {}
+        self.year_count = {}
+        self.job_sum = {}
+        self.job_count = {}
+        self.city_sum = {}
+        self.city_count = {}
+        self.distributions = SalaryDistributions() if distributions else None
+
+    def add(self, vacancy):
+        """
+        Учитывает вакансию в статистике
+
+        Args:
+            vacancy (DataVacancy): Вакансия
+        """
+        self.add_salary(
+            vacancy.name,
+            vacancy.convert_to_rub(self.rates),
+            vacancy.area_name,
+            int(vacancy.published_at[:4]))
+
+    def add_salary(self, name, salary, area_name, year):
+        """
+        Учитывает уже сконвертированную в рубли зарплату вакансии
+
+        Args:
+            name (str): Название вакансии
+            salary (float): Средняя зарплата в рублях
+            area_name (str): Регион вакансии
+            year (int): Год публикации вакансии
+        """
+        self.total += 1
+        self.year_sum[year] = self.year_sum.get(year, 0) + salary
+        self.year_count[year] = self.year_count.get(year, 0) + 1
+
+        if self.job is not None and self.job in name:
+            self.job_sum[year] = self.job_sum.get(year, 0) + salary
+            self.job_count[year] = self.job_count.get(year, 0) + 1
+
+        self.city_sum[area_name] = self.city_sum.get(area_name, 0) + salary
+        self.city_count[area_name] = self.city_count.get(area_name, 0) + 1
+
+        if self.distributions is not None:
+            self.distributions.add(year, area_name, salary)
+
+    def merge(self, other):
+        """
+        Добавляет к статистике суммы и количества из другого объекта
+
+        Args:
+            other (VacancyStatistics): Статистика по той же профессии
+
+        Returns:
+            VacancyStatistics: Текущий объект
+        """
+        self.total += other.total
+        for mine, theirs in (
+                (self.year_sum, other.year_sum),
+                (self.year_count, other.year_count),
+                (self.job_sum, other.job_sum),
+                (self.job_count, other.job_count),
+                (self.city_sum, other.city_sum),
+                (self.city_count, other.city_count)):
+            for key, value in theirs.items():
+                mine[key] = mine.get(key, 0) + value
+
+        if other.distributions is not None:
+            if self.distributions is None:
+                self.distributions = SalaryDistributions(other.distributions.k, other.distributions.width, other.distributions.bins)
+            self.distributions.merge(other.distributions)
+        return self
+
+    def quantiles(self, qs=(0.5, 0.9)):
+        """
+        Возвращает квантили зарплат для отчёта без повторного прохода по данным
+
+        Города отбираются так же, как в result
+
+        Args:
+            qs (tuple): Доли от 0 до 1, по умолчанию медиана и p90
+
+        Returns:
+            year_quantiles (dict): Словарь год - список квантилей с 2007 по 2022 год,
+            city_quantiles (dict): Словарь город - список квантилей
+        """
+        if self.distributions is None:
+            raise ValueError('Статистика посчитана без distributions=True')
+
+        years, cities = self.distributions.quantiles(qs)
+        year_quantiles = {year: years.get(year, [0] * len(qs)) for year in self.__by_year(years)}
+        city_salary = self.result()[4]
+        city_quantiles = {city: cities[city] for city in city_salary if city in cities}
+        return year_quantiles, city_quantiles
+
+    def result(self):
+        """
+        Возвращает статистику в виде словарей для отчёта
+
         Returns:
-            job (str): название выбранной вакансии,
             salary_rub (dict): словарь год - средняя зарплата в рублях,
             salary_count (dict): словарь год - количество вакансий,
             job_rub (dict): словарь год - зарплата выбранной вакансии,
@@ -100,106 +498,50 @@ class InputConect:
             city_salary (dict): словарь город - зарплата,
             city_frac (dict): словарь город - доля выбранных вакансий
         """
-        f = input('Введите название файла: ')
-
-        job = input('Введите название профессии: ')
-
-        salary_rub = self.__get_dict()
-        salary_count = self.__get_dict()
+        salary_rub = self.__erase_empty(self.__round_values(self.__by_year(self.__average(self.year_sum, self.year_count))))
+        salary_count = self.__erase_empty(self.__by_year(self.year_count))
+        job_rub = self.__erase_empty(self.__round_values(self.__by_year(self.__average(self.job_sum, self.job_count))))
+        job_count = self.__erase_empty(self.__by_year(self.job_count))
 
-        job_rub = self.__get_dict()
-        job_count = self.__get_dict()
+        with profiling.span('VacancyStatistics.cities', rows=len(self.city_count)):
+            threshold = int(self.total / 100)
+            cities = [city for city, count in self.city_count.items() if count >= threshold]
 
-        data_objs = []
+            city_salary = {city: self.city_sum[city] / self.city_count[city] for city in cities}
+            city_frac = {city: round(self.city_count[city] / (self.total / 100) / 100, 4) for city in cities}
 
-        with open(f, encoding='utf-8-sig') as file:
-            reader = csv.reader(file)
-            head = []
-
-            is_first = True
-            for row in reader:
-                if is_first:  
-                    is_first = False
-                    head = row
-                else:
-                    if not "" in row and len(row) == len(head):
-
-                        obj = DataVacancy(
-                        row[head.index('name')], 
-                        row[head.index('salary_from')], 
-                        row[head.index('salary_to')], 
-                        row[head.index('salary_currency')], 
-                        row[head.index('area_name')], 
-                        row[head.index('published_at')]
-                        )
-                        data_objs.append(obj)
-
-                        year = int(obj.published_at[:4])
-                        salary_rub[year] = self.__medium(salary_rub[year], obj.salary.convert_to_rub(), salary_count[year]) 
-                        salary_count[year] += 1
-
-                        if(obj.name.find(job) != -1):
-                            job_rub[year] = self.__medium(job_rub[year], obj.salary.convert_to_rub(), job_count[year]) 
-                            job_count[year] += 1
-
-        salary_rub = self.__erase_empty(self.__round_values(salary_rub))
-        job_rub = self.__erase_empty(self.__round_values(job_rub))
-        salary_count = self.__erase_empty(salary_count)
-        job_count = self.__erase_empty(job_count)
-
-        print('Динамика уровня зарплат по годам:', salary_rub)
-        print('Динамика количества вакансий по годам:', salary_count)
-        print('Динамика уровня зарплат по годам для выбранной профессии:', job_rub)
-        print('Динамика количества вакансий по годам для выбранной профессии:', job_count)
-        
-        city_salary = {}
-        city_count = {}
-        city_frac = {} 
-
-        for it in data_objs:
-            city = it.area_name
-            if city not in city_salary.keys():
-                if len([x for x in data_objs if x.area_name == city]) >= int(len(data_objs) / 100):
-                    city_salary[city] = it.salary.convert_to_rub()
-                    city_count[city] = 1
-            else:
-                city_salary[city] = self.__medium(city_salary[city], it.salary.convert_to_rub(), city_count[city])
-                city_count[city] += 1
-
-        all = len(data_objs)
-        for key, value in city_count.items():
-            city_frac[key] = round(value / (all / 100) / 100, 4)
-
-        city_salary = self.__round_values(self.__erase_empty(self.__sort_city(city_salary)))
-        city_frac = self.__erase_empty(self.__sort_city(city_frac))
-        
-        print('Уровень зарплат по городам (в порядке убывания):', city_salary)
-        print('Доля вакансий по городам (в порядке убывания):', city_frac)
+            city_salary = self.__round_values(self.__erase_empty(self.__sort_city(city_salary)))
+            city_frac = self.__erase_empty(self.__sort_city(city_frac))
 
-        return job, salary_rub, salary_count, job_rub, job_count, city_salary, city_frac
+        return salary_rub, salary_count, job_rub, job_count, city_salary, city_frac
 
-    def __get_dict(self):
+    def __average(self, sums, counts):
         """
-        Возвращает пустой словарь с 2007 года по 2022
+        Возвращает средние значения по суммам и количествам
+
+        Args:
+            sums (dict): Словарь ключ - сумма
+            counts (dict): Словарь ключ - количество
 
         Returns:
-            dict: Пустой словарь с 2007 года по 2022
+            dict: Словарь ключ - среднее значение
         """
-        return {x: 0 for x in range(2007, 2023)}
+        return {key: sums[key] / counts[key] for key in sums}
 
-    def __medium(self, m, x, n):
+    def __by_year(self, d):
         """
-        Возвращает среднее арифметическое ряда чисел
+        Раскладывает значения по словарю с 2007 года по 2022
 
         Args:
-            m (float): Текущая сумма
-            x (int): Прибавляемое число
-            n (int): Количество уже прибавленных чисел
+            d (dict): Словарь год - значение
 
         Returns:
-            float: Среднее арифметическое чисел
+            dict: Словарь год - значение, упорядоченный по годам
         """
-        return (m * n + x) / (n + 1)  
+        result = {x: 0 for x in range(2007, 2023)}
+        for year in sorted(d):
+            result[year] = d[year]
+        return result
 
     def __sort_city(self, d):
         """
@@ -239,6 +581,310 @@ class InputConect:
         if len(cd.keys()) == 0:
             cd[2022] = 0
         return cd
+
+class ProfessionsStatistics:
+    """
+    Класс для накопления статистики сразу по нескольким профессиям за один проход
+
+    Общая статистика по годам и городам считается один раз, а названия вакансий
+    сопоставляются со всеми профессиями одним автоматом ProfessionMatcher
+
+    Attributes:
+        jobs (list): Названия профессий
+        rates (CurrencyRates): Таблица курсов валют
+        common (VacancyStatistics): Статистика по всем вакансиям
+        job_sum (list): Для каждой профессии словарь год - сумма зарплат
+        job_count (list): Для каждой профессии словарь год - количество вакансий
+    """
+    def __init__(self, jobs, rates=None):
+        """
+        Инициализирует пустой объект ProfessionsStatistics
+
+        Args:
+            jobs (list): Названия профессий
+            rates (CurrencyRates): Таблица курсов валют, None - курсы currency_to_rub
+        """
+        self.jobs = list(jobs)
+        self.rates = rates
+        self.matcher = ProfessionMatcher(self.jobs)
+        self.common = VacancyStatistics(None, rates)
+        self.job_sum = [{} for _ in self.jobs]
+        self.job_count = [{} for _ in self.jobs]
+
+    def add(self, vacancy):
+        """
+        Учитывает вакансию в статистике всех профессий
+
+        Args:
+            vacancy (DataVacancy): Вакансия
+        """
+        salary = vacancy.convert_to_rub(self.rates)
+        year = int(vacancy.published_at[:4])
+        self.common.add_salary(vacancy.name, salary, vacancy.area_name, year)
+
+        for i in self.matcher.match(vacancy.name):
+            self.job_sum[i][year] = self.job_sum[i].get(year, 0) + salary
+            self.job_count[i][year] = self.job_count[i].get(year, 0) + 1
+
+    def merge(self, other):
+        """
+        Добавляет к статистике суммы и количества из другого объекта с теми же профессиями
+
+        Args:
+            other (ProfessionsStatistics): Статистика
+
+        Returns:
+            ProfessionsStatistics: Текущий объект
+        """
+        self.common.merge(other.common)
+        for mine, theirs in zip(self.job_sum + self.job_count, other.job_sum + other.job_count):
+            for key, value in theirs.items():
+                mine[key] = mine.get(key, 0) + value
+        return self
+
+    def statistics(self, job):
+        """
+        Возвращает статистику по одной профессии
+
+        Args:
+            job (str): Название профессии из jobs
+
+        Returns:
+            VacancyStatistics: Статистика по профессии
+        """
+        i = self.jobs.index(job)
+        stats = VacancyStatistics(job, self.rates).merge(self.common)
+        stats.job_sum = dict(self.job_sum[i])
+        stats.job_count = dict(self.job_count[i])
+        return stats
+
+    def result(self):
+        """
+        Возвращает статистику по каждой профессии в виде, который возвращает InputConect.input_data
+
+        Returns:
+            dict: Словарь профессия - (job, salary_rub, salary_count, job_rub, job_count, city_salary, city_frac)
+        """
+        return {job: (job, *self.statistics(job).result()) for job in self.jobs}
+
+class InputConect:
+    """
+    Класс для представления входных данных
+
+    Attributes:
+        cache (ColumnCache): Кеш разобранных файлов, None - читать файл каждый раз
+        rates (CurrencyRates): Таблица курсов валют, None - курсы currency_to_rub
+        database (VacancyDatabase): База SQLite, в которую загружается файл, None - без неё
+        dedup (Deduplicator): Удаление повторяющихся строк, None - строки не проверяются
+    """
+    def __init__(self, cache=None, rates=None, database=None, dedup=None):
+        """
+        Инициализирует объект InputConect
+
+        Args:
+            cache (ColumnCache): Кеш разобранных файлов
+            rates (CurrencyRates): Таблица курсов валют по месяцам
+            database (VacancyDatabase): База SQLite
+            dedup (Deduplicator): Удаление повторов, общее для всех читаемых файлов
+        """
+        self.cache = cache
+        self.rates = rates
+        self.database = database
+        self.dedup = dedup
+
+    def input_data(self, file_name=None, job=None):
+        """
+        Считает статистику, запрашивая у пользователя не переданные аргументы
+
+        Args:
+            file_name (str): Название файла, None - спросить
+            job (str): Название профессии, None - спросить
+
+        Returns:
+            job (str): название выбранной вакансии,
+            salary_rub (dict): словарь год - средняя зарплата в рублях,
+            salary_count (dict): словарь год - количество вакансий,
+            job_rub (dict): словарь год - зарплата выбранной вакансии,
+            job_count (dict): словарь год - количество выбранных вакансий ,
+            city_salary (dict): словарь город - зарплата,
+            city_frac (dict): словарь город - доля выбранных вакансий
+        """
+        f = file_name if file_name is not None else input('Введите название файла: ')
+
+        job = job if job is not None else input('Введите название профессии: ')
+
+        salary_rub, salary_count, job_rub, job_count, city_salary, city_frac = self.read_statistics(f, job).result()
+
+        print('Динамика уровня зарплат по годам:', salary_rub)
+        print('Динамика количества вакансий по годам:', salary_count)
+        print('Динамика уровня зарплат по годам для выбранной профессии:', job_rub)
+        print('Динамика количества вакансий по годам для выбранной профессии:', job_count)
+        print('Уровень зарплат по городам (в порядке убывания):', city_salary)
+        print('Доля вакансий по городам (в порядке убывания):', city_frac)
+        if self.dedup is not None:
+            print('Удалено повторяющихся вакансий:', self.dedup.dropped)
+
+        return job, salary_rub, salary_count, job_rub, job_count, city_salary, city_frac
+
+    def read_statistics(self, file_name, job, distributions=False):
+        """
+        Считает статистику по файлу за один проход, не храня вакансии в памяти
+
+        С dedup кеш и база не используются: повторы отбрасываются при чтении строк
+
+        Args:
+            file_name (str): Путь к csv файлу
+            job (str): Название выбранной профессии
+            distributions (bool): Считать в том же проходе квантили и гистограммы зарплат
+
+        Returns:
+            VacancyStatistics: Накопленная статистика
+        """
+        if self.database is not None and self.dedup is None and not distributions:
+            with profiling.span('InputConect.database_load') as span:
+                span.rows = self.database.load(file_name)
+            with profiling.span('InputConect.database_statistics'):
+                return self.database.statistics(job, file_name=file_name)
+
+        if self.cache is not None and self.dedup is None:
+            from columnar import columns_statistics
+            with profiling.span('InputConect.load_columns') as span:
+                columns = self.cache.load(file_name)
+                span.rows = len(columns)
+            with profiling.span('InputConect.columns_statistics', rows=len(columns)):
+                return columns_statistics(columns, job, self.rates, distributions=distributions)
+
+        stats = VacancyStatistics(job, self.rates, distributions)
+        if profiling.enabled():
+            return self.__traced_statistics(file_name, stats)
+
+        for vacancy in self.read_vacancies(file_name):
+            stats.add(vacancy)
+        return stats
+
+    def __traced_statistics(self, file_name, stats, block_size=10000):
+        """
+        Считает статистику блоками строк, отдельно замеряя разбор csv,
+        создание DataVacancy и накопление статистики
+
+        Args:
+            file_name (str): Путь к csv файлу
+            stats (VacancyStatistics): Пустая статистика
+            block_size (int): Количество строк в блоке
+
+        Returns:
+            VacancyStatistics: Накопленная статистика
+        """
+        start = perf_counter()
+        timings = {'InputConect.csv': 0, 'InputConect.vacancies': 0, 'InputConect.aggregate': 0}
+        rows = self.read_rows(file_name)
+
+        while True:
+            t0 = perf_counter()
+            block = list(islice(rows, block_size))
+            t1 = perf_counter()
+            if not block:
+                break
+            vacancies = [DataVacancy(*row) for row in block]
+            t2 = perf_counter()
+            for vacancy in vacancies:
+                stats.add(vacancy)
+            t3 = perf_counter()
+
+            timings['InputConect.csv'] += t1 - t0
+            timings['InputConect.vacancies'] += t2 - t1
+            timings['InputConect.aggregate'] += t3 - t2
+
+        for name, seconds in timings.items():
+            profiling.record(name, start, seconds, stats.total)
+        profiling.record('InputConect.read_statistics', start, perf_counter() - start, stats.total)
+        return stats
+
+    def read_professions(self, file_name, jobs):
+        """
+        Считает статистику сразу по нескольким профессиям за один проход по файлу
+
+        Args:
+            file_name (str): Путь к csv файлу
+            jobs (list): Названия профессий
+
+        Returns:
+            ProfessionsStatistics: Накопленная статистика
+        """
+        if self.cache is not None and self.dedup is None:
+            from columnar import professions_statistics
+            return professions_statistics(self.cache.load(file_name), jobs, self.rates)
+
+        stats = ProfessionsStatistics(jobs, self.rates)
+        for vacancy in self.read_vacancies(file_name):
+            stats.add(vacancy)
+        return stats
+
+    def read_job_vacancies(self, file_name, job):
+        """
+        Построчно возвращает вакансии выбранной профессии для списка в отчёте
+
+        Args:
+            file_name (str): Путь к csv файлу
+            job (str): Название выбранной профессии
+
+        Yields:
+            list: name, salary (зарплата в рублях), area_name, published_at
+        """
+        for vacancy in self.read_vacancies(file_name):
+            if job in vacancy.name:
+                yield [vacancy.name, int(vacancy.convert_to_rub(self.rates)), vacancy.area_name, vacancy.published_at]
+
+    def read_table(self, file_name):
+        """
+        Читает csv файл в компактную таблицу вакансий
+
+        Args:
+            file_name (str): Путь к csv файлу
+
+        Returns:
+            VacancyTable: Таблица вакансий
+        """
+        table = VacancyTable()
+        for row in self.read_rows(file_name):
+            table.append(*row)
+        return table
+
+    def read_vacancies(self, file_name):
+        """
+        Построчно читает csv файл и возвращает заполненные вакансии
+
+        Args:
+            file_name (str): Путь к csv файлу
+
+        Yields:
+            DataVacancy: Вакансия из очередной строки файла
+        """
+        for row in self.read_rows(file_name):
+            yield DataVacancy(*row)
+
+    def read_rows(self, file_name):
+        """
+        Построчно читает csv файл и возвращает заполненные строки,
+        пропуская уже встречавшиеся, если задан dedup
+
+        Args:
+            file_name (str): Путь к csv файлу, возможно сжатому gzip, zstd или bz2
+
+        Yields:
+            tuple: name, salary_from, salary_to, salary_currency, area_name, published_at
+        """
+        with open_text(file_name) as file:
+            reader = csv.reader(file)
+            head = next(reader, [])
+            columns = [head.index(x) for x in COLUMNS]
+            dedup = self.dedup
+
+            for row in reader:
+                if not "" in row and len(row) == len(head):
+                    values = tuple(row[i] for i in columns)
+                    if dedup is None or dedup.add(values):
+                        yield values
         
 class Report:
     """
@@ -248,11 +894,44 @@ class Report:
         wb (Workbook): Объект для работы с таблицей эксель
         first_headers (list): Заголовки для первого листа таблицы
         second_headers (list): Заголовки для второго листа таблицы
+        render_cache (RenderCache): Кеш готовых отчётов, None - всегда создавать заново
     """
-    def __init__(self):
+    def __init__(self, render_cache=None):
         """
         Инициализирует объект Report
+
+        Тяжёлые библиотеки (openpyxl, matplotlib, numpy, jinja2, pdfkit) импортируются
+        только в методах, которым они нужны
+
+        Args:
+            render_cache (RenderCache): Кеш готовых отчётов
+        """
+        self.wb = None
+        self.render_cache = render_cache
+
+    def __cached(self, kind, job, inputs, file_name, render):
+        """
+        Создаёт отчёт через кеш, если он задан
+
+        Args:
+            kind (str): Тип отчёта: 'image', 'excel' или 'pdf'
+            job (str): Название профессии
+            inputs (function): Функция без аргументов, возвращающая данные, от которых
+                зависит отчёт, вызывается только при заданном кеше
+            file_name (str): Путь к файлу отчёта
+            render (function): Функция без аргументов, создающая отчёт
+        """
+        if self.render_cache is None:
+            render()
+            return
+        self.render_cache.render(self.render_cache.key(kind, job, *inputs()), file_name, render)
+
+    def __new_workbook(self):
+        """
+        Создаёт пустую книгу эксель с листами статистики
         """
+        from openpyxl import Workbook
+
         self.wb = Workbook()
 
         for sheet_name in self.wb.sheetnames:
@@ -285,27 +964,74 @@ class Report:
             return ""
         return str(value)
 
+    __style_cache = None
+
+    def __styles(self):
+        """
+        Возвращает общие для всех ячеек объекты стилей, создавая их один раз
+
+        Returns:
+            dict: Словарь название - стиль
+        """
+        if Report.__style_cache is None:
+            from openpyxl.styles import Font
+            from openpyxl.styles.borders import Border, Side
+
+            thin = Side(style='thin')
+            Report.__style_cache = {
+                'bold': Font(bold=True),
+                'border': Border(left=thin, right=thin, top=thin, bottom=thin),
+                'none': Border(),
+            }
+        return Report.__style_cache
+
     def __set_size(self):
         """
         Задаёт размеры колонок в таблице эксель
         """
-        for column_cells in self.wb.active.columns:
-            length = max(len(self.__as_text(cell.value)) for cell in column_cells)
-            self.wb.active.column_dimensions[get_column_letter(column_cells[0].column)].width = length + 2
+        from openpyxl.utils import get_column_letter
+
+        widths = {}
+        for row in self.wb.active.iter_rows():
+            for cell in row:
+                widths[cell.column] = max(widths.get(cell.column, 0), len(self.__as_text(cell.value)))
+        for column, length in widths.items():
+            self.wb.active.column_dimensions[get_column_letter(column)].width = length + 2
 
     def __make_border(self):
         """
         Задаёт обводку для ячеек в таблице эксель
         """
+        border = self.__styles()['border']
         for row in self.wb.active.rows:
             for cell in row:
-                cell.border = Border(
-                    left=Side(style='thin'), 
-                    right=Side(style='thin'), 
-                    top=Side(style='thin'), 
-                    bottom=Side(style='thin'))
+                cell.border = border
+
+    def __first_rows(self, data, quantiles=None):
+        """
+        Возвращает строки первой страницы эксель вместе с заголовком
+
+        Args:
+            data list(dict): Список словарей со статистикой по годам
+            quantiles (tuple): Квантили из VacancyStatistics.quantiles, None - без колонок медианы и p90
 
-    def __make_first_sheet(self, data):
+        Returns:
+            list: Строки страницы
+        """
+        headers = list(self.__first_headers)
+        headers[2] = headers[2] + data[0]
+        headers[4] = headers[4] + data[0]
+        if quantiles is not None:
+            headers += ['Медианная зарплата', 'Зарплата p90']
+
+        rows = [headers]
+        for year in data[1].keys():
+            rows.append([year, data[1][year], data[3].get(year, 0), data[2].get(year, 0), data[4].get(year, 0)])
+            if quantiles is not None:
+                rows[-1] += quantiles[0].get(year, [0, 0])[:2]
+        return rows
+
+    def __make_first_sheet(self, data, quantiles=None):
         """
         Создаёт первую страницу в эксель и заполняет её
 
@@ -315,24 +1041,23 @@ class Report:
                 Динамика количества вакансий по годам
                 Динамика уровня зарплат по годам для выбранной профессии
                 Динамика количества вакансий по годам для выбранной профессии
+            quantiles (tuple): Квантили из VacancyStatistics.quantiles
 
         """
         self.wb.active = self.wb['Статистика по годам']
         ws = self.wb.active
-        
-        self.__first_headers[2] = self.__first_headers[2] + data[0]
-        self.__first_headers[4] = self.__first_headers[4] + data[0]
-        ws.append(it for it in self.__first_headers)
-        for row in ws.rows:
-            for cell in row:
-                cell.font = Font(bold=True)
-        
-        for year in data[1].keys():
-            row = [year, data[1][year], data[3][year], data[2][year], data[4][year]]
+
+        rows = self.__first_rows(data, quantiles)
+        ws.append(rows[0])
+        for cell in ws[1]:
+            cell.font = self.__styles()['bold']
+
+        for row in rows[1:]:
             ws.append(row)
 
-        self.__set_size()
-        self.__make_border()
+        with profiling.span('Report.excel_styling'):
+            self.__set_size()
+            self.__make_border()
         
     __second_headers = [
         'Город',
@@ -342,6 +1067,26 @@ class Report:
         'Доля вакансий'
     ]
 
+    def __second_rows(self, data):
+        """
+        Возвращает строки второй страницы эксель вместе с заголовком
+
+        Args:
+            data list(dict): Список словарей со статистикой по городам
+
+        Returns:
+            list: Строки страницы
+        """
+        info1 = list(data[0].keys())
+        info2 = list(data[0].values())
+        info3 = list(data[1].keys())
+        info4 = list(data[1].values())
+
+        rows = [list(self.__second_headers)]
+        for i in range(len(data[0])):
+            rows.append([info1[i], info2[i], '', info3[i], info4[i]])
+        return rows
+
     def __make_second_sheet(self, data):
         """
         Создаёт вторую странциу в эксель и заполняет её
@@ -354,45 +1099,176 @@ class Report:
         self.wb.active = self.wb['Статистика по городам']
         ws = self.wb.active
 
-        ws.append(it for it in self.__second_headers)
-        for row in ws.rows:
-            for cell in row:
-                cell.font = Font(bold=True)
-        
-        info1 = list(data[0].keys())
-        info2 = list(data[0].values())
-        info3 = list(data[1].keys())
-        info4 = list(data[1].values())
+        rows = self.__second_rows(data)
+        ws.append(rows[0])
+        for cell in ws[1]:
+            cell.font = self.__styles()['bold']
 
-        for i in range(len(data[0])):
-            row = [info1[i], info2[i], '', info3[i], info4[i]]
+        for row in rows[1:]:
             ws.append(row)
 
-        self.__set_size()
-        self.__make_border()
+        with profiling.span('Report.excel_styling'):
+            self.__set_size()
+            self.__make_border()
 
-        for i in range(1, 12):
-            ws[f"C{i}"].border = Border()
-        
-        for i in range(1, 12):
-            ws[f"E{i}"].number_format = '0.00%'
+            for i in range(1, 12):
+                ws[f"C{i}"].border = self.__styles()['none']
+            
+            for i in range(1, 12):
+                ws[f"E{i}"].number_format = '0.00%'
 
         self.wb.active = self.wb['Статистика по годам']
 
-    def generate_excel(self, data1, data2):
+    __vacancy_headers = [
+        'Название',
+        'Зарплата в рублях',
+        'Город',
+        'Дата публикации'
+    ]
+
+    def __make_vacancy_sheet(self, vacancies):
+        """
+        Создаёт третью страницу в эксель со списком вакансий
+
+        Args:
+            vacancies (iterable): Строки name, salary, area_name, published_at
+        """
+        ws = self.wb.create_sheet('Вакансии')
+        self.wb.active = ws
+
+        ws.append(self.__vacancy_headers)
+        for cell in ws[1]:
+            cell.font = self.__styles()['bold']
+
+        with profiling.span('Report.excel_vacancies') as span:
+            for row in vacancies:
+                ws.append(row)
+            span.rows = ws.max_row - 1
+
+        with profiling.span('Report.excel_styling', rows=ws.max_row):
+            self.__set_size()
+            self.__make_border()
+
+        self.wb.active = self.wb['Статистика по годам']
+
+    def generate_excel(self, data1, data2, file_name='report.xlsx', vacancies=None, write_only=False, quantiles=None):
         """
         Генерирует файл эксель со статистикой
 
         Args:
             data1 list(dict): Словари для заполнения первой страницы эксель
             data2 list(dict): Словари для заполнения второй страницы эксель
+            file_name (str): Путь к файлу эксель
+            vacancies (iterable): Строки для третьей страницы со списком вакансий, None - без неё
+            write_only (bool): Записывать файл потоково, не храня ячейки в памяти
+            quantiles (tuple): Квантили из VacancyStatistics.quantiles для колонок медианы и p90
         """
-        self.__make_first_sheet(data1)
-        self.__make_second_sheet(data2)
+        if vacancies is None:
+            self.__cached('excel', data1[0], lambda: (data1, data2, write_only, quantiles), file_name,
+                          lambda: self.__render_excel(data1, data2, file_name, None, write_only, quantiles))
+        else:
+            self.__render_excel(data1, data2, file_name, vacancies, write_only, quantiles)
 
-        self.wb.save('report.xlsx')
+    def __render_excel(self, data1, data2, file_name, vacancies, write_only, quantiles):
+        """
+        Создаёт файл эксель без кеша, аргументы как у generate_excel
+        """
+        if write_only:
+            with profiling.span('Report.stream_excel'):
+                self.__stream_excel(data1, data2, file_name, vacancies, quantiles)
+            return
+
+        with profiling.span('Report.generate_excel'):
+            if self.wb is None or self.wb['Статистика по годам'].max_row > 1:
+                self.__new_workbook()
+
+            self.__make_first_sheet(data1, quantiles)
+            self.__make_second_sheet(data2)
+            if vacancies is not None:
+                self.__make_vacancy_sheet(vacancies)
+
+            with profiling.span('Report.excel_save'):
+                self.wb.save(file_name)
+
+    def __stream_excel(self, data1, data2, file_name, vacancies, quantiles=None, sample=1000):
+        """
+        Записывает файл эксель в потоковом режиме openpyxl
+
+        Память не зависит от количества вакансий: строки сразу пишутся в файл,
+        а ширина колонок считается по первым sample строкам каждой страницы
 
-    def __make_salary_year(self, job, data1, data2, ax):
+        Args:
+            data1 list(dict): Словари для заполнения первой страницы эксель
+            data2 list(dict): Словари для заполнения второй страницы эксель
+            file_name (str): Путь к файлу эксель
+            vacancies (iterable): Строки для третьей страницы, None - без неё
+            quantiles (tuple): Квантили из VacancyStatistics.quantiles
+            sample (int): Количество строк для расчёта ширины колонок
+        """
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+
+        self.__stream_sheet(wb.create_sheet('Статистика по годам'), self.__first_rows(data1, quantiles), sample)
+        self.__stream_sheet(wb.create_sheet('Статистика по городам'), self.__second_rows(data2), sample, blank=2, percent=4)
+        if vacancies is not None:
+            self.__stream_sheet(wb.create_sheet('Вакансии'), chain([self.__vacancy_headers], vacancies), sample)
+
+        wb.save(file_name)
+
+    def __stream_sheet(self, ws, rows, sample, blank=None, percent=None):
+        """
+        Потоково записывает строки на страницу с общими объектами стилей
+
+        Args:
+            ws (WriteOnlyWorksheet): Страница эксель
+            rows (iterable): Строки, первая - заголовок
+            sample (int): Количество строк для расчёта ширины колонок
+            blank (int): Номер колонки без обводки
+            percent (int): Номер колонки в процентном формате
+        """
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.utils import get_column_letter
+
+        styles = self.__styles()
+        rows = iter(rows)
+        head = list(islice(rows, sample))
+
+        widths = {}
+        for row in head:
+            for i, value in enumerate(row):
+                widths[i] = max(widths.get(i, 0), len(self.__as_text(value)))
+        for i, length in widths.items():
+            ws.column_dimensions[get_column_letter(i + 1)].width = length + 2
+
+        for n, row in enumerate(chain(head, rows)):
+            cells = []
+            for i, value in enumerate(row):
+                cell = WriteOnlyCell(ws, value=value)
+                cell.border = styles['none'] if i == blank else styles['border']
+                if n == 0:
+                    cell.font = styles['bold']
+                if i == percent:
+                    cell.number_format = '0.00%'
+                cells.append(cell)
+            ws.append(cells)
+
+    def __error_bars(self, labels, errors):
+        """
+        Возвращает полуширины интервалов в порядке подписей графика
+
+        Args:
+            labels (list): Ключи столбцов
+            errors (dict): Словарь ключ - полуширина интервала, None - без интервалов
+
+        Returns:
+            list: Полуширины интервалов или None
+        """
+        if errors is None:
+            return None
+        return [errors.get(x, 0) for x in labels]
+
+    def __make_salary_year(self, job, data1, data2, ax, errors=(None, None)):
         """
         Создаёт первый график "Уровень зарплат по годам"
 
@@ -401,16 +1277,19 @@ class Report:
             data1 (dict): Статистика по всем вакансиям
             data2 (dict): Статистика по выбранной вакансии
             ax (subplot): Объект, куда рисовать график
+            errors (tuple): Полуширины интервалов для data1 и data2
         """
         labels = list(data1.keys())
         average = list(data1.values())
-        jobs = list(data2.values())
+        jobs = [data2.get(x, 0) for x in labels]
+
+        import numpy as np
 
         x = np.arange(len(labels))
         width = 0.35
         
-        ax.bar(x - width/2, average, width, label='средняя з/п')
-        ax.bar(x + width/2, jobs, width, label=f"з/п {job}")    
+        ax.bar(x - width/2, average, width, label='средняя з/п', yerr=self.__error_bars(labels, errors[0]))
+        ax.bar(x + width/2, jobs, width, label=f"з/п {job}", yerr=self.__error_bars(labels, errors[1]))
 
         ax.set_title('Уровень зарплат по годам')
         ax.set_xticks(x, labels, rotation=90)
@@ -418,7 +1297,7 @@ class Report:
         ax.grid(axis='y')
         ax.tick_params(axis='both', labelsize=8)
 
-    def __make_counts_year(self, job, data1, data2, ax):
+    def __make_counts_year(self, job, data1, data2, ax, errors=(None, None)):
         """
         Создаёт второй график "Количество вакансий по годам"
 
@@ -427,17 +1306,20 @@ class Report:
             data1 (dict): Статистика по всем вакансиям
             data2 (dict): Статистика по выбранной вакансии
             ax (subplot): Объект, куда рисовать график
+            errors (tuple): Полуширины интервалов для data1 и data2
         """
 
         labels = list(data1.keys())
         counts = list(data1.values())
-        jobs = list(data2.values())
+        jobs = [data2.get(x, 0) for x in labels]
+
+        import numpy as np
 
         x = np.arange(len(labels))
         width = 0.35
         
-        ax.bar(x - width/2, counts, width, label='Количество вакансий')
-        ax.bar(x + width/2, jobs, width, label=f"Количество вакансий\n{job}")    
+        ax.bar(x - width/2, counts, width, label='Количество вакансий', yerr=self.__error_bars(labels, errors[0]))
+        ax.bar(x + width/2, jobs, width, label=f"Количество вакансий\n{job}", yerr=self.__error_bars(labels, errors[1]))
 
         ax.set_title('Количество вакансий по годам')
         ax.set_xticks(x, labels, rotation=90)
@@ -445,21 +1327,23 @@ class Report:
         ax.grid(axis='y')
         ax.tick_params(axis='both', labelsize=8)
 
-    def __make_salary_city(self, data, ax):
+    def __make_salary_city(self, data, ax, errors=None):
         """
         Создаёт третий график "Уровень зарплат по городам"
 
         Args:
             data (dict): Словарь зарплат по городам
             ax (subplot): Объект, куда рисовать график
+            errors (dict): Полуширины интервалов по городам
         """
         sep = lambda x: x.replace(' ', '\n').replace('-', '\n')
 
         cities = list(map(sep, data.keys()))[::-1]
         values = list(data.values())[::-1]
-        y_pos = np.arange(len(cities))
+        y_pos = list(range(len(cities)))
+        xerr = self.__error_bars(list(data.keys())[::-1], errors)
 
-        ax.barh(y_pos, values)
+        ax.barh(y_pos, values, xerr=xerr)
         ax.set_yticks(y_pos, labels=cities, fontsize=6)
         ax.set_title('Уровень зарплат по городам')
         ax.tick_params(axis='x', labelsize=8)
@@ -479,7 +1363,67 @@ class Report:
         ax.set_title('Доля вакансий по городам')
         ax.pie(x, labels = cities, textprops={'fontsize': 6}, startangle=90)
 
-    def generate_image(self, data):
+    def __make_salary_quantiles(self, data, ax):
+        """
+        Создаёт график "Медиана и p90 зарплат по годам"
+
+        Args:
+            data (dict): Словарь год - [медиана, p90]
+            ax (subplot): Объект, куда рисовать график
+        """
+        labels = list(data.keys())
+        median = [x[0] for x in data.values()]
+        p90 = [x[1] for x in data.values()]
+
+        import numpy as np
+
+        x = np.arange(len(labels))
+        width = 0.35
+
+        ax.bar(x - width/2, median, width, label='медиана')
+        ax.bar(x + width/2, p90, width, label='p90')
+
+        ax.set_title('Медиана и p90 зарплат по годам')
+        ax.set_xticks(x, labels, rotation=90)
+        ax.legend(prop={"size":8})
+        ax.grid(axis='y')
+        ax.tick_params(axis='both', labelsize=8)
+
+    def __make_median_city(self, data, ax):
+        """
+        Создаёт график "Медиана зарплат по городам"
+
+        Args:
+            data (dict): Словарь город - [медиана, p90]
+            ax (subplot): Объект, куда рисовать график
+        """
+        sep = lambda x: x.replace(' ', '\n').replace('-', '\n')
+
+        cities = list(map(sep, data.keys()))[::-1]
+        values = [x[0] for x in data.values()][::-1]
+        y_pos = list(range(len(cities)))
+
+        ax.barh(y_pos, values)
+        ax.set_yticks(y_pos, labels=cities, fontsize=6)
+        ax.set_title('Медиана зарплат по городам')
+        ax.tick_params(axis='x', labelsize=8)
+
+    def __pyplot(self):
+        """
+        Импортирует matplotlib.pyplot, по умолчанию с неинтерактивным бэкендом Agg
+
+        Другой бэкенд можно выбрать переменной окружения MPLBACKEND
+
+        Returns:
+            module: matplotlib.pyplot
+        """
+        import matplotlib
+        if 'MPLBACKEND' not in os.environ:
+            matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        return plt
+
+    def generate_image(self, data, file_name='graph.png', quantiles=None, errors=None):
         """
         Создаёт графическую статистику
 
@@ -491,18 +1435,62 @@ class Report:
                 Динамика количества вакансий по годам для выбранной профессии
                 Уровень зарплат по городам (в порядке убывания)
                 Доля вакансий по городам (в порядке убывания)
+            file_name (str): Путь к файлу с графиками
+            quantiles (tuple): Квантили из VacancyStatistics.quantiles, None - без графиков медианы и p90
+            errors (tuple): Полуширины доверительных интервалов из preview.preview, None - без них
         """
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(nrows=2, ncols=2)
+        self.__cached('image', data[0], lambda: (tuple(data[1:]), quantiles, errors), file_name,
+                      lambda: self.__render_image(data, file_name, quantiles, errors))
 
-        self.__make_salary_year(data[0], data[1], data[3], ax1)
-        self.__make_counts_year(data[0], data[2], data[4], ax2)
-        self.__make_salary_city(data[5], ax3)
-        self.__make_jobs_count(data[6], ax4)
-        
-        fig.tight_layout()
-        fig.savefig('graph.png')
+    def __render_image(self, data, file_name, quantiles, errors):
+        """
+        Рисует графики без кеша, аргументы как у generate_image
+        """
+        with profiling.span('Report.generate_image'):
+            with profiling.span('Report.image_draw'):
+                plt = self.__pyplot()
+                if quantiles is None:
+                    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(nrows=2, ncols=2)
+                else:
+                    fig, ((ax1, ax2), (ax3, ax4), (ax5, ax6)) = plt.subplots(nrows=3, ncols=2, figsize=(6.4, 7.2))
+                    self.__make_salary_quantiles(quantiles[0], ax5)
+                    self.__make_median_city(quantiles[1], ax6)
+
+                errors = errors or (None,) * 6
+                self.__make_salary_year(data[0], data[1], data[3], ax1, (errors[0], errors[2]))
+                self.__make_counts_year(data[0], data[2], data[4], ax2, (errors[1], errors[3]))
+                self.__make_salary_city(data[5], ax3, errors[4])
+                self.__make_jobs_count(data[6], ax4)
+            
+            with profiling.span('Report.image_save'):
+                fig.tight_layout()
+                fig.savefig(file_name)
+                plt.close(fig)
+
+    def generate_professions(self, results, excel=True, image=True):
+        """
+        Создаёт отчёты по каждой профессии из общей статистики
+
+        Args:
+            results (dict): Словарь профессия - данные, как в ProfessionsStatistics.result
+            excel (bool): Создавать файлы эксель report_<профессия>.xlsx
+            image (bool): Создавать графики graph_<профессия>.png
+
+        Returns:
+            list: Пути к созданным файлам
+        """
+        files = []
+        for job, data in results.items():
+            name = re.sub(r'[\\/:*?"<>|]', '_', job)
+            if excel:
+                files.append(f'report_{name}.xlsx')
+                self.generate_excel(data[:5], data[5:], files[-1])
+            if image:
+                files.append(f'graph_{name}.png')
+                self.generate_image(data, files[-1])
+        return files
         
-    def generate_pdf(self, data):
+    def generate_pdf(self, data, file_name='report.pdf', image_file='graph.png', converter=None, template=None):
         """
         Создаёт pdf статистику
 
@@ -514,15 +1502,53 @@ class Report:
                 Динамика количества вакансий по годам для выбранной профессии
                 Уровень зарплат по городам (в порядке убывания)
                 Доля вакансий по городам (в порядке убывания)
+            file_name (str): Путь к pdf файлу
+            image_file (str): Путь к графикам из generate_image
+            converter (function): Функция (html, file_name), создающая pdf, None - pdfkit
+            template (Template): Скомпилированный шаблон jinja2, None - PDF_TEMPLATE
+        """
+        def inputs():
+            template_file = PDF_TEMPLATE if template is None else getattr(template, 'filename', None)
+            return (
+                image_file,
+                file_digest(image_file),
+                file_digest(template_file) if template_file else getattr(template, 'name', id(template)),
+                getattr(converter, '__qualname__', None),
+            )
+
+        self.__cached('pdf', data[0], inputs, file_name,
+                      lambda: self.__render_pdf(data, file_name, image_file, converter, template))
+
+    def __render_pdf(self, data, file_name, image_file, converter, template):
+        """
+        Создаёт pdf без кеша, аргументы как у generate_pdf
         """
-        job = data[0]
-        image_file = "graph.png"
+        with profiling.span('Report.pdf_template'):
+            if template is None:
+                from jinja2 import Environment, FileSystemLoader
 
-        env = Environment(loader=FileSystemLoader('.'))
-        template = env.get_template("pdf_template.html")
+                env = Environment(loader=FileSystemLoader(os.path.dirname(PDF_TEMPLATE)))
+                template = env.get_template(os.path.basename(PDF_TEMPLATE))
 
-        pdf_template = template.render({'job': job, 'image_file': image_file})
+            job = data[0]
+            pdf_template = template.render({'job': job, 'image_file': image_file})
 
-        config = pdfkit.configuration(wkhtmltopdf=r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe')
-        pdfkit.from_string(pdf_template, 'report.pdf', configuration=config)
+        with profiling.span('Report.pdf_convert'):
+            (converter or self.__pdfkit_converter)(pdf_template, file_name)
+
+    def __pdfkit_converter(self, html, file_name):
+        """
+        Создаёт pdf из html с помощью wkhtmltopdf
+
+        Путь к wkhtmltopdf берётся из переменной окружения WKHTMLTOPDF,
+        а если её нет и стандартного пути Windows тоже нет - ищется в PATH
+
+        Args:
+            html (str): Html страница
+            file_name (str): Путь к pdf файлу
+        """
+        import pdfkit
 
+        path = os.environ.get('WKHTMLTOPDF', r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe')
+        config = pdfkit.configuration(wkhtmltopdf=path) if os.path.exists(path) else pdfkit.configuration()
+        pdfkit.from_string(html, file_name, configuration=config)
@@ -0,0 +1,100 @@
+from collections import deque
+
+AUTOMATON_PATTERNS = 80
+
+class ProfessionMatcher:
+    """
+    Класс для поиска нескольких подстрок в строке
+
+    Автомат Ахо - Корасик проходит строку один раз при любом количестве подстрок,
+    но на чистом Python медленнее проверки каждой подстроки через in, пока подстрок
+    меньше примерно 70 (benchmark.py matcher), поэтому он строится только начиная
+    с automaton подстрок. Результат запоминается для каждой строки: названий вакансий
+    намного меньше, чем строк в файле
+
+    Attributes:
+        patterns (list): Искомые подстроки
+        automaton (bool): Используется ли автомат
+    """
+    def __init__(self, patterns, automaton=AUTOMATON_PATTERNS):
+        """
+        Строит автомат по списку подстрок, если их не меньше automaton
+
+        Args:
+            patterns (list): Искомые подстроки
+            automaton (int): С какого количества подстрок строить автомат
+        """
+        self.patterns = list(patterns)
+        self.automaton = len(self.patterns) >= automaton
+        self.__cache = {}
+        self.__goto = [{}]
+        self.__fail = [0]
+        self.__output = [set()]
+        self.__always = {i for i, x in enumerate(self.patterns) if x == ''}
+        if not self.automaton:
+            return
+
+        for i, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self.__goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.__goto)
+                    self.__goto[state][char] = next_state
+                    self.__goto.append({})
+                    self.__fail.append(0)
+                    self.__output.append(set())
+                state = next_state
+            if pattern:
+                self.__output[state].add(i)
+
+        queue = deque(self.__goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.__goto[state].items():
+                queue.append(next_state)
+                fail = self.__fail[state]
+                while fail and char not in self.__goto[fail]:
+                    fail = self.__fail[fail]
+                self.__fail[next_state] = self.__goto[fail].get(char, 0)
+                self.__output[next_state] |= self.__output[self.__fail[next_state]]
+
+    def match(self, text):
+        """
+        Возвращает номера подстрок, которые встречаются в строке
+
+        Args:
+            text (str): Строка
+
+        Returns:
+            frozenset: Номера найденных подстрок
+        """
+        found = self.__cache.get(text)
+        if found is None:
+            if self.automaton:
+                found = self.__scan(text)
+            else:
+                found = {i for i, pattern in enumerate(self.patterns) if pattern in text}
+            found = self.__cache[text] = frozenset(found)
+        return found
+
+    def __scan(self, text):
+        """
+        Проходит строку автоматом
+
+        Args:
+            text (str): Строка
+
+        Returns:
+            set: Номера найденных подстрок
+        """
+        found = set(self.__always)
+        goto, fail, output = self.__goto, self.__fail, self.__output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
@@ -0,0 +1,255 @@
+import csv
+import mmap
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from main import COLUMNS, DataVacancy, InputConect, VacancyStatistics
+from separator import ShardWriters, shard_key
+from streams import CSV_SUFFIXES, read_blocks, rows_end
+
+def shard_statistics(file_name, job, rates=None):
+    """
+    Считает частичную статистику по одному файлу с вакансиями за год
+
+    Args:
+        file_name (str): Путь к csv файлу
+        job (str): Название выбранной профессии
+        rates (CurrencyRates): Таблица курсов валют по месяцам
+
+    Returns:
+        VacancyStatistics: Суммы и количества по файлу
+    """
+    return InputConect(rates=rates).read_statistics(file_name, job)
+
+def parallel_statistics(directory, job, workers=None, rates=None):
+    """
+    Считает статистику по csv файлам из папки в нескольких процессах
+
+    Каждый процесс возвращает точные суммы и количества, которые затем складываются,
+    поэтому результат совпадает с подсчётом по одному общему файлу
+
+    Args:
+        directory (str): Папка с файлами по годам (результат separator.separate)
+        job (str): Название выбранной профессии
+        workers (int): Количество процессов, по умолчанию - количество ядер
+        rates (CurrencyRates): Таблица курсов валют по месяцам
+
+    Returns:
+        job (str): название выбранной вакансии,
+        salary_rub (dict): словарь год - средняя зарплата в рублях,
+        salary_count (dict): словарь год - количество вакансий,
+        job_rub (dict): словарь год - зарплата выбранной вакансии,
+        job_count (dict): словарь год - количество выбранных вакансий ,
+        city_salary (dict): словарь город - зарплата,
+        city_frac (dict): словарь город - доля выбранных вакансий
+    """
+    files = sorted(os.path.join(directory, x) for x in os.listdir(directory) if x.endswith(CSV_SUFFIXES))
+
+    stats = VacancyStatistics(job, rates)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for part in executor.map(shard_statistics, files, [job] * len(files), [rates] * len(files)):
+            stats.merge(part)
+
+    return (job, *stats.result())
+
+def count_quotes(file_name, start, end):
+    """
+    Считает кавычки в диапазоне байт файла
+
+    Args:
+        file_name (str): Путь к файлу
+        start (int): Начало диапазона
+        end (int): Конец диапазона
+
+    Returns:
+        int: Количество кавычек
+    """
+    with open(file_name, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return data[start:end].count(b'"')
+
+def row_ranges(file_name, parts, executor=None):
+    """
+    Делит несжатый csv файл на диапазоны байт, состоящие из целых строк
+
+    Кавычки в частях файла считаются параллельно, после чего граница каждой части
+    сдвигается назад к концу последней целой строки (streams.rows_end)
+
+    Args:
+        file_name (str): Путь к csv файлу
+        parts (int): Желаемое количество диапазонов
+        executor (Executor): Пул для подсчёта кавычек, None - в текущем процессе
+
+    Returns:
+        tuple: Заголовок csv и список пар (начало, конец) диапазонов после заголовка
+    """
+    size = os.path.getsize(file_name)
+    if not size:
+        return [], []
+
+    with open(file_name, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        head_end = data.find(b'\n') + 1 or size
+        head = next(csv.reader([data[:head_end].decode('utf-8-sig')]), [])
+
+        step = max((size - head_end) // max(parts, 1), 1)
+        offsets = list(range(head_end, size, step)) + [size]
+        starts, ends = offsets[:-1], offsets[1:]
+        names = [file_name] * len(starts)
+        counts = list((executor.map if executor else map)(count_quotes, names, starts, ends))
+
+        bounds = [head_end]
+        for start, end, count in zip(starts, ends[:-1], counts):
+            quotes = data[bounds[-1]:start].count(b'"') + count
+            bound = rows_end(data, bounds[-1], end, quotes)
+            if bound > bounds[-1]:
+                bounds.append(bound)
+        bounds.append(size)
+
+    ranges = [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+    return head, ranges
+
+def parse_range(file_name, start, end, head, job=None, rates=None, directory=None, by='year', index=0,
+                block_size=1 << 22):
+    """
+    Разбирает диапазон строк файла и считает по нему статистику и/или пишет части файлов
+
+    Диапазон читается из отображения файла в память блоками по block_size байт
+    (streams.read_blocks), и строки сразу дописываются в части через ShardWriters,
+    поэтому память не зависит от размера диапазона
+
+    Args:
+        file_name (str): Путь к csv файлу
+        start (int): Начало диапазона (начало строки)
+        end (int): Конец диапазона (начало строки или конец файла)
+        head (list): Заголовок csv файла
+        job (str): Название профессии, None - не считать статистику
+        rates (CurrencyRates): Таблица курсов валют
+        directory (str): Папка для частей файлов по ключам, None - не писать
+        by (str): Ключ частей как в separator.shard_key
+        index (int): Номер диапазона, части пишутся в его подпапку
+        block_size (int): Размер читаемого блока в байтах
+
+    Returns:
+        tuple: Статистика по диапазону (или None) и список пар (ключ, путь к части)
+    """
+    columns = [head.index(x) for x in COLUMNS]
+    stats = VacancyStatistics(job, rates) if job is not None else None
+    key = shard_key(head, by) if directory is not None else None
+    writers = ShardWriters(os.path.join(directory, f'{index:06}'), None, encoding='utf-8') if key else None
+    names = {}
+
+    try:
+        for rows, _ in read_blocks(file_name, start, block_size, end):
+            for row in rows:
+                if not "" in row and len(row) == len(head):
+                    if stats is not None:
+                        stats.add(DataVacancy(*(row[i] for i in columns)))
+                    if writers is not None:
+                        name = key(row)
+                        names[name] = None
+                        writers.write(name, row)
+    finally:
+        if writers is not None:
+            writers.close()
+
+    return stats, [(name, writers.path(name)) for name in names]
+
+def parallel_scan(file_name, job=None, directory=None, by='year', workers=None, rates=None, parts=None):
+    """
+    Параллельно разбирает один большой csv файл по диапазонам байт
+
+    Каждый процесс разбирает свой диапазон целых строк и возвращает точные суммы,
+    которые складываются, и/или пишет части файлов по ключам, которые затем
+    склеиваются в порядке диапазонов - результат совпадает с separator.separate
+
+    Args:
+        file_name (str): Путь к несжатому csv файлу
+        job (str): Название профессии, None - не считать статистику
+        directory (str): Папка для файлов по ключам, None - не разделять файл
+        by (str): 'year' - по годам, 'month' - по месяцам, 'area' - по регионам
+        workers (int): Количество процессов, по умолчанию - количество ядер
+        rates (CurrencyRates): Таблица курсов валют
+        parts (int): Количество диапазонов, по умолчанию - 4 на процесс
+
+    Returns:
+        VacancyStatistics: Статистика по файлу, None - если job не задан
+    """
+    workers = workers or os.cpu_count()
+    stats = VacancyStatistics(job, rates) if job is not None else None
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        head, ranges = row_ranges(file_name, parts or workers * 4, executor)
+        if not ranges:
+            return stats
+
+        tmp = None
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            tmp = tempfile.mkdtemp(dir=directory, prefix='.parts')
+
+        try:
+            futures = [executor.submit(parse_range, file_name, start, end, head, job, rates, tmp, by, i)
+                       for i, (start, end) in enumerate(ranges)]
+            shards = {}
+            for future in futures:
+                part, written = future.result()
+                if stats is not None:
+                    stats.merge(part)
+                for name, path in written:
+                    shards.setdefault(name, []).append(path)
+
+            if directory is not None:
+                _concatenate(ShardWriters(directory, head), head, shards)
+        finally:
+            if tmp is not None:
+                shutil.rmtree(tmp, ignore_errors=True)
+
+    return stats
+
+def _concatenate(writers, head, shards):
+    """
+    Склеивает части каждого ключа в порядке диапазонов в файл с заголовком
+
+    Args:
+        writers (ShardWriters): Источник путей к файлам ключей
+        head (list): Заголовок csv
+        shards (dict): Словарь ключ - пути к частям в порядке диапазонов
+    """
+    for name, paths in shards.items():
+        path = writers.path(name)
+        with open(path, 'w', encoding='utf-8-sig', newline='') as file:
+            csv.writer(file).writerow(head)
+        with open(path, 'ab') as file:
+            for part in paths:
+                with open(part, 'rb') as data:
+                    shutil.copyfileobj(data, file)
+
+def parallel_file_statistics(file_name, job, workers=None, rates=None, directory=None, by='year'):
+    """
+    Считает статистику по одному большому csv файлу в нескольких процессах
+
+    Args:
+        file_name (str): Путь к несжатому csv файлу
+        job (str): Название выбранной профессии
+        workers (int): Количество процессов, по умолчанию - количество ядер
+        rates (CurrencyRates): Таблица курсов валют по месяцам
+        directory (str): Папка, куда в том же проходе разделить файл, None - не разделять
+        by (str): 'year' - по годам, 'month' - по месяцам, 'area' - по регионам
+
+    Returns:
+        tuple: То же, что возвращает InputConect.input_data
+    """
+    stats = parallel_scan(file_name, job, directory, by, workers, rates)
+    return (job, *stats.result())
+
+def parallel_separate(file_name, directory='years', by='year', workers=None):
+    """
+    Разделяет один большой csv файл на файлы по ключам в нескольких процессах
+
+    Args:
+        file_name (str): Путь к несжатому csv файлу
+        directory (str): Папка для файлов
+        by (str): 'year' - по годам, 'month' - по месяцам, 'area' - по регионам
+        workers (int): Количество процессов, по умолчанию - количество ядер
+    """
+    parallel_scan(file_name, None, directory, by, workers)
@@ -0,0 +1,207 @@
+import argparse
+import csv
+import math
+import os
+import random
+from itertools import islice
+from main import COLUMNS, DataVacancy, InputConect, VacancyStatistics
+from streams import detect
+
+def offset_sample(file_name, n, seed=0):
+    """
+    Выбирает строки несжатого csv файла по случайным смещениям в байтах
+
+    После каждого смещения дочитывается текущая строка, и берётся следующая за ней.
+    Вероятность выбора строки пропорциональна длине предыдущей строки, что при похожей
+    длине строк почти не отличается от равномерной выборки. Строки, не разобравшиеся
+    в нужное количество полей (например, попали внутрь поля с переводом строки),
+    считаются пустыми
+
+    Args:
+        file_name (str): Путь к csv файлу
+        n (int): Количество смещений
+        seed (int): Зерно генератора
+
+    Returns:
+        tuple: Список строк в порядке COLUMNS и оценка количества заполненных строк в файле
+    """
+    size = os.path.getsize(file_name)
+    rnd = random.Random(seed)
+    rows, lines, length = [], 0, 0
+
+    with open(file_name, 'rb') as file:
+        head = next(csv.reader([file.readline().decode('utf-8-sig')]), [])
+        columns = [head.index(x) for x in COLUMNS]
+        published = head.index('published_at')
+        start = file.tell()
+
+        for offset in sorted(rnd.randrange(start, size) for _ in range(n if size > start else 0)):
+            file.seek(offset)
+            file.readline()
+            line = file.readline()
+            if not line:
+                continue
+            lines += 1
+            length += len(line)
+            row = next(csv.reader([line.decode('utf-8', 'replace')]), [])
+            if len(row) == len(head) and "" not in row and row[published][:4].isdigit():
+                rows.append(tuple(row[i] for i in columns))
+
+    total = (size - start) * len(rows) / length if lines else 0
+    return rows, total
+
+def reservoir_sample(file_name, n, seed=0, prefix=None):
+    """
+    Выбирает n строк равномерно из первых prefix заполненных строк файла
+
+    Подходит для сжатых файлов, в которых нельзя перейти к произвольному смещению
+
+    Args:
+        file_name (str): Путь к csv файлу, возможно сжатому
+        n (int): Размер выборки
+        seed (int): Зерно генератора
+        prefix (int): Сколько заполненных строк просмотреть, None - весь файл
+
+    Returns:
+        tuple: Список строк в порядке COLUMNS и количество просмотренных строк
+    """
+    rnd = random.Random(seed)
+    sample = []
+    seen = 0
+    for row in islice(InputConect().read_rows(file_name), prefix):
+        if seen < n:
+            sample.append(row)
+        else:
+            i = rnd.randrange(seen + 1)
+            if i < n:
+                sample[i] = row
+        seen += 1
+    return sample, seen
+
+def preview(file_name, job, n=10000, seed=0, rates=None, method=None, prefix=None, z=1.96):
+    """
+    Приближённо считает статистику по выборке строк с доверительными интервалами
+
+    Средние зарплаты оцениваются средним выборки, количества - долей выборки,
+    умноженной на оценку числа строк в файле. Полуширина интервала - z стандартных ошибок
+    (z=1.96 - 95%). При reservoir с prefix количества относятся к просмотренной части файла
+
+    Args:
+        file_name (str): Путь к csv файлу
+        job (str): Название профессии
+        n (int): Размер выборки
+        seed (int): Зерно генератора
+        rates (CurrencyRates): Таблица курсов валют
+        method (str): 'offsets' или 'reservoir', None - offsets для несжатых файлов
+        prefix (int): Для reservoir - сколько строк просмотреть, None - весь файл
+        z (float): Квантиль нормального распределения для ширины интервала
+
+    Returns:
+        data (tuple): Статистика в виде, который возвращает InputConect.input_data,
+        errors (tuple): Полуширины интервалов - словари с теми же ключами, что data[1:]
+    """
+    if method is None:
+        method = 'offsets' if detect(file_name) is None else 'reservoir'
+    if method == 'offsets':
+        rows, total = offset_sample(file_name, n, seed)
+    else:
+        rows, total = reservoir_sample(file_name, n, seed, prefix)
+
+    stats = VacancyStatistics(job, rates)
+    moments = ({}, {}, {})
+    for row in rows:
+        vacancy = DataVacancy(*row)
+        salary = vacancy.convert_to_rub(rates)
+        year = int(vacancy.published_at[:4])
+        stats.add_salary(vacancy.name, salary, vacancy.area_name, year)
+        _moment(moments[0], year, salary)
+        if job in vacancy.name:
+            _moment(moments[1], year, salary)
+        _moment(moments[2], vacancy.area_name, salary)
+
+    salary_rub, salary_count, job_rub, job_count, city_salary, city_frac = stats.result()
+    size = len(rows)
+    scale = total / size if size else 0
+
+    data = (
+        job,
+        salary_rub,
+        {key: round(count * scale) for key, count in salary_count.items()},
+        job_rub,
+        {key: round(count * scale) for key, count in job_count.items()},
+        city_salary,
+        city_frac,
+    )
+    errors = (
+        {key: _mean_error(moments[0].get(key), z) for key in salary_rub},
+        {key: round(_share_error(count, size, z) * total) for key, count in salary_count.items()},
+        {key: _mean_error(moments[1].get(key), z) for key in job_rub},
+        {key: round(_share_error(count, size, z) * total) for key, count in job_count.items()},
+        {key: _mean_error(moments[2].get(key), z) for key in city_salary},
+        {key: round(_share_error(share * size, size, z), 4) for key, share in city_frac.items()},
+    )
+    return data, errors
+
+def _moment(moments, key, value):
+    """
+    Добавляет значение к количеству, сумме и сумме квадратов группы
+
+    Args:
+        moments (dict): Словарь ключ - [количество, сумма, сумма квадратов]
+        key (object): Ключ группы
+        value (float): Значение
+    """
+    group = moments.setdefault(key, [0, 0.0, 0.0])
+    group[0] += 1
+    group[1] += value
+    group[2] += value * value
+
+def _mean_error(group, z):
+    """
+    Возвращает полуширину доверительного интервала среднего
+
+    Args:
+        group (list): Количество, сумма и сумма квадратов, None - нет значений
+        z (float): Квантиль нормального распределения
+
+    Returns:
+        int: Полуширина интервала
+    """
+    if group is None or group[0] < 2:
+        return 0
+    count, total, squares = group
+    variance = max(squares - total * total / count, 0) / (count - 1)
+    return int(z * math.sqrt(variance / count))
+
+def _share_error(count, size, z):
+    """
+    Возвращает полуширину доверительного интервала доли
+
+    Args:
+        count (float): Количество строк группы в выборке
+        size (int): Размер выборки
+        z (float): Квантиль нормального распределения
+
+    Returns:
+        float: Полуширина интервала доли
+    """
+    if not size:
+        return 0
+    share = count / size
+    return z * math.sqrt(share * (1 - share) / size)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Быстрая приближённая статистика по выборке')
+    parser.add_argument('file', help='csv файл с вакансиями')
+    parser.add_argument('job', help='название профессии')
+    parser.add_argument('-n', type=int, default=10000, help='размер выборки')
+    parser.add_argument('--method', choices=['offsets', 'reservoir'])
+    parser.add_argument('--prefix', type=int, help='для reservoir - сколько строк просмотреть')
+    parser.add_argument('--image', default='preview.png', help='файл графиков')
+    args = parser.parse_args()
+
+    from main import Report
+    data, errors = preview(args.file, args.job, args.n, method=args.method, prefix=args.prefix)
+    for values, error in zip(data[1:], errors):
+        print({key: f'{value} ± {error[key]}' for key, value in values.items()})
+    Report().generate_image(data, args.image, errors=errors)
@@ -0,0 +1,273 @@
+import atexit
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def peak_rss():
+    """
+    Возвращает пиковую память процесса
+
+    Модуль resource есть только в Unix, в Windows память не замеряется
+
+    Returns:
+        int: Пиковая память в байтах, None - если замерить нельзя
+    """
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class Tracer:
+    """
+    Класс для записи замеров этапов
+
+    Формат 'jsonl' - по одной json строке на этап, 'chrome' - файл trace event,
+    который открывается в chrome://tracing или Perfetto
+
+    Attributes:
+        path (str): Путь к файлу замеров
+        fmt (str): 'jsonl' или 'chrome'
+        memory (bool): Замерять пиковую память через tracemalloc
+        events (list): Записанные этапы
+    """
+    def __init__(self, path, fmt='jsonl', memory=False):
+        """
+        Инициализирует объект Tracer
+
+        Args:
+            path (str): Путь к файлу замеров
+            fmt (str): 'jsonl' или 'chrome'
+            memory (bool): Замерять пиковую память через tracemalloc
+        """
+        self.path = path
+        self.fmt = fmt
+        self.memory = memory
+        self.events = []
+        self.__start = time.perf_counter()
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if fmt == 'jsonl':
+            open(path, 'w').close()
+
+    def peaks(self):
+        """
+        Возвращает пики памяти открытых замеров текущего потока, от внешнего к вложенному
+
+        Returns:
+            list: Пики tracemalloc в байтах
+        """
+        stack = getattr(self.__local, 'peaks', None)
+        if stack is None:
+            stack = self.__local.peaks = []
+        return stack
+
+    def record(self, name, start, seconds, rows=None, **args):
+        """
+        Записывает замер этапа
+
+        Args:
+            name (str): Название этапа
+            start (float): Время начала по time.perf_counter
+            seconds (float): Длительность в секундах
+            rows (int): Количество обработанных строк
+            args (dict): Дополнительные сведения
+        """
+        event = {
+            'name': name,
+            'start': round(start - self.__start, 6),
+            'seconds': round(seconds, 6),
+            'peak_rss': peak_rss(),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+        }
+        if event['peak_rss'] is None:
+            del event['peak_rss']
+        if rows is not None:
+            event['rows'] = rows
+            event['rows_per_sec'] = round(rows / seconds) if seconds else None
+        if self.memory and tracemalloc.is_tracing():
+            event['tracemalloc_peak'] = tracemalloc.get_traced_memory()[1]
+        event.update(args)
+
+        with self.__lock:
+            self.events.append(event)
+            if self.fmt == 'jsonl':
+                with open(self.path, 'a', encoding='utf-8') as file:
+                    file.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+    def span(self, name, rows=None, **args):
+        """
+        Возвращает контекстный менеджер, замеряющий вложенный в него код
+
+        Args:
+            name (str): Название этапа
+            rows (int): Количество строк, можно записать в поле rows внутри блока
+            args (dict): Дополнительные сведения
+
+        Returns:
+            Span: Замер этапа
+        """
+        return Span(self, name, rows, args)
+
+    def close(self):
+        """
+        Дописывает файл в формате chrome
+        """
+        if self.fmt != 'chrome':
+            return
+        events = []
+        for event in self.events:
+            info = {k: v for k, v in event.items() if k not in ('name', 'start', 'seconds', 'pid', 'tid')}
+            events.append({
+                'name': event['name'],
+                'ph': 'X',
+                'ts': round(event['start'] * 1e6),
+                'dur': round(event['seconds'] * 1e6),
+                'pid': event['pid'],
+                'tid': event['tid'],
+                'args': info,
+            })
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump({'traceEvents': events}, file, ensure_ascii=False)
+
+class Span:
+    """
+    Класс для замера одного этапа
+
+    Attributes:
+        rows (int): Количество обработанных строк
+    """
+    def __init__(self, tracer, name, rows, args):
+        """
+        Инициализирует объект Span
+
+        Args:
+            tracer (Tracer): Куда записать замер
+            name (str): Название этапа
+            rows (int): Количество обработанных строк
+            args (dict): Дополнительные сведения
+        """
+        self.tracer = tracer
+        self.name = name
+        self.rows = rows
+        self.args = args
+
+    def __enter__(self):
+        self.memory = self.tracer.memory and tracemalloc.is_tracing()
+        if self.memory:
+            stack = self.tracer.peaks()
+            if stack:
+                stack[-1] = max(stack[-1], tracemalloc.get_traced_memory()[1])
+            stack.append(0)
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        args = self.args
+        if self.memory:
+            # reset_peak сбрасывает пик для всех замеров, поэтому пик вложенного
+            # замера переносится во внешний через стек
+            stack = self.tracer.peaks()
+            peak = max(stack.pop(), tracemalloc.get_traced_memory()[1])
+            if stack:
+                stack[-1] = max(stack[-1], peak)
+            args = {**args, 'tracemalloc_peak': peak}
+        self.tracer.record(self.name, self.start, seconds, self.rows, **args)
+        return False
+
+class NullSpan:
+    """
+    Класс для пустого замера, когда замеры выключены
+    """
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+_null = NullSpan()
+_tracer = None
+
+def enable(path, fmt=None, memory=False):
+    """
+    Включает замеры
+
+    Args:
+        path (str): Путь к файлу замеров
+        fmt (str): 'jsonl' или 'chrome', по умолчанию - по расширению файла (.json - chrome)
+        memory (bool): Замерять пиковую память через tracemalloc
+
+    Returns:
+        Tracer: Объект замеров
+    """
+    global _tracer
+    disable()
+    _tracer = Tracer(path, fmt or ('chrome' if path.endswith('.json') else 'jsonl'), memory)
+    return _tracer
+
+def disable():
+    """
+    Выключает замеры и дописывает файл
+    """
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+        _tracer = None
+
+def enabled():
+    """
+    Returns:
+        bool: Включены ли замеры
+    """
+    return _tracer is not None
+
+def span(name, rows=None, **args):
+    """
+    Возвращает замер этапа или пустой замер, если замеры выключены
+
+    Args:
+        name (str): Название этапа
+        rows (int): Количество обработанных строк
+        args (dict): Дополнительные сведения
+
+    Returns:
+        Span or NullSpan: Контекстный менеджер замера
+    """
+    if _tracer is None:
+        return _null
+    return _tracer.span(name, rows, **args)
+
+def record(name, start, seconds, rows=None, **args):
+    """
+    Записывает замер этапа, посчитанный вручную, если замеры включены
+
+    Args:
+        name (str): Название этапа
+        start (float): Время начала по time.perf_counter
+        seconds (float): Длительность в секундах
+        rows (int): Количество обработанных строк
+        args (dict): Дополнительные сведения
+    """
+    if _tracer is not None:
+        _tracer.record(name, start, seconds, rows, **args)
+
+if os.environ.get('URFU_TRACE'):
+    enable(os.environ['URFU_TRACE'], memory=os.environ.get('URFU_TRACE_MEMORY') == '1')
+
+atexit.register(disable)
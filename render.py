@@ -0,0 +1,92 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from main import PDF_TEMPLATE, Report
+
+_template = None
+_converter = None
+
+def init_worker(template_dir=None, converter=None):
+    """
+    Компилирует шаблон pdf один раз на процесс
+
+    Args:
+        template_dir (str): Папка с pdf_template.html, None - папка main.PDF_TEMPLATE
+        converter (function): Функция (html, file_name), создающая pdf, None - pdfkit
+    """
+    global _template, _converter
+    from jinja2 import Environment, FileSystemLoader
+
+    loader = FileSystemLoader(template_dir or os.path.dirname(PDF_TEMPLATE))
+    _template = Environment(loader=loader).get_template(os.path.basename(PDF_TEMPLATE))
+    _converter = converter
+
+def render_stage(stage, data, directory):
+    """
+    Создаёт один файл отчёта в процессе-обработчике
+
+    Args:
+        stage (str): 'excel', 'image' или 'pdf'
+        data (tuple): Данные в виде, который возвращает InputConect.input_data
+        directory (str): Папка для файлов отчёта
+
+    Returns:
+        tuple: Путь к созданному файлу и время в секундах
+    """
+    start = time.perf_counter()
+    report = Report()
+    image = os.path.abspath(os.path.join(directory, 'graph.png'))
+
+    if stage == 'excel':
+        file_name = os.path.join(directory, 'report.xlsx')
+        report.generate_excel(data[:5], data[5:], file_name)
+    elif stage == 'image':
+        file_name = image
+        report.generate_image(data, file_name)
+    else:
+        file_name = os.path.join(directory, 'report.pdf')
+        report.generate_pdf(data, file_name, image, _converter, _template)
+
+    return file_name, time.perf_counter() - start
+
+def render_batch(jobs, workers=None, converter=None, template_dir=None, stages=('excel', 'image', 'pdf')):
+    """
+    Создаёт отчёты для нескольких наборов статистики в пуле процессов
+
+    Excel и графики всех отчётов строятся параллельно, а pdf отчёта ставится
+    в очередь сразу после того, как готов его график
+
+    Args:
+        jobs (list): Пары (данные как в InputConect.input_data, папка для файлов)
+        workers (int): Количество процессов, по умолчанию - количество ядер
+        converter (function): Функция (html, file_name) для создания pdf, должна сериализоваться pickle
+        template_dir (str): Папка с pdf_template.html, None - папка main.PDF_TEMPLATE
+        stages (tuple): Какие файлы создавать
+
+    Returns:
+        list: Для каждого отчёта словарь {'files': [...], 'timings': {этап: секунды}}
+    """
+    results = [{'files': [], 'timings': {}} for _ in jobs]
+    for _, directory in jobs:
+        os.makedirs(directory, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(template_dir, converter)) as executor:
+        pending = {}
+        for i, (data, directory) in enumerate(jobs):
+            for stage in stages:
+                if stage != 'pdf' or 'image' not in stages:
+                    pending[executor.submit(render_stage, stage, data, directory)] = (i, stage)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                i, stage = pending.pop(future)
+                file_name, seconds = future.result()
+                results[i]['files'].append(file_name)
+                results[i]['timings'][stage] = seconds
+
+                if stage == 'image' and 'pdf' in stages:
+                    data, directory = jobs[i]
+                    pending[executor.submit(render_stage, 'pdf', data, directory)] = (i, 'pdf')
+
+    return results
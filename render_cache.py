@@ -0,0 +1,176 @@
+import hashlib
+import os
+import shutil
+
+VERSION = 1
+
+def file_digest(file_name):
+    """
+    Хеширует содержимое файла
+
+    Args:
+        file_name (str): Путь к файлу
+
+    Returns:
+        str: Хеш содержимого, None - если файла нет
+    """
+    if not os.path.exists(file_name):
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_name, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class RenderCache:
+    """
+    Класс для дискового кеша готовых отчётов (графиков, файлов эксель и pdf)
+
+    Ключ записи - хеш типа отчёта, профессии и статистики, по которой он строится,
+    поэтому повторный запуск с теми же данными не рисует отчёт заново, а копирует
+    или жёстко связывает готовый файл. При превышении max_bytes удаляются давно
+    не использованные записи. При изменении кода отчётов нужно увеличить VERSION.
+    Файл, созданный жёсткой ссылкой, нельзя изменять на месте - изменится и запись кеша
+
+    Attributes:
+        directory (str): Папка кеша
+        max_bytes (int): Максимальный размер кеша в байтах
+        link (bool): Создавать жёсткие ссылки вместо копий, если это возможно
+        hits (int): Количество отчётов, взятых из кеша
+        misses (int): Количество нарисованных отчётов
+    """
+    def __init__(self, directory='.render_cache', max_bytes=256 << 20, link=True):
+        """
+        Инициализирует объект RenderCache
+
+        Args:
+            directory (str): Папка кеша
+            max_bytes (int): Максимальный размер кеша в байтах
+            link (bool): Создавать жёсткие ссылки вместо копий
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.link = link
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(kind, job, *inputs):
+        """
+        Возвращает ключ отчёта
+
+        Словари хешируются вместе с порядком ключей, потому что он влияет на отчёт
+
+        Args:
+            kind (str): Тип отчёта: 'image', 'excel' или 'pdf'
+            job (str): Название профессии
+            inputs (tuple): Статистика и параметры, из которых строится отчёт
+
+        Returns:
+            str: Ключ записи
+        """
+        text = repr((VERSION, kind, job, inputs))
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    def render(self, key, file_name, render):
+        """
+        Создаёт файл из кеша, а при отсутствии записи - вызывает render и сохраняет результат
+
+        Args:
+            key (str): Ключ из RenderCache.key
+            file_name (str): Путь к создаваемому файлу
+            render (function): Функция без аргументов, создающая file_name
+
+        Returns:
+            bool: True, если файл взят из кеша
+        """
+        entry = os.path.join(self.directory, key + os.path.splitext(file_name)[1])
+        if self.__fetch(entry, file_name):
+            self.hits += 1
+            return True
+
+        self.misses += 1
+        if os.path.exists(file_name) and os.stat(file_name).st_nlink > 1:
+            os.remove(file_name)
+        render()
+        self.__store(entry, file_name)
+        return False
+
+    def __fetch(self, entry, file_name):
+        """
+        Копирует запись в file_name и отмечает её как использованную
+
+        Файл сначала создаётся рядом с file_name и затем переименовывается,
+        чтобы при ошибке не остался недописанный отчёт
+
+        Args:
+            entry (str): Путь к записи
+            file_name (str): Путь к создаваемому файлу
+
+        Returns:
+            bool: True, если запись есть
+        """
+        try:
+            os.utime(entry)
+        except OSError:
+            return False
+
+        if os.path.exists(file_name) and os.path.samefile(entry, file_name):
+            return True
+
+        tmp = f'{file_name}.{os.getpid()}.tmp'
+        try:
+            if self.link:
+                try:
+                    os.link(entry, tmp)
+                except OSError:
+                    shutil.copyfile(entry, tmp)
+            else:
+                shutil.copyfile(entry, tmp)
+            os.replace(tmp, file_name)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return False
+        return True
+
+    def __store(self, entry, file_name):
+        """
+        Копирует созданный файл в кеш и удаляет лишние записи
+
+        Args:
+            entry (str): Путь к записи
+            file_name (str): Путь к созданному файлу
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f'{entry}.{os.getpid()}.tmp'
+        try:
+            shutil.copyfile(file_name, tmp)
+            os.replace(tmp, entry)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self.__evict(keep=entry)
+
+    def __evict(self, keep):
+        """
+        Удаляет давно не использованные записи, пока кеш больше max_bytes
+
+        Args:
+            keep (str): Запись, которую нельзя удалять
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            entry = os.path.join(self.directory, name)
+            if not name.endswith('.tmp'):
+                stat = os.stat(entry)
+                entries.append((stat.st_mtime, stat.st_size, entry))
+
+        total = sum(x[1] for x in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if entry != keep:
+                os.remove(entry)
+                total -= size
@@ -1,35 +1,176 @@
 import csv
 import os
+import re
+from collections import OrderedDict
+from main import COLUMNS
+from streams import SUFFIXES, open_text, open_writer
 
-def separate(file_str):
+class ShardWriters:
     """
-        Разделяет csv файл на csv файлы по годам 
+    Класс для потоковой записи строк в csv файлы по ключам
+
+    Держит открытыми не больше max_open файлов: давно не использованный файл
+    дописывается и закрывается, а при следующей строке с его ключом открывается на дозапись.
+    В памяти хранится не больше block_size строк на каждый открытый файл
+
+    Attributes:
+        directory (str): Папка для файлов
+        head (list): Заголовок csv файлов, None - писать файлы без заголовка
+        max_open (int): Максимальное количество открытых файлов
+        block_size (int): Количество строк, записываемых за один раз
+        compression (str): Сжатие файлов 'gzip', 'zstd' или 'bz2', None - без сжатия
+        encoding (str): Кодировка файлов
+    """
+    def __init__(self, directory, head, max_open=32, block_size=10000, compression=None, encoding='utf-8-sig'):
+        """
+        Инициализирует объект ShardWriters
+
+        Args:
+            directory (str): Папка для файлов
+            head (list): Заголовок csv файлов, None - писать файлы без заголовка
+            max_open (int): Максимальное количество открытых файлов
+            block_size (int): Количество строк, записываемых за один раз
+            compression (str): Сжатие файлов 'gzip', 'zstd' или 'bz2', None - без сжатия
+            encoding (str): Кодировка файлов
+        """
+        self.directory = directory
+        self.head = head
+        self.max_open = max_open
+        self.block_size = block_size
+        self.compression = compression
+        self.encoding = encoding
+        self.__opened = OrderedDict()
+        self.__created = set()
+
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, key, row):
+        """
+        Добавляет строку в файл ключа
 
         Args:
-            file_str (str): ссылка на файл
+            key (str): Ключ файла
+            row (list): Строка csv файла
+        """
+        shard = self.__opened.get(key)
+        if shard is None:
+            shard = self.__open(key)
+        else:
+            self.__opened.move_to_end(key)
+
+        shard[2].append(row)
+        if len(shard[2]) >= self.block_size:
+            self.__flush(shard)
+
+    def close(self):
+        """
+        Дописывает и закрывает все открытые файлы
+        """
+        while self.__opened:
+            self.__close(self.__opened.popitem(last=False)[1])
+
+    def path(self, key):
+        """
+        Возвращает путь к файлу ключа
+
+        Args:
+            key (str): Ключ файла
+
+        Returns:
+            str: Путь к csv файлу
+        """
+        suffix = '.csv' + SUFFIXES.get(self.compression, '')
+        return os.path.join(self.directory, re.sub(r'[\\/:*?"<>|]', '_', key) + suffix)
+
+    def __open(self, key):
+        """
+        Открывает файл ключа, при необходимости закрывая давно не использованный
+
+        Args:
+            key (str): Ключ файла
+
+        Returns:
+            list: Файл, объект csv.writer и буфер строк
+        """
+        if len(self.__opened) >= self.max_open:
+            self.__close(self.__opened.popitem(last=False)[1])
+
+        mode = 'a' if key in self.__created else 'w'
+        file = open_writer(self.path(key), mode, self.compression, self.encoding)
+        writer = csv.writer(file, delimiter=',', quoting=csv.QUOTE_MINIMAL)
+        if key not in self.__created:
+            if self.head is not None:
+                writer.writerow(self.head)
+            self.__created.add(key)
+
+        shard = self.__opened[key] = [file, writer, []]
+        return shard
+
+    def __flush(self, shard):
+        """
+        Записывает накопленные строки в файл
+
+        Args:
+            shard (list): Файл, объект csv.writer и буфер строк
+        """
+        shard[1].writerows(shard[2])
+        shard[2].clear()
+
+    def __close(self, shard):
+        """
+        Дописывает накопленные строки и закрывает файл
+
+        Args:
+            shard (list): Файл, объект csv.writer и буфер строк
+        """
+        self.__flush(shard)
+        shard[0].close()
+
+def shard_key(head, by='year'):
+    """
+    Возвращает функцию, вычисляющую ключ файла для строки
+
+    Args:
+        head (list): Заголовок csv файла
+        by (str): 'year' - по годам, 'month' - по месяцам, 'area' - по регионам
+
+    Returns:
+        function: Функция строка - ключ
     """
-    with open(file_str, encoding='utf-8-sig') as file:
+    if by == 'area':
+        area = head.index('area_name')
+        return lambda row: row[area]
+
+    published = head.index('published_at')
+    length = {'year': 4, 'month': 7}[by]
+    return lambda row: row[published][:length]
+
+def separate(file_str, directory='years', by='year', max_open=32, block_size=10000, compression=None, dedup=None):
+    """
+        Разделяет csv файл на csv файлы по годам, месяцам или регионам
+
+        Файл читается построчно, поэтому память не зависит от его размера
+
+        Args:
+            file_str (str): ссылка на файл, возможно сжатый gzip, zstd или bz2
+            directory (str): папка для файлов, создаётся при необходимости
+            by (str): 'year' - по годам, 'month' - по месяцам, 'area' - по регионам
+            max_open (int): максимальное количество одновременно открытых файлов
+            block_size (int): количество строк, записываемых в файл за один раз
+            compression (str): сжатие файлов 'gzip', 'zstd' или 'bz2', None - без сжатия
+            dedup (Deduplicator): пропускать повторяющиеся вакансии, None - записывать все строки
+    """
+    with open_text(file_str) as file:
         reader = csv.reader(file)
-        head = []
-        is_first = True
-        years = {}
-        for row in reader:
-                if is_first:  
-                    is_first = False
-                    head = row
-                else:
-                    if not "" in row and len(row) == len(head):
-                        year = row[5][:4]
-                        if year in years.keys():
-                            years[year].append(row)
-                        else:
-                            years[year] = [row]
-
-    os.mkdir('years')
-
-    for year in years.keys():
-        with open(f'years//{year}.csv', 'w', encoding='utf-8-sig', newline='') as csvfile:
-            filewriter = csv.writer(csvfile, delimiter=',', quoting=csv.QUOTE_MINIMAL)
-            filewriter.writerow(head)
-            for item in years[year]:
-                filewriter.writerow(item)
\ No newline at end of file
+        head = next(reader, [])
+        key = shard_key(head, by)
+
+        writers = ShardWriters(directory, head, max_open, block_size, compression)
+        columns = [head.index(x) for x in COLUMNS] if dedup is not None else None
+        try:
+            for row in reader:
+                if not "" in row and len(row) == len(head):
+                    if dedup is None or dedup.add(tuple(row[i] for i in columns)):
+                        writers.write(key(row), row)
+        finally:
+            writers.close()
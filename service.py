@@ -0,0 +1,254 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn
+try:
+    from socketserver import UnixStreamServer
+except ImportError:
+    UnixStreamServer = None
+from urllib.parse import parse_qs, urlparse
+import profiling
+from columnar import columns_statistics, load_columns
+
+FIELDS = ('job', 'salary_rub', 'salary_count', 'job_rub', 'job_count', 'city_salary', 'city_frac')
+
+class VacancyService:
+    """
+    Класс для ответов на запросы статистики по загруженному один раз файлу
+
+    Столбцы и зарплаты в рублях хранятся в памяти, результаты запросов - в LRU кеше.
+    Если исходный файл изменился, он перечитывается при следующем запросе
+
+    Attributes:
+        file_name (str): Путь к csv файлу
+        rates (CurrencyRates): Таблица курсов валют
+        cache (ColumnCache): Кеш разобранных файлов, None - разбирать csv
+        cache_size (int): Количество запросов в кеше результатов
+        check_interval (float): Как часто проверять изменение файла, в секундах
+        hits (int): Количество ответов из кеша результатов
+        misses (int): Количество посчитанных ответов
+        reloads (int): Количество загрузок файла
+    """
+    def __init__(self, file_name, rates=None, cache=None, cache_size=256, check_interval=1.0):
+        """
+        Инициализирует объект VacancyService и загружает файл
+
+        Args:
+            file_name (str): Путь к csv файлу
+            rates (CurrencyRates): Таблица курсов валют, None - курсы currency_to_rub
+            cache (ColumnCache): Кеш разобранных файлов
+            cache_size (int): Количество запросов в кеше результатов
+            check_interval (float): Как часто проверять изменение файла, в секундах
+        """
+        self.file_name = file_name
+        self.rates = rates
+        self.cache = cache
+        self.cache_size = cache_size
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.__lock = threading.Lock()
+        self.__reload_lock = threading.RLock()
+        self.__results = OrderedDict()
+        self.__checked = 0
+        self.__version = None
+        self.reload()
+
+    def reload(self):
+        """
+        Загружает файл в столбцы и очищает кеш результатов
+
+        Одновременно файл загружает только один поток
+        """
+        with self.__reload_lock:
+            stat = os.stat(self.file_name)
+            with profiling.span('VacancyService.reload') as span:
+                columns = self.cache.load(self.file_name) if self.cache is not None else load_columns(self.file_name)
+                salary = columns.salary_rub(self.rates)
+                span.rows = len(columns)
+
+            with self.__lock:
+                self.__data = columns, salary
+                self.__version = (stat.st_mtime_ns, stat.st_size)
+                self.__results.clear()
+                self.__checked = time.monotonic()
+                self.reloads += 1
+
+    def check(self):
+        """
+        Перечитывает файл, если он изменился с прошлой загрузки
+
+        Файл проверяется не чаще раза в check_interval секунд. Если изменение заметили
+        несколько потоков сразу, файл перечитывает первый, а остальные после ожидания
+        видят уже новую версию
+
+        Returns:
+            bool: Был ли файл перечитан
+        """
+        now = time.monotonic()
+        with self.__lock:
+            if now - self.__checked < self.check_interval:
+                return False
+            self.__checked = now
+            version = self.__version
+
+        stat = os.stat(self.file_name)
+        if (stat.st_mtime_ns, stat.st_size) == version:
+            return False
+
+        with self.__reload_lock:
+            stat = os.stat(self.file_name)
+            with self.__lock:
+                if (stat.st_mtime_ns, stat.st_size) == self.__version:
+                    return False
+            self.reload()
+        return True
+
+    def query(self, job, city=None, start=None, end=None):
+        """
+        Считает статистику по профессии среди вакансий выбранного региона и лет
+
+        Args:
+            job (str): Название профессии
+            city (str): Регион, None - все регионы
+            start (int): Первый год, None - без ограничения
+            end (int): Последний год включительно, None - без ограничения
+
+        Returns:
+            tuple: То же, что возвращает InputConect.input_data
+        """
+        self.check()
+        key = (job, city, start, end)
+        with self.__lock:
+            if key in self.__results:
+                self.__results.move_to_end(key)
+                self.hits += 1
+                return self.__results[key]
+            columns, salary = self.__data
+
+        with profiling.span('VacancyService.query', rows=len(columns)):
+            if city is None and start is None and end is None:
+                stats = columns_statistics(columns, job, self.rates, salary)
+            else:
+                mask = columns.mask(city, start, end)
+                stats = columns_statistics(columns.select(mask), job, self.rates, salary[mask])
+            result = (job, *stats.result())
+
+        with self.__lock:
+            if self.__data[0] is columns:
+                self.__results[key] = result
+                while len(self.__results) > self.cache_size:
+                    self.__results.popitem(last=False)
+            self.misses += 1
+        return result
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик запросов GET /statistics?job=...&city=...&from=...&to=... и GET /health
+    """
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        service = self.server.service
+
+        if url.path == '/health':
+            self.__send(200, {'hits': service.hits, 'misses': service.misses, 'reloads': service.reloads})
+        elif url.path != '/statistics':
+            self.__send(404, {'error': 'not found'})
+        elif not params.get('job'):
+            self.__send(400, {'error': 'job is required'})
+        else:
+            try:
+                start = int(params['from']) if 'from' in params else None
+                end = int(params['to']) if 'to' in params else None
+            except ValueError:
+                self.__send(400, {'error': 'from and to must be years'})
+                return
+            try:
+                result = service.query(params['job'], params.get('city'), start, end)
+            except Exception as error:
+                self.__send(500, {'error': f'{type(error).__name__}: {error}'})
+                return
+            self.__send(200, dict(zip(FIELDS, result)))
+
+    def __send(self, status, body):
+        """
+        Отправляет ответ в формате json
+
+        Args:
+            status (int): Код ответа
+            body (dict): Тело ответа
+        """
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        pass
+
+if UnixStreamServer is not None:
+    class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+        """
+        Http сервер на unix сокете, есть только на платформах с AF_UNIX
+        """
+        daemon_threads = True
+
+        def get_request(self):
+            request, _ = super().get_request()
+            return request, ('unix', 0)
+
+def serve(service, host='127.0.0.1', port=8000, unix_socket=None):
+    """
+    Создаёт сервер запросов статистики
+
+    Args:
+        service (VacancyService): Загруженные данные
+        host (str): Адрес
+        port (int): Порт, 0 - любой свободный
+        unix_socket (str): Путь к unix сокету вместо host и port
+
+    Returns:
+        server: Сервер, запускается методом serve_forever
+    """
+    if unix_socket is not None:
+        if UnixStreamServer is None:
+            raise ValueError('Unix сокеты не поддерживаются на этой платформе')
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = UnixHTTPServer(unix_socket, QueryHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), QueryHandler)
+    server.service = service
+    return server
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Сервис статистики вакансий')
+    parser.add_argument('file', help='csv файл с вакансиями')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--socket', help='путь к unix сокету вместо host и port')
+    parser.add_argument('--rates', default='currencies_df.csv', help='таблица курсов валют (currency.py)')
+    parser.add_argument('--no-cache', action='store_true', help='не использовать кеш разобранных файлов')
+    args = parser.parse_args()
+
+    from main import CurrencyRates
+    rates = CurrencyRates(args.rates) if os.path.exists(args.rates) else None
+    cache = None
+    if not args.no_cache:
+        from cache import ColumnCache
+        cache = ColumnCache()
+
+    server = serve(VacancyService(args.file, rates, cache), args.host, args.port, args.socket)
+    print(f'Сервис запущен: {args.socket or f"http://{args.host}:{server.server_address[1]}"}')
+    server.serve_forever()
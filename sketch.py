@@ -0,0 +1,339 @@
+import math
+import random
+
+class KLLSketch:
+    """
+    Класс для потоковой оценки квантилей за ограниченную память (скетч KLL)
+
+    Значения хранятся в уровнях-компакторах: на уровне h каждое значение представляет
+    2 ** h исходных. Переполненный уровень сортируется, и случайная половина значений
+    переходит на следующий уровень. Память - O(k) значений независимо от их количества
+
+    Ошибка оценки ранга при k=200 не больше примерно 1.7% от count с вероятностью 99%
+    (оценка Apache DataSketches для KLL). Она убывает как 1/k и не растёт при merge,
+    поэтому скетчи частей файла можно объединять в любом порядке
+
+    Attributes:
+        k (int): Размер верхнего компактора, задаёт точность
+        count (int): Количество учтённых значений
+        compactors (list): Списки значений по уровням
+    """
+    c = 2 / 3
+
+    def __init__(self, k=200, seed=0):
+        """
+        Инициализирует пустой объект KLLSketch
+
+        Args:
+            k (int): Размер верхнего компактора, задаёт точность
+            seed (int): Зерно генератора для выбора половины при сжатии
+        """
+        self.k = k
+        self.count = 0
+        self.compactors = [[]]
+        self.__size = 0
+        self.__max_size = self.__capacity(0)
+        self.__random = random.Random(seed)
+
+    def __capacity(self, h):
+        """
+        Возвращает вместимость уровня h
+
+        Args:
+            h (int): Номер уровня
+
+        Returns:
+            int: Количество значений, после которого уровень сжимается
+        """
+        depth = len(self.compactors) - h - 1
+        return int(math.ceil(self.k * self.c ** depth)) + 1
+
+    def add(self, value):
+        """
+        Учитывает значение
+
+        Args:
+            value (float): Значение
+        """
+        self.compactors[0].append(value)
+        self.count += 1
+        self.__size += 1
+        if self.__size >= self.__max_size:
+            self.__compress()
+
+    def update(self, values):
+        """
+        Учитывает список значений
+
+        Args:
+            values (list): Значения
+        """
+        for i in range(0, len(values), self.k):
+            part = values[i:i + self.k]
+            self.compactors[0].extend(part)
+            self.count += len(part)
+            self.__size += len(part)
+            if self.__size >= self.__max_size:
+                self.__compress()
+
+    def merge(self, other):
+        """
+        Добавляет к скетчу значения другого скетча
+
+        Args:
+            other (KLLSketch): Скетч
+
+        Returns:
+            KLLSketch: Текущий объект
+
+        Raises:
+            ValueError: У скетчей разные k
+        """
+        if other.k != self.k:
+            raise ValueError(f'Нельзя объединить скетчи с k = {self.k} и k = {other.k}')
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for mine, theirs in zip(self.compactors, other.compactors):
+            mine.extend(theirs)
+        self.count += other.count
+        self.__size = sum(map(len, self.compactors))
+        self.__max_size = sum(self.__capacity(h) for h in range(len(self.compactors)))
+        if self.__size >= self.__max_size:
+            self.__compress()
+        return self
+
+    def __compress(self):
+        """
+        Сжимает переполненные уровни, пока скетч не уложится в свою вместимость
+        """
+        h = 0
+        while h < len(self.compactors):
+            if len(self.compactors[h]) >= self.__capacity(h):
+                if h + 1 == len(self.compactors):
+                    self.compactors.append([])
+                    self.__max_size = sum(self.__capacity(x) for x in range(len(self.compactors)))
+                items = sorted(self.compactors[h])
+                rest = [items.pop()] if len(items) % 2 else []
+                self.compactors[h + 1].extend(items[self.__random.random() < 0.5::2])
+                self.compactors[h] = rest
+                self.__size = sum(map(len, self.compactors))
+                if self.__size < self.__max_size:
+                    break
+            h += 1
+
+    def quantile(self, q):
+        """
+        Оценивает квантиль
+
+        Args:
+            q (float): Доля от 0 до 1, 0.5 - медиана
+
+        Returns:
+            float: Значение квантиля, None - если значений нет
+        """
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs):
+        """
+        Оценивает несколько квантилей за одну сортировку
+
+        Args:
+            qs (list): Доли от 0 до 1
+
+        Returns:
+            list: Значения квантилей, None - если значений нет
+        """
+        items = sorted((value, 1 << h) for h, compactor in enumerate(self.compactors) for value in compactor)
+        if not items:
+            return [None for _ in qs]
+
+        total = sum(weight for _, weight in items)
+        result = []
+        for q in qs:
+            rank = q * total
+            seen = 0
+            for value, weight in items:
+                seen += weight
+                if seen >= rank:
+                    break
+            result.append(value)
+        return result
+
+class Histogram:
+    """
+    Класс для гистограммы зарплат с корзинами одинаковой ширины
+
+    Количества точные, поэтому гистограммы складываются без потерь. Квантиль по
+    гистограмме ошибается не больше чем на ширину корзины, кроме последней корзины,
+    куда попадают все значения больше width * (bins - 1)
+
+    Attributes:
+        width (float): Ширина корзины
+        counts (list): Количества значений по корзинам
+    """
+    def __init__(self, width=10000, bins=100):
+        """
+        Инициализирует пустой объект Histogram
+
+        Args:
+            width (float): Ширина корзины
+            bins (int): Количество корзин
+        """
+        self.width = width
+        self.counts = [0] * bins
+
+    def add(self, value):
+        """
+        Учитывает значение
+
+        Args:
+            value (float): Значение
+        """
+        self.counts[min(max(int(value // self.width), 0), len(self.counts) - 1)] += 1
+
+    def update(self, values):
+        """
+        Учитывает список значений
+
+        Args:
+            values (list): Значения
+        """
+        last = len(self.counts) - 1
+        for value in values:
+            self.counts[min(max(int(value // self.width), 0), last)] += 1
+
+    def merge(self, other):
+        """
+        Добавляет к гистограмме количества другой гистограммы с теми же корзинами
+
+        Args:
+            other (Histogram): Гистограмма
+
+        Returns:
+            Histogram: Текущий объект
+
+        Raises:
+            ValueError: У гистограмм разные корзины
+        """
+        if (other.width, len(other.counts)) != (self.width, len(self.counts)):
+            raise ValueError(f'Нельзя объединить гистограммы с корзинами {self.width} x {len(self.counts)} '
+                             f'и {other.width} x {len(other.counts)}')
+        self.counts = [x + y for x, y in zip(self.counts, other.counts)]
+        return self
+
+    def edges(self):
+        """
+        Returns:
+            list: Левые границы корзин
+        """
+        return [i * self.width for i in range(len(self.counts))]
+
+class SalaryDistributions:
+    """
+    Класс для распределений зарплат по годам и городам
+
+    Для каждого года и города хранит скетч KLL и гистограмму, которые
+    обновляются в том же проходе, что и суммы VacancyStatistics
+
+    Attributes:
+        k (int): Точность скетчей
+        width (float): Ширина корзины гистограмм
+        bins (int): Количество корзин гистограмм
+        years (dict): Словарь год - (KLLSketch, Histogram)
+        cities (dict): Словарь город - (KLLSketch, Histogram)
+    """
+    def __init__(self, k=200, width=10000, bins=100):
+        """
+        Инициализирует пустой объект SalaryDistributions
+
+        Args:
+            k (int): Точность скетчей
+            width (float): Ширина корзины гистограмм
+            bins (int): Количество корзин гистограмм
+        """
+        self.k = k
+        self.width = width
+        self.bins = bins
+        self.years = {}
+        self.cities = {}
+
+    def __group(self, groups, key):
+        """
+        Возвращает скетч и гистограмму группы, создавая их при необходимости
+
+        Args:
+            groups (dict): years или cities
+            key (object): Год или город
+
+        Returns:
+            tuple: KLLSketch и Histogram
+        """
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = (KLLSketch(self.k), Histogram(self.width, self.bins))
+        return group
+
+    def add(self, year, city, salary):
+        """
+        Учитывает зарплату вакансии
+
+        Args:
+            year (int): Год публикации
+            city (str): Регион
+            salary (float): Зарплата в рублях
+        """
+        for groups, key in ((self.years, year), (self.cities, city)):
+            sketch, histogram = self.__group(groups, key)
+            sketch.add(salary)
+            histogram.add(salary)
+
+    def update(self, by, key, salaries):
+        """
+        Учитывает сразу все зарплаты одного года или города
+
+        Args:
+            by (str): 'year' или 'city'
+            key (object): Год или город
+            salaries (list): Зарплаты в рублях
+        """
+        sketch, histogram = self.__group(self.years if by == 'year' else self.cities, key)
+        sketch.update(salaries)
+        histogram.update(salaries)
+
+    def merge(self, other):
+        """
+        Добавляет к распределениям распределения другого объекта с теми же параметрами
+
+        Args:
+            other (SalaryDistributions): Распределения
+
+        Returns:
+            SalaryDistributions: Текущий объект
+
+        Raises:
+            ValueError: У распределений разные k, width или bins
+        """
+        if (other.k, other.width, other.bins) != (self.k, self.width, self.bins):
+            raise ValueError(f'Нельзя объединить распределения с параметрами {(self.k, self.width, self.bins)} '
+                             f'и {(other.k, other.width, other.bins)}')
+        for mine, theirs in ((self.years, other.years), (self.cities, other.cities)):
+            for key, (sketch, histogram) in theirs.items():
+                group = self.__group(mine, key)
+                group[0].merge(sketch)
+                group[1].merge(histogram)
+        return self
+
+    def quantiles(self, qs=(0.5, 0.9)):
+        """
+        Возвращает квантили зарплат по годам и городам
+
+        Args:
+            qs (tuple): Доли от 0 до 1
+
+        Returns:
+            year_quantiles (dict): Словарь год - список квантилей, упорядоченный по годам,
+            city_quantiles (dict): Словарь город - список квантилей
+        """
+        year_quantiles = {year: [int(x) for x in self.years[year][0].quantiles(qs)] for year in sorted(self.years)}
+        city_quantiles = {city: [int(x) for x in sketch.quantiles(qs)] for city, (sketch, _) in self.cities.items()}
+        return year_quantiles, city_quantiles
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+from main import COLUMNS, DataVacancy, VacancyStatistics
+from matcher import ProfessionMatcher
+from streams import read_blocks
+
+def prefix_digest(file_name, offset, check_bytes=1 << 16):
+    """
+    Хеширует начало и конец первых offset байт файла
+
+    Хватает, чтобы заметить подмену или перезапись файла, не читая его целиком
+
+    Args:
+        file_name (str): Путь к файлу
+        offset (int): Длина учтённой части файла
+        check_bytes (int): Сколько байт хешировать в начале и в конце части
+
+    Returns:
+        str: Хеш
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_name, 'rb') as file:
+        digest.update(file.read(min(offset, check_bytes)))
+        file.seek(max(offset - check_bytes, 0))
+        digest.update(file.read(offset - file.tell()))
+    return digest.hexdigest()
+
+class AggregateStore:
+    """
+    Класс для сохраняемой на диск статистики, которая дополняется новыми строками
+
+    Хранит точные суммы и количества по ключу (год, регион, профессия), где профессия -
+    номер в jobs или -1 для всех вакансий, и для каждого файла - сколько байт и строк уже учтено
+    и хеш учтённой части. Файл можно только дописывать: если он стал короче или учтённая
+    часть изменилась, вычесть старые строки из сумм нельзя, и update вызывает ValueError
+
+    Attributes:
+        path (str): Путь к json файлу со статистикой
+        jobs (list): Названия профессий
+        files (dict): Словарь путь к файлу - {'offset', 'rows', 'head', 'digest'}
+        cells (dict): Словарь (год, регион, профессия) - [сумма, количество]
+    """
+    def __init__(self, path='aggregates.json', jobs=(), rates=None):
+        """
+        Загружает статистику из файла или создаёт пустую
+
+        Args:
+            path (str): Путь к json файлу со статистикой
+            jobs (list): Названия профессий
+            rates (CurrencyRates): Таблица курсов валют по месяцам
+        """
+        self.path = path
+        self.jobs = list(jobs)
+        self.rates = rates
+        self.files = {}
+        self.cells = {}
+
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                state = json.load(file)
+            if state['jobs'] != self.jobs:
+                raise ValueError(f'В {path} сохранена статистика по профессиям {state["jobs"]}')
+            self.files = state['files']
+            self.cells = {(year, city, job): [value, count] for year, city, job, value, count in state['cells']}
+
+        self.__matcher = ProfessionMatcher(self.jobs)
+
+    def update(self, file_name):
+        """
+        Учитывает строки файла, добавленные после прошлого обновления, и сохраняет статистику
+
+        Args:
+            file_name (str): Путь к csv файлу
+
+        Returns:
+            int: Количество новых вакансий
+
+        Raises:
+            ValueError: Файл изменился после прошлого обновления
+        """
+        info = self.files.setdefault(os.path.abspath(file_name), {'offset': 0, 'rows': 0, 'head': None, 'digest': None})
+        if info['offset']:
+            if os.path.getsize(file_name) < info['offset'] or \
+                    info.get('digest') not in (None, prefix_digest(file_name, info['offset'])):
+                raise ValueError(f'Файл {file_name} изменился после прошлого обновления, статистику нужно пересчитать')
+        start = info['offset']
+        added = 0
+
+        for rows, offset in read_blocks(file_name, info['offset']):
+            if info['head'] is None:
+                info['head'] = rows.pop(0)
+            head = info['head']
+            columns = [head.index(x) for x in COLUMNS]
+
+            for row in rows:
+                info['rows'] += 1
+                if not "" in row and len(row) == len(head):
+                    self.__add(DataVacancy(*(row[i] for i in columns)))
+                    added += 1
+            info['offset'] = offset
+
+        if info['offset'] != start:
+            info['digest'] = prefix_digest(file_name, info['offset'])
+        self.save()
+        return added
+
+    def __add(self, vacancy):
+        """
+        Учитывает вакансию в суммах
+
+        Args:
+            vacancy (DataVacancy): Вакансия
+        """
+        salary = vacancy.convert_to_rub(self.rates)
+        year = int(vacancy.published_at[:4])
+        for job in [-1, *self.__matcher.match(vacancy.name)]:
+            cell = self.cells.setdefault((year, vacancy.area_name, job), [0, 0])
+            cell[0] += salary
+            cell[1] += 1
+
+    def save(self):
+        """
+        Сохраняет статистику в json файл
+        """
+        state = {
+            'jobs': self.jobs,
+            'files': self.files,
+            'cells': [[*key, *value] for key, value in self.cells.items()],
+        }
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as file:
+            json.dump(state, file, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def statistics(self, job):
+        """
+        Собирает статистику по профессии из сохранённых сумм
+
+        Args:
+            job (str): Название профессии из jobs
+
+        Returns:
+            VacancyStatistics: Статистика по профессии
+        """
+        index = self.jobs.index(job)
+        stats = VacancyStatistics(job, self.rates)
+        for (year, city, j), (value, count) in self.cells.items():
+            if j == -1:
+                stats.total += count
+                stats.year_sum[year] = stats.year_sum.get(year, 0) + value
+                stats.year_count[year] = stats.year_count.get(year, 0) + count
+                stats.city_sum[city] = stats.city_sum.get(city, 0) + value
+                stats.city_count[city] = stats.city_count.get(city, 0) + count
+            elif j == index:
+                stats.job_sum[year] = stats.job_sum.get(year, 0) + value
+                stats.job_count[year] = stats.job_count.get(year, 0) + count
+        return stats
+
+    def result(self, job):
+        """
+        Возвращает статистику по профессии в том же виде, что InputConect.input_data
+
+        Args:
+            job (str): Название профессии из jobs
+
+        Returns:
+            tuple: job, salary_rub, salary_count, job_rub, job_count, city_salary, city_frac
+        """
+        return (job, *self.statistics(job).result())
@@ -0,0 +1,292 @@
+import bz2
+import csv
+import gzip
+import io
+import mmap
+import queue
+import threading
+
+MAGIC = ((b'\x1f\x8b', 'gzip'), (b'\x28\xb5\x2f\xfd', 'zstd'), (b'BZh', 'bz2'))
+
+SUFFIXES = {'gzip': '.gz', 'zstd': '.zst', 'bz2': '.bz2'}
+
+CSV_SUFFIXES = ('.csv', *(f'.csv{x}' for x in SUFFIXES.values()))
+
+def detect(file_name):
+    """
+    Определяет сжатие файла по первым байтам
+
+    Args:
+        file_name (str): Путь к файлу
+
+    Returns:
+        str: 'gzip', 'zstd', 'bz2' или None для несжатого файла
+    """
+    with open(file_name, 'rb') as file:
+        head = file.read(4)
+    for magic, compression in MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+def open_compressed(file_name, compression, mode='rb'):
+    """
+    Открывает сжатый файл как поток байт
+
+    Для zstd нужен пакет zstandard, он импортируется только здесь
+
+    Args:
+        file_name (str): Путь к файлу
+        compression (str): 'gzip', 'zstd' или 'bz2'
+        mode (str): 'rb', 'wb' или 'ab'
+
+    Returns:
+        file: Поток несжатых байт
+    """
+    if compression == 'gzip':
+        return gzip.open(file_name, mode, compresslevel=6)
+    if compression == 'bz2':
+        return bz2.open(file_name, mode)
+    if compression == 'zstd':
+        import zstandard
+        if 'r' in mode:
+            return zstandard.ZstdDecompressor().stream_reader(open(file_name, 'rb'), read_across_frames=True, closefd=True)
+        return zstandard.ZstdCompressor().stream_writer(open(file_name, mode), closefd=True)
+    raise ValueError(f'Неизвестное сжатие: {compression}')
+
+class PrefetchReader(io.RawIOBase):
+    """
+    Класс для чтения потока в фоновом потоке через ограниченную очередь
+
+    Пока парсер разбирает один блок, фоновый поток уже распаковывает следующие.
+    gzip, bz2 и zstandard отпускают GIL во время распаковки, поэтому она идёт
+    параллельно с разбором csv. Памяти нужно не больше queue_size блоков
+    """
+    def __init__(self, stream, chunk_size=1 << 20, queue_size=8):
+        """
+        Инициализирует объект PrefetchReader и запускает фоновый поток
+
+        Args:
+            stream (file): Поток байт
+            chunk_size (int): Размер блока в байтах
+            queue_size (int): Максимальное количество блоков в очереди
+        """
+        super().__init__()
+        self.__stream = stream
+        self.__chunk_size = chunk_size
+        self.__queue = queue.Queue(queue_size)
+        self.__stop = threading.Event()
+        self.__buffer = memoryview(b'')
+        self.__done = False
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def __run(self):
+        """
+        Читает блоки из потока в очередь до конца потока или ошибки
+        """
+        try:
+            while not self.__stop.is_set():
+                data = self.__stream.read(self.__chunk_size)
+                self.__put(data)
+                if not data:
+                    return
+        except BaseException as error:
+            self.__put(error)
+
+    def __put(self, item):
+        """
+        Кладёт блок в очередь, дожидаясь места, пока чтение не остановлено
+
+        Args:
+            item (bytes or BaseException): Блок или ошибка чтения
+        """
+        while not self.__stop.is_set():
+            try:
+                self.__queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not len(self.__buffer):
+            if self.__done:
+                return 0
+            item = self.__queue.get()
+            if isinstance(item, BaseException):
+                self.__done = True
+                raise item
+            if not item:
+                self.__done = True
+                return 0
+            self.__buffer = memoryview(item)
+
+        n = min(len(b), len(self.__buffer))
+        b[:n] = self.__buffer[:n]
+        self.__buffer = self.__buffer[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self.__stop.set()
+            self.__thread.join()
+            self.__stream.close()
+        super().close()
+
+def open_text(file_name, encoding='utf-8-sig', newline=None, threaded=True, chunk_size=1 << 20, queue_size=8):
+    """
+    Открывает файл на чтение как текст, распаковывая его на лету, если он сжат
+
+    Args:
+        file_name (str): Путь к файлу (csv, gzip, zstd или bz2)
+        encoding (str): Кодировка текста
+        newline (str): Как в open
+        threaded (bool): Распаковывать в фоновом потоке
+        chunk_size (int): Размер блока распаковки в байтах
+        queue_size (int): Максимальное количество распакованных блоков в очереди
+
+    Returns:
+        TextIO: Текстовый поток
+    """
+    compression = detect(file_name)
+    if compression is None:
+        return open(file_name, encoding=encoding, newline=newline)
+
+    stream = open_compressed(file_name, compression)
+    if threaded:
+        stream = io.BufferedReader(PrefetchReader(stream, chunk_size, queue_size), chunk_size)
+    return io.TextIOWrapper(stream, encoding=encoding, newline=newline)
+
+def open_writer(file_name, mode='w', compression=None, encoding='utf-8-sig', newline=''):
+    """
+    Открывает файл на запись или дозапись как текст, при необходимости со сжатием
+
+    Дозапись в сжатый файл добавляет к нему новый фрагмент (gzip member, zstd frame,
+    bz2 stream), такие файлы читаются open_text целиком
+
+    Args:
+        file_name (str): Путь к файлу
+        mode (str): 'w' или 'a'
+        compression (str): 'gzip', 'zstd', 'bz2' или None
+        encoding (str): Кодировка текста, BOM пишется только в начало файла
+        newline (str): Как в open
+
+    Returns:
+        TextIO: Текстовый поток
+    """
+    if mode == 'a' and encoding == 'utf-8-sig':
+        encoding = 'utf-8'
+    if compression is None:
+        return open(file_name, mode, encoding=encoding, newline=newline, buffering=1 << 20)
+    return io.TextIOWrapper(open_compressed(file_name, compression, mode + 'b'), encoding=encoding, newline=newline)
+
+def rows_end(data, start=0, end=None, quotes=None):
+    """
+    Возвращает конец последней целой строки csv в data[start:end]
+
+    data[start] должно быть началом строки. Перевод строки внутри кавычек
+    не считается концом строки
+
+    Args:
+        data (bytes or mmap): Данные csv файла
+        start (int): Начало строки, с которого начинается участок
+        end (int): Конец участка, None - конец данных
+        quotes (int): Количество кавычек в data[start:end], None - посчитать
+
+    Returns:
+        int: Смещение конца последней целой строки, start - если целых строк нет
+    """
+    end = len(data) if end is None else end
+    if quotes is None:
+        quotes = data[start:end].count(b'"')
+    while True:
+        i = data.rfind(b'\n', start, end)
+        if i < 0:
+            return start
+        quotes -= data[i:end].count(b'"')
+        if quotes % 2 == 0:
+            return i + 1
+        end = i
+
+def read_blocks(file_name, offset=0, block_size=1 << 24, end=None):
+    """
+    Читает файл блоками целых строк csv, начиная с байта offset
+
+    Без end файл читается через read, и незавершённая последняя строка (без перевода
+    строки) не читается, чтобы дописываемый файл можно было дочитать позже. С end
+    участок считается состоящим из целых строк, читается через отображение файла
+    в память, и последняя строка читается. Блок, в котором нет конца строки,
+    увеличивается вдвое
+
+    Args:
+        file_name (str): Путь к csv файлу
+        offset (int): Смещение начала первой строки
+        block_size (int): Размер читаемого блока в байтах
+        end (int): Смещение конца участка, None - до конца файла
+
+    Yields:
+        tuple: Список строк csv и смещение конца блока
+    """
+    if end is not None:
+        yield from _mapped_blocks(file_name, offset, block_size, end)
+        return
+
+    with open(file_name, 'rb') as file:
+        file.seek(offset)
+        rest = b''
+        while True:
+            data = file.read(block_size)
+            if not data:
+                break
+            data = rest + data
+            stop = rows_end(data)
+            rest = data[stop:]
+            if stop:
+                yield _parse(data[:stop], offset), offset + stop
+                offset += stop
+
+def _mapped_blocks(file_name, offset, block_size, end):
+    """
+    Читает участок файла из целых строк блоками через отображение в память
+
+    Args:
+        file_name (str): Путь к csv файлу
+        offset (int): Начало участка (начало строки)
+        block_size (int): Размер блока в байтах
+        end (int): Конец участка (начало строки или конец файла)
+
+    Yields:
+        tuple: Список строк csv и смещение конца блока
+    """
+    if end <= offset:
+        return
+    with open(file_name, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        while offset < end:
+            size = block_size
+            stop = min(offset + size, end)
+            while stop < end and rows_end(data, offset, stop) == offset:
+                size *= 2
+                stop = min(offset + size, end)
+            if stop < end:
+                stop = rows_end(data, offset, stop)
+            yield _parse(data[offset:stop], offset), stop
+            offset = stop
+
+def _parse(data, offset):
+    """
+    Разбирает целые строки csv
+
+    Args:
+        data (bytes): Строки csv
+        offset (int): Смещение данных в файле, в начале файла пропускается BOM
+
+    Returns:
+        list: Строки csv
+    """
+    text = data.decode('utf-8')
+    if offset == 0:
+        text = text.lstrip('\ufeff')
+    return list(csv.reader(io.StringIO(text, newline=None)))
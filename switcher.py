@@ -1,15 +1,78 @@
-from main import Report, InputConect
+import argparse
+import os
+from main import Report, InputConect, CurrencyRates
 
-choise = input('Что вывести?')
+def parse_args(args=None):
+    """
+    Разбирает аргументы командной строки
 
-report = Report()
+    Не переданные аргументы будут запрошены через input()
 
-ic = InputConect()
-data = ic.input_data()
-data = list(data)
+    Args:
+        args (list): Аргументы, None - sys.argv
 
-match choise:
-    case 'Вакансии':
-        report.generate_excel(data[:5], data[5:])
-    case 'Статистика':
-        report.generate_image(data)
+    Returns:
+        Namespace: Разобранные аргументы
+    """
+    parser = argparse.ArgumentParser(description='Статистика вакансий')
+    parser.add_argument('-o', '--output', choices=['Вакансии', 'Статистика'], help='что вывести')
+    parser.add_argument('-f', '--file', help='название файла')
+    parser.add_argument('-j', '--job', help='название профессии')
+    parser.add_argument('--rates', default='currencies_df.csv', help='таблица курсов валют (currency.py)')
+    parser.add_argument('--no-cache', action='store_true', help='не использовать кеш разобранных файлов')
+    parser.add_argument('--db', help='база SQLite, в которую загружается файл (database.py)')
+    parser.add_argument('--render-cache', help='папка кеша готовых отчётов (render_cache.py)')
+    parser.add_argument('--dedup', action='store_true', help='пропускать повторяющиеся вакансии (dedup.py)')
+    parser.add_argument('--trace', help='файл замеров этапов: .json - chrome trace, иначе json lines')
+    return parser.parse_args(args)
+
+def run(args=None):
+    """
+    Считает статистику и создаёт выбранный отчёт
+
+    Args:
+        args (list): Аргументы командной строки, None - sys.argv
+    """
+    args = parse_args(args)
+
+    if args.trace:
+        import profiling
+        profiling.enable(args.trace)
+
+    choise = args.output or input('Что вывести?')
+
+    render_cache = None
+    if args.render_cache:
+        from render_cache import RenderCache
+        render_cache = RenderCache(args.render_cache)
+
+    report = Report(render_cache)
+
+    cache = None
+    if not args.no_cache:
+        from cache import ColumnCache
+        cache = ColumnCache()
+    rates = CurrencyRates(args.rates) if os.path.exists(args.rates) else None
+
+    database = None
+    if args.db:
+        from database import VacancyDatabase
+        database = VacancyDatabase(args.db, rates)
+
+    dedup = None
+    if args.dedup:
+        from dedup import Deduplicator
+        dedup = Deduplicator()
+
+    ic = InputConect(cache=cache, rates=rates, database=database, dedup=dedup)
+    data = ic.input_data(args.file, args.job)
+    data = list(data)
+
+    match choise:
+        case 'Вакансии':
+            report.generate_excel(data[:5], data[5:])
+        case 'Статистика':
+            report.generate_image(data)
+
+if __name__ == '__main__':
+    run()
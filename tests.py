@@ -1,5 +1,73 @@
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
-from main import Salary, DataVacancy, InputConect, Report
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from main import Salary, DataVacancy, InputConect, Report, VacancyStatistics, CurrencyRates, VacancyTable
+from columnar import load_columns, columns_statistics, professions_statistics
+from matcher import ProfessionMatcher
+from parallel import parallel_file_statistics, parallel_separate, parallel_statistics, parse_range, row_ranges
+from separator import separate
+from cache import ColumnCache
+from currency import RateFetcher, load_currencies
+from convert import convert
+from benchmark import memory_per_row, run_suite, compare
+from generator import generate
+from store import AggregateStore
+from render import render_batch
+import profiling
+from service import VacancyService, serve
+from sketch import KLLSketch, Histogram, SalaryDistributions
+from streams import PrefetchReader, detect, open_text
+from preview import preview
+from database import VacancyDatabase
+from dedup import KEY_BYTES, BloomFilter, Deduplicator
+from render_cache import RenderCache
+from cube import VacancyCube
+
+HEAD = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
+
+ROWS = [
+    ['Программист Python', '100000', '200000', 'RUR', 'Москва', '2021-07-06T04:11:17+0300'],
+    ['Аналитик', '50000', '70000', 'RUR', 'Казань', '2021-03-01T04:11:17+0300'],
+    ['Python разработчик', '1000', '2000', 'EUR', 'Москва', '2022-01-10T04:11:17+0300'],
+    ['Менеджер', '', '30000', 'RUR', 'Казань', '2022-02-10T04:11:17+0300'],
+    ['Менеджер', '30000', '40000', 'RUR', 'Пермь', '2022-02-11T04:11:17+0300'],
+]
+
+def read_csv(path):
+    with open(path, encoding='utf-8-sig') as file:
+        return list(csv.reader(file))
+
+def html_converter(html, file_name):
+    with open(file_name, 'w', encoding='utf-8') as file:
+        file.write(html)
+
+def write_csv(path, rows, head=HEAD):
+    with open(path, 'w', encoding='utf-8-sig', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(head)
+        writer.writerows(rows)
+    return path
+
+slow = unittest.skipUnless(os.environ.get('URFU_SLOW_TESTS') == '1', 'долгий тест, нужен URFU_SLOW_TESTS=1')
+
+class VacanciesTestCase(unittest.TestCase):
+    """
+    Тесты во временной папке с файлом вакансий ROWS
+    """
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.file = write_csv(os.path.join(self.dir.name, 'vacancies.csv'), ROWS)
+
+    def path(self, name):
+        return os.path.join(self.dir.name, name)
 
 class SalaryTests(unittest.TestCase):
     def test_salary_type(self):
@@ -26,6 +94,36 @@ class SalaryTests(unittest.TestCase):
     def test_currency_in_get_salary(self):
         self.assertEqual(Salary(10, 30.0, True, 'EUR').convert_to_rub(), 1198.0)
 
+class CurrencyRatesTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.rates_file = os.path.join(self.dir.name, 'currencies_df.csv')
+        with open(self.rates_file, 'w') as file:
+            file.write('date,USD,EUR\n2021-07,70.0,80.0\n2022-1,75.0,\n')
+        self.rates = CurrencyRates(self.rates_file)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_rate(self):
+        self.assertEqual(self.rates.rate('USD', '2022-01-10T04:11:17+0300'), 75.0)
+        self.assertEqual(self.rates.rate('RUR', '2010-01-10T04:11:17+0300'), 1)
+        self.assertIsNone(self.rates.rate('EUR', '2022-01-10T04:11:17+0300'))
+        self.assertIsNone(self.rates.rate('USD', '2021-08-10T04:11:17+0300'))
+
+    def test_convert_to_rub(self):
+        salary = Salary(10, 30.0, True, 'EUR')
+        self.assertEqual(salary.convert_to_rub(self.rates, '2021-07-06T04:11:17+0300'), 1600.0)
+        self.assertEqual(salary.convert_to_rub(self.rates, '2022-01-06T04:11:17+0300'), 1198.0)
+
+    def test_batch_parity(self):
+        file = write_csv(os.path.join(self.dir.name, 'vacancies.csv'), ROWS)
+        columns = load_columns(file)
+        for job in ('Python', 'Менеджер'):
+            self.assertEqual(
+                columns_statistics(columns, job, self.rates).result(),
+                InputConect(rates=self.rates).read_statistics(file, job).result())
+
 class DataVacancyTests(unittest.TestCase):
     def test_data_vacancy_type(self):
         self.assertEqual(type(DataVacancy(
@@ -37,11 +135,849 @@ class DataVacancyTests(unittest.TestCase):
             '2022-07-06T04:11:17+0300'
         )).__name__, 'DataVacancy')
 
+    def test_data_vacancy_slots(self):
+        vacancy = DataVacancy('Программист', '10.5', 20, 'EUR', 'Москва', '2022-07-06T04:11:17+0300')
+        self.assertFalse(hasattr(vacancy, '__dict__'))
+        self.assertEqual(vacancy.salary_from, 10)
+        self.assertEqual(vacancy.salary.salary_currency, 'EUR')
+        self.assertEqual(vacancy.convert_to_rub(), 898.5)
+
+class VacancyTableTests(unittest.TestCase):
+    def test_views(self):
+        table = VacancyTable()
+        for row in ROWS[:3]:
+            table.append(*row)
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.cities, ['Москва', 'Казань'])
+        self.assertEqual([x.area_name for x in table], ['Москва', 'Казань', 'Москва'])
+        self.assertEqual(table[-1].name, 'Python разработчик')
+        self.assertEqual(table[2].convert_to_rub(), DataVacancy(*ROWS[2]).convert_to_rub())
+        with self.assertRaises(IndexError):
+            table[3]
+
+    def test_memory_per_row(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file = write_csv(os.path.join(directory, 'vacancies.csv'), [x for x in ROWS if '' not in x] * 500)
+            result = memory_per_row(file)
+        self.assertLess(result['table'], result['slots'])
+        self.assertLess(result['slots'], result['legacy'])
+
 class InputConnectTests(unittest.TestCase):
     def test_input_connect_type(self):
         ic = InputConect()
         self.assertEqual(type(InputConect()).__name__, 'InputConect')
 
+class VacancyStatisticsTests(VacanciesTestCase):
+    def test_read_statistics(self):
+        result = InputConect().read_statistics(self.file, 'Python').result()
+        self.assertEqual(result, (
+            {2021: 105000, 2022: 62425},
+            {2021: 2, 2022: 2},
+            {2021: 150000, 2022: 89850},
+            {2021: 1, 2022: 1},
+            {'Москва': 119925, 'Казань': 60000, 'Пермь': 35000},
+            {'Москва': 0.5, 'Казань': 0.25, 'Пермь': 0.25}))
+
+    def test_merge(self):
+        first, second = VacancyStatistics('Python'), VacancyStatistics('Python')
+        for i, vacancy in enumerate(InputConect().read_vacancies(self.file)):
+            (first if i % 2 else second).add(vacancy)
+        whole = InputConect().read_statistics(self.file, 'Python')
+        self.assertEqual(first.merge(second).result(), whole.result())
+
+class ColumnarTests(VacanciesTestCase):
+    def test_columns(self):
+        columns = load_columns(self.file)
+        self.assertEqual(len(columns), 4)
+        self.assertEqual(columns.cities, ['Москва', 'Казань', 'Пермь'])
+        self.assertEqual(columns.year.dtype.name, 'int16')
+
+    def test_parity(self):
+        columns = load_columns(self.file, block_size=3)
+        for job in ('Python', 'Менеджер', 'Нет такой'):
+            self.assertEqual(
+                columns_statistics(columns, job).result(),
+                InputConect().read_statistics(self.file, job).result())
+
+class SeparatorTests(VacanciesTestCase):
+    def setUp(self):
+        super().setUp()
+        self.years = os.path.join(self.dir.name, 'years')
+
+    def test_separate_by_year(self):
+        separate(self.file, self.years, max_open=1, block_size=1)
+        separate(self.file, self.years)
+        self.assertEqual(sorted(os.listdir(self.years)), ['2021.csv', '2022.csv'])
+        self.assertEqual(read_csv(os.path.join(self.years, '2022.csv')), [HEAD, ROWS[2], ROWS[4]])
+
+    def test_separate_by_month_and_area(self):
+        separate(self.file, self.years, by='month')
+        self.assertEqual(sorted(os.listdir(self.years)), ['2021-03.csv', '2021-07.csv', '2022-01.csv', '2022-02.csv'])
+        areas = os.path.join(self.dir.name, 'areas')
+        separate(self.file, areas, by='area', max_open=1)
+        self.assertEqual(read_csv(os.path.join(areas, 'Москва.csv')), [HEAD, ROWS[0], ROWS[2]])
+
+class CompressedInputTests(VacanciesTestCase):
+    def setUp(self):
+        super().setUp()
+        with open(self.file, 'rb') as file:
+            self.data = file.read()
+
+    def compress(self, module, suffix):
+        path = self.file + suffix
+        with module.open(path, 'wb') as file:
+            file.write(self.data)
+        return path
+
+    def test_read_compressed(self):
+        import bz2
+        import gzip
+        expected = InputConect().read_statistics(self.file, 'Python').result()
+        for module, suffix, compression in ((gzip, '.gz', 'gzip'), (bz2, '.bz2', 'bz2')):
+            path = self.compress(module, suffix)
+            self.assertEqual(detect(path), compression)
+            self.assertEqual(InputConect().read_statistics(path, 'Python').result(), expected)
+            self.assertEqual(columns_statistics(load_columns(path), 'Python').result(), expected)
+        self.assertIsNone(detect(self.file))
+
+    @unittest.skipUnless(__import__('importlib').util.find_spec('zstandard'), 'нет пакета zstandard')
+    def test_read_zstd(self):
+        import zstandard
+        path = self.file + '.zst'
+        with open(path, 'wb') as file:
+            file.write(zstandard.ZstdCompressor().compress(self.data))
+        self.assertEqual(detect(path), 'zstd')
+        self.assertEqual(read_csv(self.file), list(csv.reader(open_text(path))))
+
+    def test_prefetch_small_chunks(self):
+        import io
+        reader = io.BufferedReader(PrefetchReader(io.BytesIO(self.data), chunk_size=7, queue_size=2))
+        self.assertEqual(reader.read(), self.data)
+        reader.close()
+
+    def test_separate_compressed_shards(self):
+        import gzip
+        path = self.compress(gzip, '.gz')
+        years = os.path.join(self.dir.name, 'years')
+        separate(path, years, max_open=1, block_size=1, compression='gzip')
+        self.assertEqual(sorted(os.listdir(years)), ['2021.csv.gz', '2022.csv.gz'])
+        with open_text(os.path.join(years, '2022.csv.gz')) as file:
+            self.assertEqual(list(csv.reader(file)), [HEAD, ROWS[2], ROWS[4]])
+        expected = ('Python', *InputConect().read_statistics(self.file, 'Python').result())
+        self.assertEqual(parallel_statistics(years, 'Python', workers=2), expected)
+
+class ColumnCacheTests(VacanciesTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = ColumnCache(os.path.join(self.dir.name, 'cache'))
+
+    def test_cached_statistics(self):
+        ic = InputConect(cache=self.cache)
+        expected = InputConect().read_statistics(self.file, 'Python').result()
+        self.assertEqual(ic.read_statistics(self.file, 'Python').result(), expected)
+        self.assertEqual(ic.read_statistics(self.file, 'Python').result(), expected)
+        self.assertEqual(len(os.listdir(self.cache.directory)), 1)
+
+    def test_invalidation(self):
+        self.assertEqual(len(self.cache.load(self.file)), 4)
+        write_csv(self.file, ROWS[:2])
+        self.assertEqual(len(self.cache.load(self.file)), 2)
+        self.assertEqual(len(os.listdir(self.cache.directory)), 1)
+
+    def test_eviction(self):
+        self.cache.max_bytes = 0
+        other = write_csv(os.path.join(self.dir.name, 'other.csv'), ROWS[:2])
+        self.cache.load(self.file)
+        self.cache.load(other)
+        self.assertEqual(len(os.listdir(self.cache.directory)), 1)
+        self.assertEqual(len(self.cache.load(other)), 2)
+
+class CbrHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        date = self.path.split('date_req=')[1]
+        self.requests.append(date)
+        month = int(date.split('/')[1])
+        body = ('<?xml version="1.0" encoding="windows-1251"?><ValCurs>'
+                f'<Valute><CharCode>USD</CharCode><Nominal>1</Nominal><Value>{month},5</Value></Valute>'
+                '<Valute><CharCode>KZT</CharCode><Nominal>100</Nominal><Value>25,0</Value></Valute>'
+                '</ValCurs>').encode('cp1251')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class CurrencyTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), CbrHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        CbrHandler.requests = []
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.dir.cleanup()
+
+    def fetcher(self):
+        return RateFetcher(f'http://127.0.0.1:{self.server.server_port}/XML_daily.asp', workers=4, cache_dir=None)
+
+    def test_load_currencies(self):
+        file = os.path.join(self.dir.name, 'currencies_df.csv')
+        df = load_currencies('2021-11', '2022-02', file, self.fetcher())
+        self.assertEqual(list(df.index), ['2021-11', '2021-12', '2022-01', '2022-02'])
+        self.assertEqual(list(df.columns), ['USD', 'KZT'])
+        self.assertEqual(df.loc['2022-02', 'USD'], 2.5)
+        self.assertEqual(df.loc['2022-02', 'KZT'], 0.25)
+
+        CbrHandler.requests = []
+        load_currencies('2021-11', '2022-03', file, self.fetcher())
+        self.assertEqual(CbrHandler.requests, ['01/03/2022'])
+
+    def test_raw_cache(self):
+        fetcher = RateFetcher(f'http://127.0.0.1:{self.server.server_port}/XML_daily.asp', cache_dir=self.dir.name)
+        first = fetcher.fetch(5, 2020)
+        self.assertEqual(fetcher.fetch(5, 2020), first)
+        self.assertEqual(CbrHandler.requests, ['01/05/2020'])
+
+        with open(os.path.join(self.dir.name, '2020-05.xml'), 'wb') as file:
+            file.write(first[:len(first) // 2])
+        self.assertEqual(fetcher.fetch(5, 2020), first)
+        self.assertEqual(CbrHandler.requests, ['01/05/2020', '01/05/2020'])
+        self.assertEqual(os.listdir(self.dir.name), ['2020-05.xml'])
+
+class ConvertTests(unittest.TestCase):
+    def test_convert(self):
+        with tempfile.TemporaryDirectory() as directory:
+            rates = os.path.join(directory, 'currencies_df.csv')
+            with open(rates, 'w') as file:
+                file.write('date,USD,EUR\n2021-07,70.0,80.0\n2022-1,75.0,\n')
+            file = write_csv(os.path.join(directory, 'vacancies.csv'), [
+                ['Программист', '100', '200', 'USD', 'Москва', '2021-07-06T04:11:17+0300'],
+                ['Аналитик', '', '1000', 'RUR', 'Казань', '2021-03-01T04:11:17+0300'],
+                ['Тестировщик', '100', '', 'USD', 'Пермь', '2022-01-10T04:11:17+0300'],
+                ['Менеджер', '100', '200', 'EUR', 'Пермь', '2022-01-10T04:11:17+0300'],
+                ['Без зарплаты', '', '', 'RUR', 'Пермь', '2021-07-10T04:11:17+0300'],
+                ['Дизайнер', '100', '300', 'EUR', 'Москва', '2021-07-10T04:11:17+0300'],
+            ])
+            import gzip
+            with open(file, 'rb') as plain, gzip.open(file + '.gz', 'wb') as packed:
+                packed.write(plain.read())
+            result = os.path.join(directory, 'convert.csv')
+            convert(file + '.gz', rates, result, chunksize=2)
+            self.assertEqual(read_csv(result), [
+                ['name', 'salary', 'area_name', 'published_at'],
+                ['Программист', '10500.0', 'Москва', '2021-07-06T04:11:17+0300'],
+                ['Тестировщик', '7500.0', 'Пермь', '2022-01-10T04:11:17+0300'],
+                ['Дизайнер', '16000.0', 'Москва', '2021-07-10T04:11:17+0300'],
+            ])
+
+class ParallelTests(VacanciesTestCase):
+    def test_parallel_statistics(self):
+        separate(self.file, os.path.join(self.dir.name, 'years'))
+
+        expected = ('Python', *InputConect().read_statistics(self.file, 'Python').result())
+        self.assertEqual(parallel_statistics(os.path.join(self.dir.name, 'years'), 'Python', workers=2), expected)
+
+    def test_byte_ranges(self):
+        rows = ROWS + [
+            ['"Python" разработчик,\nстарший', '10000', '20000', 'RUR', 'Москва', '2021-05-01T04:11:17+0300'],
+            ['Менеджер', '1000', '2000', 'USD', 'Санкт-Петербург', '2022-06-01T04:11:17+0300'],
+        ] * 20
+        with tempfile.TemporaryDirectory() as directory:
+            file = write_csv(os.path.join(directory, 'vacancies.csv'), rows)
+            head, ranges = row_ranges(file, 50)
+            self.assertEqual(head, HEAD)
+            with open(file, 'rb') as f:
+                data = f.read()
+            parsed = [row for start, end in ranges for row in csv.reader(io.StringIO(data[start:end].decode('utf-8'), newline=None))]
+            self.assertEqual(parsed, read_csv(file)[1:])
+
+            expected = ('Python', *InputConect().read_statistics(file, 'Python').result())
+            stats = VacancyStatistics('Python')
+            for i, (start, end) in enumerate(ranges):
+                part, written = parse_range(file, start, end, head, 'Python', directory=os.path.join(directory, 'parts'),
+                                            index=i, block_size=16)
+                stats.merge(part)
+                self.assertTrue(all(os.path.exists(path) for _, path in written))
+            self.assertEqual(('Python', *stats.result()), expected)
+            years = os.path.join(directory, 'years')
+            self.assertEqual(parallel_file_statistics(file, 'Python', workers=2, directory=years), expected)
+
+            separate(file, os.path.join(directory, 'expected'))
+            parallel_separate(file, os.path.join(directory, 'areas'), by='area', workers=2)
+            self.assertEqual(sorted(os.listdir(years)), sorted(os.listdir(os.path.join(directory, 'expected'))))
+            for name in os.listdir(years):
+                with open(os.path.join(years, name), 'rb') as actual, open(os.path.join(directory, 'expected', name), 'rb') as wanted:
+                    self.assertEqual(actual.read(), wanted.read())
+            self.assertIn('Санкт-Петербург.csv', os.listdir(os.path.join(directory, 'areas')))
+
+class ProfessionsTests(VacanciesTestCase):
+    JOBS = ['Python', 'Менеджер', 'Программист', 'раз', '']
+
+    def test_matcher(self):
+        patterns = ['he', 'she', 'his', 'hers', 'ers', 'x']
+        for automaton in (0, 100):
+            matcher = ProfessionMatcher(patterns, automaton)
+            self.assertEqual(matcher.automaton, automaton == 0)
+            for text in ('ushers', 'his hershey', 'x', '', 'nothing', 'ushers'):
+                self.assertEqual(matcher.match(text), {i for i, x in enumerate(patterns) if x in text})
+
+    def test_read_professions(self):
+        results = InputConect().read_professions(self.file, self.JOBS).result()
+        self.assertEqual(list(results), self.JOBS)
+        for job in self.JOBS:
+            self.assertEqual(results[job], (job, *InputConect().read_statistics(self.file, job).result()))
+        columns = load_columns(self.file)
+        self.assertEqual(professions_statistics(columns, self.JOBS).result(), results)
+
+    def test_generate_professions(self):
+        results = InputConect().read_professions(self.file, ['Python', 'Менеджер']).result()
+        cwd = os.getcwd()
+        os.chdir(self.dir.name)
+        try:
+            files = Report().generate_professions(results)
+            self.assertEqual(files, ['report_Python.xlsx', 'graph_Python.png', 'report_Менеджер.xlsx', 'graph_Менеджер.png'])
+            self.assertTrue(all(os.path.exists(x) for x in files))
+        finally:
+            os.chdir(cwd)
+
+class AggregateStoreTests(VacanciesTestCase):
+    def test_incremental_update(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file = write_csv(os.path.join(directory, 'vacancies.csv'), ROWS[:2])
+            path = os.path.join(directory, 'aggregates.json')
+            self.assertEqual(AggregateStore(path, ['Python']).update(file), 2)
+
+            with open(file, 'a', encoding='utf-8', newline='') as f:
+                csv.writer(f).writerows(ROWS[2:] + [['Менеджер', '1', '2', 'RUR', 'Москва\nцентр', '2022-01-01']])
+            store = AggregateStore(path, ['Python'])
+            self.assertEqual(store.update(file), 3)
+            self.assertEqual(store.update(file), 0)
+
+            expected = ('Python', *InputConect().read_statistics(file, 'Python').result())
+            self.assertEqual(AggregateStore(path, ['Python']).result('Python'), expected)
+            with self.assertRaises(ValueError):
+                AggregateStore(path, ['Java'])
+
+    def test_changed_file(self):
+        path = os.path.join(self.dir.name, 'aggregates.json')
+        AggregateStore(path, ['Python']).update(self.file)
+
+        write_csv(self.file, ROWS[:2])
+        with self.assertRaises(ValueError):
+            AggregateStore(path, ['Python']).update(self.file)
+
+        write_csv(self.file, [[x.upper() for x in row] for row in ROWS])
+        with self.assertRaises(ValueError):
+            AggregateStore(path, ['Python']).update(self.file)
+
+class ExcelTests(VacanciesTestCase):
+    def test_write_only_matches_normal(self):
+        from openpyxl import load_workbook
+        ic = InputConect()
+        data = ['Python', *ic.read_statistics(self.file, 'Python').result()]
+        normal, stream = os.path.join(self.dir.name, 'normal.xlsx'), os.path.join(self.dir.name, 'stream.xlsx')
+        Report().generate_excel(data[:5], data[5:], normal, ic.read_job_vacancies(self.file, 'Python'))
+        Report().generate_excel(data[:5], data[5:], stream, ic.read_job_vacancies(self.file, 'Python'), write_only=True)
+
+        normal, stream = load_workbook(normal), load_workbook(stream)
+        self.assertEqual(normal.sheetnames, ['Статистика по годам', 'Статистика по городам', 'Вакансии'])
+        self.assertEqual(stream.sheetnames, normal.sheetnames)
+        style = lambda x: (x.value, x.font.b, x.border.left and x.border.left.style, x.number_format)
+        for name in normal.sheetnames:
+            for a, b in zip(normal[name].iter_rows(), stream[name].iter_rows()):
+                self.assertEqual([style(x) for x in a], [style(x) for x in b])
+        self.assertEqual(stream['Вакансии']['A3'].value, 'Python разработчик')
+
+@slow
+class ImportTimeTests(unittest.TestCase):
+    HEAVY = ('matplotlib', 'numpy', 'openpyxl', 'pdfkit', 'jinja2', 'pandas')
+
+    def import_times(self, module):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        times = {}
+        for line in result.stderr.splitlines()[1:]:
+            _, cumulative, name = line.split('|')
+            times[name.strip()] = int(cumulative)
+        return times
+
+    def test_main_is_light(self):
+        times = self.import_times('main')
+        self.assertFalse([x for x in times if x.split('.')[0] in self.HEAVY])
+        self.assertLess(times['main'], 500000)
+
+    def test_switcher_is_light(self):
+        times = self.import_times('switcher')
+        self.assertFalse([x for x in times if x.split('.')[0] in self.HEAVY])
+
+class SwitcherTests(VacanciesTestCase):
+    def test_cli(self):
+        from switcher import run
+        cwd = os.getcwd()
+        os.chdir(self.dir.name)
+        try:
+            run(['-o', 'Вакансии', '-f', self.file, '-j', 'Python', '--no-cache'])
+            run(['-o', 'Статистика', '-f', self.file, '-j', 'Python'])
+            self.assertTrue(os.path.exists('report.xlsx'))
+            self.assertTrue(os.path.exists('graph.png'))
+        finally:
+            os.chdir(cwd)
+
+class ProfilingTests(VacanciesTestCase):
+    def test_disabled_span_is_shared(self):
+        self.assertFalse(profiling.enabled())
+        with profiling.span('a') as span:
+            span.rows = 10
+        self.assertIs(profiling.span('b'), span)
+
+    def test_json_lines(self):
+        trace = os.path.join(self.dir.name, 'trace.jsonl')
+        profiling.enable(trace, memory=True)
+        try:
+            data = ('Python', *InputConect().read_statistics(self.file, 'Python').result())
+            Report().generate_excel(data[:5], data[5:], os.path.join(self.dir.name, 'report.xlsx'))
+        finally:
+            profiling.disable()
+
+        with open(trace, encoding='utf-8') as f:
+            events = {event['name']: event for event in map(json.loads, f)}
+        for name in ('InputConect.csv', 'InputConect.vacancies', 'InputConect.aggregate', 'VacancyStatistics.cities', 'Report.excel_styling', 'Report.excel_save'):
+            self.assertIn(name, events)
+        self.assertEqual(events['InputConect.read_statistics']['rows'], 4)
+        self.assertIn('tracemalloc_peak', events['Report.generate_excel'])
+        self.assertGreater(events['Report.generate_excel']['peak_rss'], 0)
+        self.assertEqual(data[1:], InputConect().read_statistics(self.file, 'Python').result())
+
+    def test_chrome_trace(self):
+        with tempfile.TemporaryDirectory() as directory:
+            trace = os.path.join(directory, 'trace.json')
+            profiling.enable(trace)
+            with profiling.span('outer', rows=5, job='Python'):
+                with profiling.span('inner'):
+                    pass
+            profiling.disable()
+
+            with open(trace, encoding='utf-8') as f:
+                events = json.load(f)['traceEvents']
+            self.assertEqual([event['name'] for event in events], ['inner', 'outer'])
+            self.assertEqual({event['ph'] for event in events}, {'X'})
+            self.assertEqual(events[1]['args']['job'], 'Python')
+            self.assertEqual(events[1]['args']['rows'], 5)
+            self.assertLessEqual(events[1]['ts'], events[0]['ts'])
+
+    def test_nested_memory_peaks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            if not profiling.tracemalloc.is_tracing():
+                self.addCleanup(profiling.tracemalloc.stop)
+            tracer = profiling.Tracer(os.path.join(directory, 'trace.jsonl'), memory=True)
+            with tracer.span('outer'):
+                data = bytearray(20 << 20)
+                del data
+                with tracer.span('inner'):
+                    small = bytearray(1 << 20)
+                    del small
+                data = bytearray(5 << 20)
+                del data
+            events = {event['name']: event['tracemalloc_peak'] for event in tracer.events}
+            self.assertGreater(events['outer'], 20 << 20)
+            self.assertLess(events['inner'], 10 << 20)
+            self.assertEqual(tracer.peaks(), [])
+
+class ServiceTests(VacanciesTestCase):
+    def test_query_matches_input_conect(self):
+        service = VacancyService(self.file)
+        self.assertEqual(service.query('Python'), ('Python', *InputConect().read_statistics(self.file, 'Python').result()))
+
+        rows = [row for row in ROWS if row[4] == 'Москва' and '2021' <= row[5][:4] <= '2022']
+        part = write_csv(os.path.join(self.dir.name, 'part.csv'), rows)
+        expected = ('Python', *InputConect().read_statistics(part, 'Python').result())
+        self.assertEqual(service.query('Python', 'Москва', 2021, 2022), expected)
+        self.assertEqual(service.query('Python', 'Москва', 2021, 2022), expected)
+        self.assertEqual((service.hits, service.misses), (1, 2))
+
+    def test_hot_reload(self):
+        service = VacancyService(self.file, check_interval=0)
+        before = service.query('Python')
+        write_csv(self.file, ROWS[:2])
+        os.utime(self.file, ns=(1, 1))
+        after = service.query('Python')
+        self.assertEqual(service.reloads, 2)
+        self.assertNotEqual(before, after)
+        self.assertEqual(after, ('Python', *InputConect().read_statistics(self.file, 'Python').result()))
+
+    def test_concurrent_reload(self):
+        service = VacancyService(self.file, check_interval=0)
+        write_csv(self.file, ROWS[:2])
+        os.utime(self.file, ns=(1, 1))
+        threads = [threading.Thread(target=service.query, args=('Python',)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(service.reloads, 2)
+
+    def test_http(self):
+        from urllib.parse import quote
+        from urllib.request import urlopen
+        server = serve(VacancyService(self.file), port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = f'http://127.0.0.1:{server.server_address[1]}/statistics?job=Python&city={quote("Москва")}&from=2020'
+            with urlopen(url) as response:
+                body = json.load(response)
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(body['job'], 'Python')
+        self.assertEqual(list(body['city_salary']), ['Москва'])
+
+    def test_http_error(self):
+        from urllib.error import HTTPError
+        from urllib.request import urlopen
+        server = serve(VacancyService(self.file, check_interval=0), port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        os.remove(self.file)
+        try:
+            with self.assertRaises(HTTPError) as error:
+                urlopen(f'http://127.0.0.1:{server.server_address[1]}/statistics?job=Python')
+            self.assertEqual(error.exception.code, 500)
+            self.assertIn('FileNotFoundError', json.load(error.exception)['error'])
+            error.exception.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+class SketchTests(unittest.TestCase):
+    def test_kll_rank_error(self):
+        import random
+        rnd = random.Random(1)
+        values = [rnd.lognormvariate(11, 0.6) for _ in range(50000)]
+        first, second = KLLSketch(), KLLSketch(seed=1)
+        for value in values[:30000]:
+            first.add(value)
+        second.update(values[30000:])
+        sketch = first.merge(second)
+
+        ordered = sorted(values)
+        self.assertEqual(sketch.count, len(values))
+        self.assertLess(sum(map(len, sketch.compactors)), 1000)
+        for q, estimate in zip((0.1, 0.5, 0.9), sketch.quantiles((0.1, 0.5, 0.9))):
+            rank = sum(1 for x in ordered if x <= estimate) / len(values)
+            self.assertLess(abs(rank - q), 0.02)
+
+    def test_histogram(self):
+        first, second = Histogram(10, 5), Histogram(10, 5)
+        first.update([-1, 5, 15, 100])
+        second.add(25)
+        self.assertEqual(first.merge(second).counts, [2, 1, 1, 0, 1])
+        self.assertEqual(first.edges(), [0, 10, 20, 30, 40])
+
+    def test_merge_mismatch(self):
+        for first, second in ((Histogram(10, 5), Histogram(10, 6)), (Histogram(10, 5), Histogram(20, 5)),
+                              (KLLSketch(200), KLLSketch(100)), (SalaryDistributions(bins=5), SalaryDistributions())):
+            with self.assertRaises(ValueError):
+                first.merge(second)
+
+    def test_quantiles_in_same_pass(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'vacancies.csv')
+            generate(file, 5000, seed=2)
+            stats = InputConect().read_statistics(file, 'Python', distributions=True)
+            columns = columns_statistics(load_columns(file), 'Python', distributions=True)
+            self.assertEqual(stats.result(), columns.result())
+
+            years, cities = stats.quantiles()
+            self.assertEqual(list(years), list(range(2007, 2023)))
+            self.assertEqual(list(cities), list(stats.result()[4]))
+            for (year, expected), actual in zip(years.items(), columns.quantiles()[0].values()):
+                self.assertLessEqual(abs(expected[0] - actual[0]), 0.1 * expected[0])
+                self.assertLess(expected[0], expected[1])
+
+            data = ('Python', *stats.result())
+            report = Report()
+            report.generate_excel(data[:5], data[5:], os.path.join(directory, 'report.xlsx'), quantiles=(years, cities))
+            report.generate_image(data, os.path.join(directory, 'graph.png'), quantiles=(years, cities))
+            from openpyxl import load_workbook
+            ws = load_workbook(os.path.join(directory, 'report.xlsx'))['Статистика по годам']
+            self.assertEqual([cell.value for cell in ws[1]][-2:], ['Медианная зарплата', 'Зарплата p90'])
+            self.assertEqual(ws['F2'].value, years[2007][0])
+
+class PreviewTests(unittest.TestCase):
+    @slow
+    def test_preview_intervals(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'vacancies.csv')
+            generate(file, 20000, seed=3)
+            exact = InputConect().read_statistics(file, 'Программист').result()
+
+            for method in ('offsets', 'reservoir'):
+                data, errors = preview(file, 'Программист', n=4000, method=method)
+                self.assertAlmostEqual(sum(data[2].values()), sum(exact[1].values()), delta=0.05 * sum(exact[1].values()))
+                for values, estimates, error in ((exact[0], data[1], errors[0]), (exact[1], data[2], errors[1])):
+                    inside = [abs(values[key] - estimates[key]) <= error[key] for key in values if values[key] > 1000]
+                    self.assertGreaterEqual(sum(inside) / len(inside), 0.75)
+
+            Report().generate_image(data, os.path.join(directory, 'preview.png'), errors=errors)
+            self.assertTrue(os.path.exists(os.path.join(directory, 'preview.png')))
+
+class DatabaseTests(VacanciesTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db = VacancyDatabase(os.path.join(self.dir.name, 'vacancies.db'))
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_statistics(self):
+        self.assertEqual(self.db.load(self.file), 4)
+        self.assertEqual(self.db.load(self.file), 0)
+        for job in ('python', 'Py', 'Python'):
+            expected = InputConect().read_statistics(self.file, job).result()
+            self.assertEqual(self.db.statistics(job).result(), expected)
+        self.assertEqual(InputConect(database=self.db).read_statistics(self.file, 'Python').result(), expected)
+
+        rows = [row for row in ROWS if row[4] == 'Москва' and row[5] >= '2022']
+        part = write_csv(os.path.join(self.dir.name, 'part.csv'), rows)
+        expected = InputConect().read_statistics(part, 'Python').result()
+        self.assertEqual(self.db.statistics('Python', 'Москва', 2022, 2022).result(), expected)
+
+    def test_other_rates(self):
+        self.db.load(self.file)
+        rates_file = os.path.join(self.dir.name, 'currencies_df.csv')
+        with open(rates_file, 'w') as file:
+            file.write('date,USD,EUR\n2022-01,75.0,100.0\n')
+        rates = CurrencyRates(rates_file)
+
+        db = VacancyDatabase(self.db.path, rates)
+        self.assertEqual(db.load(self.file), 4)
+        self.assertEqual(db.load(self.file), 0)
+        self.assertEqual(db.statistics('Python').result(), InputConect(rates=rates).read_statistics(self.file, 'Python').result())
+        db.close()
+
+    def test_reload_and_shards(self):
+        self.db.load(self.file)
+        write_csv(self.file, ROWS[:2])
+        os.utime(self.file, ns=(1, 1))
+        self.assertEqual(self.db.load(self.file), 2)
+        self.assertEqual(self.db.statistics('Python').total, 2)
+        self.assertEqual(self.db.connection.execute("SELECT COUNT(*) FROM names WHERE names MATCH 'Аналитик'").fetchone()[0], 1)
+
+        os.remove(self.file)
+        years = os.path.join(self.dir.name, 'years')
+        separate(write_csv(os.path.join(self.dir.name, 'all.csv'), ROWS), years)
+        db = VacancyDatabase(os.path.join(self.dir.name, 'shards.db'))
+        self.assertEqual(db.load(years), 4)
+        self.assertEqual(db.statistics('Python').result(), InputConect().read_statistics(os.path.join(self.dir.name, 'all.csv'), 'Python').result())
+        db.close()
+
+    def test_several_files(self):
+        files = [write_csv(os.path.join(self.dir.name, 'a.csv'), ROWS[:2]),
+                 write_csv(os.path.join(self.dir.name, 'b.csv'), ROWS[2:])]
+        ic = InputConect(database=self.db)
+        for file in files + files:
+            expected = InputConect().read_statistics(file, 'Python').result()
+            self.assertEqual(ic.read_statistics(file, 'Python').result(), expected)
+            self.assertEqual(self.db.statistics('Python', file_name=file).result(), expected)
+        self.assertEqual(self.db.statistics('Python').total, 4)
+
+class RenderTests(VacanciesTestCase):
+    def test_render_batch(self):
+        results = InputConect().read_professions(self.file, ['Python', 'Менеджер']).result()
+        jobs = [(data, os.path.join(self.dir.name, job)) for job, data in results.items()]
+
+        cwd = os.getcwd()
+        os.chdir(self.dir.name)
+        try:
+            rendered = render_batch(jobs, workers=2, converter=html_converter)
+        finally:
+            os.chdir(cwd)
+        for (data, folder), result in zip(jobs, rendered):
+            self.assertEqual(set(result['timings']), {'excel', 'image', 'pdf'})
+            self.assertEqual(sorted(os.listdir(folder)), ['graph.png', 'report.pdf', 'report.xlsx'])
+            with open(os.path.join(folder, 'report.pdf'), encoding='utf-8') as pdf:
+                html = pdf.read()
+            self.assertIn(f'профессии {data[0]}', html)
+            self.assertIn(os.path.join(folder, 'graph.png'), html)
+
+class BenchmarkTests(unittest.TestCase):
+    def test_generator_is_deterministic(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first, second = os.path.join(directory, 'first.csv'), os.path.join(directory, 'second.csv')
+            generate(first, 2000, seed=1)
+            generate(second, 2000, seed=1)
+            rows = read_csv(first)
+            self.assertEqual(rows, read_csv(second))
+            self.assertEqual(rows[0], HEAD)
+            self.assertEqual(len(rows), 2001)
+            cities = [x[4] for x in rows[1:]]
+            self.assertEqual(max(set(cities), key=cities.count), 'Москва')
+
+    @slow
+    def test_suite_and_compare(self):
+        result = run_suite(500, stages=('input_data', 'separate'))
+        self.assertEqual(set(result['stages']), {'input_data', 'separate'})
+        self.assertGreater(result['stages']['separate']['peak_rss'], 0)
+        self.assertEqual(compare(result, result), [])
+
+        slower = {'stages': {'input_data': dict(result['stages']['input_data'])}}
+        slower['stages']['input_data']['seconds'] *= 2
+        self.assertEqual(compare(slower, result)[0][:2], ('input_data', 'seconds'))
+
+class DedupTests(VacanciesTestCase):
+    def setUp(self):
+        super().setUp()
+        self.copy = write_csv(os.path.join(self.dir.name, 'copy.csv'), ROWS + ROWS[:2])
+
+    def test_read_statistics(self):
+        expected = InputConect().read_statistics(self.file, 'Python').result()
+        dedup = Deduplicator()
+        ic = InputConect(dedup=dedup)
+        self.assertEqual(ic.read_statistics(self.copy, 'Python').result(), expected)
+        self.assertEqual((dedup.kept, dedup.dropped), (4, 2))
+        self.assertEqual(list(ic.read_rows(self.file)), [])
+        self.assertEqual(dedup.dropped, 6)
+
+    def test_separate(self):
+        years = os.path.join(self.dir.name, 'years')
+        dedup = Deduplicator()
+        separate(self.copy, years, dedup=dedup)
+        separate(self.file, years, dedup=dedup)
+        self.assertEqual(dedup.dropped, 6)
+        self.assertEqual(read_csv(os.path.join(years, '2021.csv')), [HEAD, ROWS[0], ROWS[1]])
+
+    def test_bloom_fallback(self):
+        dedup = Deduplicator(len(BloomFilter(10000).bits) + 100 * KEY_BYTES, capacity=10000, error=0.001)
+        self.assertEqual(dedup.max_exact, 100)
+        rows = [(str(i), 'x') for i in range(5000)]
+        self.assertEqual(sum(dedup.add(row) for row in rows), dedup.kept)
+        self.assertIsNotNone(dedup.bloom)
+        self.assertGreater(dedup.kept, 4990)
+        self.assertEqual(list(dedup.filter(rows)), [])
+
+        bloom = BloomFilter(1000, 0.01)
+        keys = [Deduplicator.key((str(i),)) for i in range(2000)]
+        self.assertTrue(all(bloom.add(key) for key in keys[:1000]))
+        self.assertFalse(any(bloom.add(key) for key in keys[:1000]))
+        self.assertTrue(all(key in bloom for key in keys[:1000]))
+        self.assertLess(sum(key in bloom for key in keys[1000:]), 30)
+        with self.assertRaises(ValueError):
+            Deduplicator(1 << 10, capacity=10000)
+
+class RenderCacheTests(VacanciesTestCase):
+    def setUp(self):
+        super().setUp()
+        self.data = ('Python', *InputConect().read_statistics(self.file, 'Python').result())
+        self.cache = RenderCache(os.path.join(self.dir.name, 'cache'))
+        self.report = Report(self.cache)
+
+    def test_hits_and_misses(self):
+        self.report.generate_image(self.data, self.path('graph.png'))
+        self.report.generate_image(self.data, self.path('graph.png'))
+        self.report.generate_image(self.data, self.path('copy.png'))
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+        with open(self.path('graph.png'), 'rb') as first, open(self.path('copy.png'), 'rb') as second:
+            self.assertEqual(first.read(), second.read())
+
+        self.report.generate_image(('Java', *self.data[1:]), self.path('graph.png'))
+        self.report.generate_excel(self.data[:5], self.data[5:], self.path('report.xlsx'))
+        self.report.generate_excel(self.data[:5], self.data[5:], self.path('report.xlsx'), write_only=True)
+        self.report.generate_excel(self.data[:5], self.data[5:], self.path('copy.xlsx'))
+        self.assertEqual((self.cache.hits, self.cache.misses), (3, 4))
+        from openpyxl import load_workbook
+        Report().generate_excel(self.data[:5], self.data[5:], self.path('plain.xlsx'))
+        copy, plain = load_workbook(self.path('copy.xlsx')), load_workbook(self.path('plain.xlsx'))
+        for name in plain.sheetnames:
+            self.assertEqual(list(copy[name].values), list(plain[name].values))
+
+        self.report.generate_pdf(self.data, self.path('report.pdf'), self.path('graph.png'), converter=html_converter)
+        self.report.generate_pdf(self.data, self.path('report.pdf'), self.path('graph.png'), converter=html_converter)
+        self.report.generate_pdf(self.data, self.path('report.pdf'), self.path('copy.png'), converter=html_converter)
+        self.assertEqual((self.cache.hits, self.cache.misses), (4, 6))
+
+    def test_pdf_outside_project(self):
+        cwd = os.getcwd()
+        os.chdir(self.dir.name)
+        try:
+            Report().generate_pdf(self.data, 'plain.pdf', 'graph.png', converter=html_converter)
+            self.report.generate_pdf(self.data, 'report.pdf', 'graph.png', converter=html_converter)
+            self.report.generate_pdf(self.data, 'report.pdf', 'graph.png', converter=html_converter)
+        finally:
+            os.chdir(cwd)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        with open(self.path('plain.pdf'), encoding='utf-8') as plain, open(self.path('report.pdf'), encoding='utf-8') as cached:
+            self.assertEqual(cached.read(), plain.read())
+
+    def test_eviction(self):
+        cache = RenderCache(os.path.join(self.dir.name, 'small'), max_bytes=1)
+        report = Report(cache)
+        report.generate_image(self.data, self.path('graph.png'))
+        report.generate_image(('Java', *self.data[1:]), self.path('graph.png'))
+        self.assertEqual(len(os.listdir(cache.directory)), 1)
+        report.generate_image(self.data, self.path('graph.png'))
+        self.assertEqual((cache.hits, cache.misses), (0, 3))
+
+class CubeTests(VacanciesTestCase):
+    def setUp(self):
+        super().setUp()
+        generate(self.file, 5000, seed=5)
+        self.cube = VacancyCube.from_file(self.file)
+
+    def test_statistics(self):
+        for job in ('Программист', 'Python', None):
+            expected = InputConect().read_statistics(self.file, job).result()
+            self.assertEqual(self.cube.statistics(job).result(), expected)
+
+        columns = load_columns(self.file)
+        city = columns.cities[0]
+        part = columns.select(columns.mask(city, 2015, 2020))
+        expected = columns_statistics(part, 'Программист').result()
+        self.assertEqual(self.cube.statistics('Программист', city, 2015, 2020).result(), expected)
+
+        path = os.path.join(self.dir.name, 'cube.npz')
+        self.cube.save(path)
+        self.assertEqual(VacancyCube.load(path).data('Программист', city), self.cube.data('Программист', city))
+
+    def test_profession_matching(self):
+        rows = [
+            ['Python  dev', '100000', '200000', 'RUR', 'Москва', '2021-07-06T04:11:17+0300'],
+            ['Senior Python', '50000', '70000', 'RUR', 'Казань', '2021-03-01T04:11:17+0300'],
+            ['Python ', '30000', '40000', 'RUR', 'Казань', '2022-02-11T04:11:17+0300'],
+            ['python', '1000', '2000', 'EUR', 'Москва', '2022-01-10T04:11:17+0300'],
+        ]
+        file = write_csv(os.path.join(self.dir.name, 'names.csv'), rows)
+        cube = VacancyCube.from_file(file)
+        self.assertEqual(cube.professions, ['python dev', 'python'])
+        for job, count in (('Python dev', 1), ('PYTHON', 4), ('Senior Python', 4), ('dev', 1), ('java', 0)):
+            self.assertEqual(sum(cube.statistics(job).job_count.values()), count)
+        self.assertEqual({key: count for key, (_, count) in cube.roll_up('profession').items()}, {'python dev': 1, 'python': 3})
+
+    def test_roll_up_and_render(self):
+        columns = load_columns(self.file)
+        city = columns.cities[0]
+        by_year = self.cube.roll_up('year', city=city)
+        self.assertEqual({year: count for year, (_, count) in by_year.items()},
+                         columns_statistics(columns.select(columns.mask(city)), None).year_count)
+
+        top = self.cube.roll_up('city', 'Программист', start=2020, end=2020, top=3)
+        self.assertEqual(len(top), 3)
+        counts = [count for _, count in top.values()]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        professions = self.cube.roll_up('profession', 'Программист', city=city)
+        self.assertTrue(all('программист' in x for x in professions))
+        by_year = self.cube.roll_up('year', 'Программист', city)
+        self.assertEqual(sum(x[1] for x in professions.values()), sum(x[1] for x in by_year.values()))
+
+        image = os.path.join(self.dir.name, 'graph.png')
+        data = self.cube.render(Report(), 'Программист', city, image=image)
+        self.assertEqual(data[0], 'Программист')
+        self.assertTrue(os.path.exists(image))
+
 class ReportTests(unittest.TestCase):
     def test_report_type(self):
         self.assertEqual(type(ReportTests()).__name__, 'Report')